@@ -2,24 +2,690 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import pandas as pd
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import Future
 from datetime import datetime, timedelta
+from pathlib import Path
+import hashlib
 import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def game_session_history(connection, student_id, limit):
+    """
+    Lê as últimas sessões concluídas de um estudante em ``game_sessions``
+    
+    As sessões gravadas pela API são a fonte persistente do histórico do
+    motor; este é o carregador usado para reidratar um estudante.
+    
+    Args:
+        connection: Conexão SQLAlchemy com o banco da aplicação
+        student_id: ID do estudante
+        limit: Quantidade máxima de sessões
+    
+    Returns:
+        Lista de (timestamp, session_data), da mais antiga para a mais recente;
+        ``session_data['session_id']`` é a chave de idempotência da sessão
+    """
+    rows = connection.execute(text("""
+        SELECT idempotency_key, accuracy, erros, duration_seconds, metadata_json, completed_at
+        FROM game_sessions
+        WHERE student_id = :student_id AND status = 'completed'
+        ORDER BY completed_at DESC, id DESC
+        LIMIT :limit
+    """), {'student_id': student_id, 'limit': limit}).all()
+    return [
+        (row.completed_at, {**session_data_from_game_session(row), 'session_id': row.idempotency_key})
+        for row in reversed(rows)
+    ]
+
+
+def _metadata_number(metadata, names, default):
+    """Primeiro valor numérico entre ``names`` no metadata enviado pelo jogo"""
+    for name in names:
+        try:
+            return float(metadata[name])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return default
+
+
+def session_data_from_game_session(row):
+    """
+    Converte uma linha de ``game_sessions`` no ``session_data`` do motor
+    
+    Os jogos enviam o nível atual como ``level`` no metadata (``difficulty_level``
+    é aceito como alternativa); tempo de reação e sequência de acertos só
+    existem quando o jogo os envia e valem 0 caso contrário.
+    """
+    metadata = row.metadata_json if isinstance(row.metadata_json, dict) else json.loads(row.metadata_json or '{}')
+    return {
+        'accuracy': (row.accuracy or 0) * 100,
+        'reaction_time': _metadata_number(metadata, ('reaction_time', 'reaction_time_ms'), 0),
+        'errors': row.erros or 0,
+        'success_streak': _metadata_number(metadata, ('success_streak',), 0),
+        'time_spent': row.duration_seconds or 0,
+        'difficulty_level': int(_metadata_number(metadata, ('level', 'difficulty_level'), 1))
+    }
+
+
+def session_seed(key):
+    """Semente estável (entre processos e execuções) derivada do id da sessão"""
+    digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def session_rng(key):
+    """Gerador próprio da sessão: os sorteios dela se repetem em replays e testes de carga"""
+    return np.random.default_rng(session_seed(key))
+
+
+class RunningMoments:
+    """
+    Média e variância de uma janela deslizante pelo método de Welford
+    """
+    
+    __slots__ = ('count', 'mean', 'm2')
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    def remove(self, value):
+        self.count -= 1
+        if not self.count:
+            self.mean = self.m2 = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+    
+    @property
+    def variance(self):
+        """Variância populacional, como ``np.var``"""
+        return self.m2 / self.count if self.count else 0.0
+
+
+class PerformanceStats:
+    """
+    Estatísticas das últimas ``capacity`` sessões com custo O(1) por sessão
+    
+    Scores e tempos ficam em buffers circulares ``array('d')``. Média e
+    variância do histórico e das últimas ``recent`` sessões são mantidas por
+    Welford; médias de qualquer faixa do buffer (primeiras/últimas cinco,
+    metades) saem de somas de prefixo; mínimo e máximo, de filas
+    monotônicas; e a média por faixa de duração das últimas
+    ``time_window`` sessões, de somas por faixa.
+    """
+    
+    def __init__(self, capacity=100, recent=20, time_window=30):
+        self.capacity = max(1, capacity)
+        self.recent = min(recent, self.capacity)
+        self.time_window = min(time_window, self.capacity)
+        self._scores = array('d', bytes(8 * self.capacity))
+        self._times = array('d', bytes(8 * self.capacity))
+        self._prefix = array('d', bytes(8 * (self.capacity + 1)))
+        self._total = 0
+        self._count = 0
+        self.history = RunningMoments()
+        self.recent_moments = RunningMoments()
+        self._minimum = deque()
+        self._maximum = deque()
+        self._time_buckets = {}
+    
+    def __len__(self):
+        return self._count
+    
+    @property
+    def total(self):
+        """Sessões registradas desde a criação, incluindo as que já saíram do buffer"""
+        return self._total
+    
+    def _slot(self, position):
+        """Posição no buffer circular; 0 é a sessão mais antiga mantida"""
+        return (self._total - self._count + position) % self.capacity
+    
+    def score(self, position):
+        return self._scores[self._slot(position)]
+    
+    def scores(self):
+        """Cópia dos scores, da sessão mais antiga para a mais recente"""
+        return [self.score(position) for position in range(self._count)]
+    
+    def range_mean(self, start, stop):
+        """Média dos scores nas posições ``[start, stop)``"""
+        first = self._total - self._count
+        total = self._prefix[(first + stop) % (self.capacity + 1)] - self._prefix[(first + start) % (self.capacity + 1)]
+        return total / (stop - start)
+    
+    @staticmethod
+    def time_bucket(time_spent):
+        return int(time_spent / 300) * 5  # Buckets de 5 min
+    
+    def append(self, score, time_spent):
+        # Sessões que saem de cada janela, lidas antes que o slot seja
+        # sobrescrito (com janela igual à capacidade, é a própria sessão despejada)
+        leaving_history = self._total - self.capacity if self._count == self.capacity else None
+        leaving_recent = self._total - self.recent if self._total >= self.recent else None
+        leaving_time = self._total - self.time_window if self._total >= self.time_window else None
+        if leaving_history is not None:
+            self.history.remove(self._scores[leaving_history % self.capacity])
+            self._count -= 1
+        if leaving_recent is not None:
+            self.recent_moments.remove(self._scores[leaving_recent % self.capacity])
+        if leaving_time is not None:
+            leaving = leaving_time % self.capacity
+            key = self.time_bucket(self._times[leaving])
+            bucket = self._time_buckets[key]
+            bucket[0] -= 1
+            bucket[1] -= self._scores[leaving]
+            if not bucket[0]:
+                del self._time_buckets[key]
+        
+        slot = self._total % self.capacity
+        self._scores[slot] = score
+        self._times[slot] = time_spent
+        self._prefix[(self._total + 1) % (self.capacity + 1)] = self._prefix[self._total % (self.capacity + 1)] + score
+        self._total += 1
+        self._count += 1
+        self.history.add(score)
+        self.recent_moments.add(score)
+        bucket = self._time_buckets.setdefault(self.time_bucket(time_spent), [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += score
+        
+        # Filas monotônicas: o extremo da janela está sempre na frente
+        while self._minimum and self._minimum[-1][1] >= score:
+            self._minimum.pop()
+        while self._maximum and self._maximum[-1][1] <= score:
+            self._maximum.pop()
+        self._minimum.append((self._total - 1, score))
+        self._maximum.append((self._total - 1, score))
+        oldest = self._total - self._count
+        while self._minimum[0][0] < oldest:
+            self._minimum.popleft()
+        while self._maximum[0][0] < oldest:
+            self._maximum.popleft()
+    
+    @property
+    def minimum(self):
+        return self._minimum[0][1] if self._minimum else None
+    
+    @property
+    def maximum(self):
+        return self._maximum[0][1] if self._maximum else None
+    
+    def time_bucket_means(self):
+        """Score médio por faixa de duração (minutos) nas últimas ``time_window`` sessões"""
+        return {bucket: total / count for bucket, (count, total) in self._time_buckets.items()}
+
+
+class StudentState:
+    """
+    Histórico recente de um estudante: estatísticas incrementais e a última sessão
+    
+    Sessões com ``session_id`` já presente entre as últimas ``history_size``
+    não são contadas de novo: a sessão que acabou de ser gravada pela API pode
+    chegar tanto pela reidratação quanto pela análise ao vivo.
+    """
+    
+    def __init__(self, history_size):
+        self.stats = PerformanceStats(history_size)
+        self.session_ids = deque()
+        self._seen = set()
+        self.last_session = None
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.last_seen = time.monotonic()
+    
+    def record(self, session_data, timestamp=None):
+        score = performance_score(session_data)
+        session_id = session_data.get('session_id')
+        if session_id is not None:
+            if session_id in self._seen:
+                return score
+            if len(self.session_ids) == self.stats.capacity:
+                self._seen.discard(self.session_ids.popleft())
+            self.session_ids.append(session_id)
+            self._seen.add(session_id)
+        self.stats.append(score, session_data['time_spent'])
+        self.last_session = {
+            'timestamp': timestamp or datetime.now(),
+            'score': score,
+            'data': dict(session_data)
+        }
+        return score
+
+
+class StudentStateStore:
+    """
+    Estados por estudante em memória, com despejo LRU
+    
+    Guarda no máximo ``max_students`` estudantes e descarta os que ficaram
+    ``idle_seconds`` sem uso. Um estudante despejado é reidratado pelo
+    ``loader`` no próximo acesso, então a memória fica limitada a
+    ``max_students * history_size`` sessões independentemente de quantos
+    estudantes usam o sistema.
+    """
+    
+    def __init__(self, history_size=100, max_students=10000, idle_seconds=1800, loader=None):
+        self.history_size = max(1, history_size)
+        self.max_students = max(1, max_students)
+        self.idle_seconds = idle_seconds
+        self.loader = loader
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._states)
+    
+    def __contains__(self, student_id):
+        return student_id in self._states
+    
+    def get(self, student_id):
+        """Retorna o estado do estudante, reidratando-o se não estiver em memória"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(student_id)
+            if state is None:
+                state = self._states[student_id] = StudentState(self.history_size)
+            else:
+                self._states.move_to_end(student_id)
+            state.last_seen = now
+            self._evict(now)
+        
+        if not state.loaded:
+            with state.lock:
+                if not state.loaded:
+                    self._rehydrate(student_id, state)
+        return state
+    
+    def discard(self, student_id):
+        with self._lock:
+            self._states.pop(student_id, None)
+    
+    def evict_idle(self):
+        """Descarta estudantes ociosos; retorna quantos continuam em memória"""
+        with self._lock:
+            self._evict(time.monotonic())
+            return len(self._states)
+    
+    def _evict(self, now):
+        while self._states:
+            student_id, oldest = next(iter(self._states.items()))
+            if len(self._states) <= self.max_students and now - oldest.last_seen < self.idle_seconds:
+                break
+            del self._states[student_id]
+    
+    def _rehydrate(self, student_id, state):
+        if self.loader is not None:
+            try:
+                for timestamp, session_data in self.loader(student_id, self.history_size):
+                    state.record(session_data, timestamp)
+            except Exception:
+                # Sem o histórico o estudante começa vazio; não bloqueia a análise
+                logger.exception('Falha ao reidratar o histórico do estudante %s', student_id)
+        state.loaded = True
+
+
+def performance_score(session_data):
+    """Score de performance (0-1) de uma sessão"""
+    normalized_accuracy = session_data['accuracy'] / 100
+    normalized_reaction = min(session_data['reaction_time'] / 2000, 1)
+    normalized_errors = min(session_data['errors'] / 10, 1)
+    normalized_streak = min(session_data['success_streak'] / 10, 1)
+    
+    return (
+        normalized_accuracy * 0.4 +
+        (1 - normalized_reaction) * 0.2 +
+        (1 - normalized_errors) * 0.2 +
+        normalized_streak * 0.2
+    )
+
+
+def performance_scores(accuracy, reaction_time, errors, success_streak):
+    """Versão vetorizada de ``performance_score``, com as mesmas operações na mesma ordem"""
+    normalized_accuracy = accuracy / 100
+    normalized_reaction = np.minimum(reaction_time / 2000, 1)
+    normalized_errors = np.minimum(errors / 10, 1)
+    normalized_streak = np.minimum(success_streak / 10, 1)
+    
+    return (
+        normalized_accuracy * 0.4 +
+        (1 - normalized_reaction) * 0.2 +
+        (1 - normalized_errors) * 0.2 +
+        normalized_streak * 0.2
+    )
+
+
+# Limite inferior de cada classe de sessão; abaixo do último, 'poor'
+SESSION_QUALITY = (
+    (0.85, 'excellent'),
+    (0.7, 'good'),
+    (0.5, 'average'),
+    (0.3, 'below_average'),
+)
+
+BATCH_COLUMNS = ('accuracy', 'reaction_time', 'errors', 'success_streak', 'difficulty_level')
+
+
+# Colunas de entrada do modelo de dificuldade; o score de performance entra como última coluna
+MODEL_FEATURES = ('accuracy', 'reaction_time', 'errors', 'success_streak', 'time_spent', 'difficulty_level')
+DIFFICULTY_COLUMN = MODEL_FEATURES.index('difficulty_level')
+# Formato do arquivo do modelo; artefatos de outro formato são ignorados
+ARTIFACT_FORMAT = 1
+
+
+def difficulty_features(sessions):
+    """Matriz de features do modelo a partir de colunas (DataFrame ou dict de arrays)"""
+    columns = [np.asarray(sessions[name], dtype=np.float64) for name in MODEL_FEATURES]
+    return np.column_stack(columns + [performance_scores(*columns[:4])])
+
+
+def difficulty_training_rows(connection):
+    """
+    Exemplos de treino a partir das sessões concluídas em ``game_sessions``
+    
+    Cada sessão é rotulada pela direção do ajuste aplicado na sessão
+    seguinte do mesmo estudante no mesmo jogo: -1, 0 ou +1.
+    
+    Args:
+        connection: Conexão SQLAlchemy com o banco da aplicação
+    
+    Returns:
+        Iterador de (session_data, ajuste)
+    """
+    rows = connection.execution_options(yield_per=10000).execute(text("""
+        SELECT student_id, game_type, accuracy, erros, duration_seconds, metadata_json
+        FROM game_sessions
+        WHERE status = 'completed' AND completed_at IS NOT NULL
+        ORDER BY student_id, game_type, completed_at, id
+    """))
+    previous_key = previous = None
+    for row in rows:
+        key = (row.student_id, row.game_type)
+        session_data = session_data_from_game_session(row)
+        if key == previous_key:
+            yield previous, int(np.sign(session_data['difficulty_level'] - previous['difficulty_level']))
+        previous_key, previous = key, session_data
+
+
+def train_difficulty_model(samples, n_estimators=100, random_state=0, min_samples=20):
+    """
+    Treina o RandomForest de ajuste de dificuldade
+    
+    Args:
+        samples: Iterável de (session_data, ajuste), ex. ``difficulty_training_rows``
+        n_estimators: Árvores da floresta
+        random_state: Semente do treino
+        min_samples: Exemplos mínimos para treinar
+    
+    Returns:
+        Artefato com modelo, scaler e metadados, pronto para ``save_difficulty_artifact``
+    """
+    sessions, labels = [], []
+    for session_data, label in samples:
+        sessions.append(session_data)
+        labels.append(label)
+    if len(labels) < min_samples or len(set(labels)) < 2:
+        raise ValueError(f'Dados insuficientes para treinar: {len(labels)} sessões com {len(set(labels))} classe(s)')
+    
+    features = difficulty_features(pd.DataFrame(sessions))
+    scaler = StandardScaler().fit(features)
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state)
+    model.fit(scaler.transform(features), np.asarray(labels))
+    
+    trained_at = datetime.utcnow()
+    return {
+        'format': ARTIFACT_FORMAT,
+        'version': trained_at.strftime('%Y%m%d%H%M%S'),
+        'trained_at': trained_at.isoformat(),
+        'features': MODEL_FEATURES,
+        'samples': len(labels),
+        'classes': model.classes_.tolist(),
+        'scaler': scaler,
+        'model': model
+    }
+
+
+def save_difficulty_artifact(artifact, directory):
+    """
+    Grava o artefato como ``difficulty-model-<versão>.joblib`` e o aponta em ``LATEST``
+    
+    Versões anteriores ficam no diretório; para voltar a uma delas, basta
+    reescrever ``LATEST``.
+    """
+    import joblib
+    
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"difficulty-model-{artifact['version']}.joblib"
+    joblib.dump(artifact, target.with_suffix('.tmp'))
+    os.replace(target.with_suffix('.tmp'), target)
+    latest = directory / 'LATEST.tmp'
+    latest.write_text(target.name + '\n', encoding='utf-8')
+    os.replace(latest, directory / 'LATEST')
+    return target
+
+
+class MicroBatcher:
+    """
+    Junta chamadas concorrentes numa única chamada em lote
+    
+    Cada ``submit`` entrega uma linha e recebe um ``Future``. Uma thread por
+    processo espera até ``max_wait_ms`` depois da primeira linha (ou até
+    ``max_batch`` linhas) e resolve todas com uma só chamada a ``predict``.
+    Depois de ``close`` (ou de um fork), o próximo ``submit`` inicia outra
+    thread.
+    """
+    
+    def __init__(self, predict, max_batch=256, max_wait_ms=2):
+        self.predict = predict
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._pid = None
+        self._thread = None
+        self._stopping = False
+        self.calls = 0
+    
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            # Depois de um fork as linhas herdadas pertencem ao processo pai
+            self._pid = os.getpid()
+            self._pending = deque()
+            self._thread = None
+        self._stopping = False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='difficulty-batcher', daemon=True)
+            self._thread.start()
+    
+    def submit(self, row):
+        future = Future()
+        with self._condition:
+            self._ensure_started()
+            self._pending.append((row, future))
+            self._condition.notify()
+        return future
+    
+    def close(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread() and self._pid == os.getpid():
+            thread.join(timeout=1)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if not self._pending:
+                    # Sob o lock: um ``submit`` a partir daqui inicia outra thread
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = [self._pending.popleft() for _ in range(min(len(self._pending), self.max_batch))]
+            self._execute(batch)
+    
+    def _execute(self, batch):
+        rows, futures = zip(*batch)
+        try:
+            results = self.predict(np.vstack(rows))
+        except Exception as exc:
+            for future in futures:
+                future.set_exception(exc)
+            return
+        self.calls += 1
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+
+class DifficultyModel:
+    """
+    Modelo de dificuldade treinado, carregado sob demanda uma vez por processo
+    
+    ``path`` é um arquivo ``.joblib`` ou o diretório de
+    ``save_difficulty_artifact`` (usa a versão em ``LATEST``). Nada é lido
+    até a primeira predição, então importar o módulo e iniciar a aplicação
+    continuam rápidos; sem artefato, ``available`` é falso e o motor usa as
+    regras fixas.
+    """
+    
+    def __init__(self, path, max_batch=256, max_wait_ms=2, timeout_seconds=1.0):
+        self.path = Path(path)
+        self.timeout_seconds = timeout_seconds
+        self._artifact = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batcher = MicroBatcher(self.predict_features, max_batch, max_wait_ms)
+    
+    def _resolve(self):
+        if self.path.is_dir():
+            latest = self.path / 'LATEST'
+            return self.path / latest.read_text(encoding='utf-8').strip() if latest.is_file() else None
+        return self.path if self.path.is_file() else None
+    
+    def artifact(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._artifact = self._load()
+                    self._pid = os.getpid()
+        return self._artifact
+    
+    def _load(self):
+        target = self._resolve()
+        if target is None:
+            logger.info('Modelo de dificuldade não encontrado em %s; usando regras fixas', self.path)
+            return None
+        import joblib
+        
+        try:
+            artifact = joblib.load(target)
+        except Exception:
+            # Arquivo corrompido ou de outra versão do sklearn: não tenta de novo até ``reload``
+            logger.exception('Falha ao carregar o modelo de dificuldade de %s; usando regras fixas', target)
+            return None
+        if not isinstance(artifact, dict) or artifact.get('format') != ARTIFACT_FORMAT:
+            logger.warning('Formato de modelo de dificuldade não suportado em %s; usando regras fixas', target)
+            return None
+        logger.info('Modelo de dificuldade %s carregado de %s', artifact['version'], target)
+        return artifact
+    
+    def reload(self):
+        """Relê o artefato na próxima predição (ex. depois de um novo treino)"""
+        with self._lock:
+            self._pid = None
+    
+    @property
+    def available(self):
+        return self.artifact() is not None
+    
+    @property
+    def version(self):
+        artifact = self.artifact()
+        return artifact['version'] if artifact else None
+    
+    def predict_features(self, features):
+        """Nível recomendado para cada linha de ``difficulty_features``"""
+        artifact = self.artifact()
+        if artifact is None:
+            raise RuntimeError('Modelo de dificuldade indisponível')
+        adjustment = artifact['model'].predict(artifact['scaler'].transform(features))
+        return np.clip(features[:, DIFFICULTY_COLUMN] + adjustment, 1, 10).astype(np.int64)
+    
+    def predict(self, sessions):
+        """Versão em lote: uma chamada ao modelo para todas as sessões"""
+        return self.predict_features(difficulty_features(sessions))
+    
+    def recommend(self, session_data):
+        """
+        Uma sessão, agrupada com as requisições concorrentes pelo ``batcher``
+        
+        Espera no máximo ``timeout_seconds``; o ``TimeoutError`` leva o motor
+        de volta às regras fixas em vez de prender a requisição.
+        """
+        row = difficulty_features({name: [session_data[name]] for name in MODEL_FEATURES})[0]
+        return int(self.batcher.submit(row).result(timeout=self.timeout_seconds))
+
 
 class AIEngine:
     """
     Motor de IA para análise de desempenho e adaptação de dificuldade
+    
+    O histórico de performance é mantido por estudante em ``students``.
     """
     
-    def __init__(self):
-        self.scaler = StandardScaler()
-        self.difficulty_model = None
-        self.performance_history = []
+    def __init__(self, history_size=100, max_students=10000, idle_seconds=1800, history_loader=None, difficulty_model=None):
+        """
+        Args:
+            history_size: Sessões mantidas por estudante
+            max_students: Estudantes mantidos em memória ao mesmo tempo
+            idle_seconds: Tempo sem uso até o estudante ser descartado da memória
+            history_loader: ``(student_id, limit) -> [(timestamp, session_data)]``
+                usado para reidratar estudantes, ex. sobre ``game_session_history``
+            difficulty_model: ``DifficultyModel`` treinado; sem ele (ou sem
+                artefato) a dificuldade segue as regras fixas
+        """
+        self.difficulty_model = difficulty_model
+        self.students = StudentStateStore(history_size, max_students, idle_seconds, history_loader)
+    
+    def history(self, student_id):
+        """Scores recentes do estudante, da sessão mais antiga para a mais recente"""
+        state = self.students.get(student_id)
+        with state.lock:
+            return state.stats.scores()
         
-    def analyze_session(self, session_data):
+    def analyze_session(self, student_id, session_data, rng=None):
         """
         Analisa uma sessão de jogo e retorna insights
         
         Args:
+            student_id: ID do estudante dono da sessão
             session_data: dict com dados da sessão
                 - accuracy: float (0-100)
                 - reaction_time: float (ms)
@@ -27,56 +693,116 @@ class AIEngine:
                 - success_streak: int
                 - time_spent: float (segundos)
                 - difficulty_level: int (1-10)
+                - session_id: str (opcional, semente do sorteio de dificuldade)
+            rng: ``numpy.random.Generator`` para o sorteio; por padrão um
+                gerador semeado pelo ``session_id`` ou, sem ele, pelo
+                estudante e o número da sessão
         
         Returns:
             dict com análise e recomendações
         """
         
-        # Calcular métricas normalizadas
-        normalized_accuracy = session_data['accuracy'] / 100
-        normalized_reaction = min(session_data['reaction_time'] / 2000, 1)
-        normalized_errors = min(session_data['errors'] / 10, 1)
-        normalized_streak = min(session_data['success_streak'] / 10, 1)
-        
-        # Score de performance (0-1)
-        performance_score = (
-            normalized_accuracy * 0.4 +
-            (1 - normalized_reaction) * 0.2 +
-            (1 - normalized_errors) * 0.2 +
-            normalized_streak * 0.2
-        )
-        
-        # Adicionar ao histórico
-        self.performance_history.append({
-            'timestamp': datetime.now(),
-            'score': performance_score,
-            'data': session_data
-        })
+        state = self.students.get(student_id)
         
-        # Manter apenas últimas 100 sessões
-        if len(self.performance_history) > 100:
-            self.performance_history = self.performance_history[-100:]
+        # Adicionar ao histórico e detectar padrões, ambos O(1)
+        with state.lock:
+            score = state.record(session_data)
+            patterns = self._detect_patterns(state.stats)
+            ordinal = state.stats.total
         
         # Gerar insights
-        insights = self._generate_insights(performance_score, session_data)
+        insights = self._generate_insights(score, session_data)
         
         # Recomendar dificuldade
-        recommended_difficulty = self._recommend_difficulty(
-            session_data['difficulty_level'],
-            performance_score
-        )
-        
-        # Detectar padrões
-        patterns = self._detect_patterns()
+        recommended_difficulty = None
+        model = self._model()
+        if model is not None:
+            try:
+                recommended_difficulty = model.recommend(session_data)
+            except Exception:
+                logger.exception('Falha no modelo de dificuldade; usando regras fixas')
+        if recommended_difficulty is None:
+            recommended_difficulty = self._recommend_difficulty(
+                session_data['difficulty_level'],
+                score,
+                # O gerador da sessão custa mais que o resto da análise: só é
+                # criado quando o score cai numa faixa sorteada
+                rng or (lambda: session_rng(session_data.get('session_id') or f'{student_id}:{ordinal}'))
+            )
         
         return {
-            'performance_score': performance_score,
+            'performance_score': score,
             'insights': insights,
             'recommended_difficulty': recommended_difficulty,
             'patterns': patterns,
-            'session_quality': self._classify_session(performance_score)
+            'session_quality': self._classify_session(score)
+        }
+    
+    def analyze_sessions(self, sessions, rng=None):
+        """
+        Versão em lote de ``analyze_session`` para reprocessar sessões históricas
+        
+        Calcula score, qualidade e dificuldade recomendada com operações
+        NumPy sobre colunas inteiras. Os resultados são idênticos aos da
+        versão escalar aplicada linha a linha com o mesmo gerador, inclusive
+        os sorteios, feitos na mesma ordem. Não altera o histórico dos
+        estudantes nem gera insights ou padrões.
+        
+        Args:
+            sessions: DataFrame ou dict de arrays com as colunas accuracy,
+                reaction_time, errors, success_streak e difficulty_level
+            rng: ``numpy.random.Generator`` do lote; passe um gerador
+                semeado para reprocessamentos reproduzíveis
+        
+        Com um modelo treinado a dificuldade vem de ``DifficultyModel.predict``
+        e ``sessions`` precisa também da coluna time_spent.
+        
+        Returns:
+            dict de arrays: performance_score, session_quality e recommended_difficulty
+        """
+        accuracy, reaction_time, errors, success_streak = (
+            np.asarray(sessions[name], dtype=np.float64) for name in BATCH_COLUMNS[:4]
+        )
+        difficulty = np.asarray(sessions['difficulty_level'], dtype=np.int64)
+        scores = performance_scores(accuracy, reaction_time, errors, success_streak)
+        
+        return {
+            'performance_score': scores,
+            'session_quality': self._classify_sessions(scores),
+            'recommended_difficulty': self._recommend_batch(sessions, difficulty, scores, rng)
         }
     
+    def predict(self, sessions, rng=None):
+        """
+        Dificuldade recomendada para um lote de sessões, numa única chamada ao modelo
+        
+        Args:
+            sessions: DataFrame ou dict de arrays com as colunas de ``MODEL_FEATURES``
+            rng: Gerador para as regras fixas, usadas quando não há modelo
+        
+        Returns:
+            Array com o nível recomendado de cada sessão
+        """
+        accuracy, reaction_time, errors, success_streak = (
+            np.asarray(sessions[name], dtype=np.float64) for name in BATCH_COLUMNS[:4]
+        )
+        difficulty = np.asarray(sessions['difficulty_level'], dtype=np.int64)
+        scores = performance_scores(accuracy, reaction_time, errors, success_streak)
+        return self._recommend_batch(sessions, difficulty, scores, rng)
+    
+    def _model(self):
+        model = self.difficulty_model
+        return model if model is not None and model.available else None
+    
+    def _recommend_batch(self, sessions, difficulty, scores, rng):
+        model = self._model()
+        if model is not None:
+            try:
+                return model.predict(sessions)
+            except Exception:
+                logger.exception('Falha no modelo de dificuldade; usando regras fixas')
+        return self.recommend_difficulties(difficulty, scores, rng)
+    
     def _generate_insights(self, performance_score, session_data):
         """Gera insights personalizados baseados na performance"""
         insights = []
@@ -149,43 +875,91 @@ class AIEngine:
         
         return insights
     
-    def _recommend_difficulty(self, current_difficulty, performance_score):
-        """Recomenda próximo nível de dificuldade"""
+    def _recommend_difficulty(self, current_difficulty, performance_score, rng):
+        """
+        Recomenda próximo nível de dificuldade; ``rng`` decide os casos limítrofes
+        
+        ``rng`` é um ``numpy.random.Generator`` ou uma função sem argumentos
+        que o cria, chamada só nas faixas sorteadas.
+        """
+        
+        def draw():
+            return (rng() if callable(rng) else rng).random()
         
         if performance_score > 0.85:
             # Excelente - aumentar dificuldade
             return min(10, current_difficulty + 1)
         elif performance_score > 0.7:
             # Bom - manter ou aumentar levemente
-            return current_difficulty + (1 if np.random.random() > 0.5 else 0)
+            return current_difficulty + (1 if draw() > 0.5 else 0)
         elif performance_score < 0.4:
             # Baixo - reduzir dificuldade
             return max(1, current_difficulty - 1)
         elif performance_score < 0.55:
             # Médio-baixo - considerar reduzir
-            return max(1, current_difficulty - (1 if np.random.random() > 0.5 else 0))
+            return max(1, current_difficulty - (1 if draw() > 0.5 else 0))
         else:
             # Manter
             return current_difficulty
     
-    def _detect_patterns(self):
-        """Detecta padrões no histórico de performance"""
+    def recommend_difficulties(self, current_difficulty, performance_score, rng=None):
+        """
+        Versão vetorizada de ``_recommend_difficulty``
+        
+        Args:
+            current_difficulty: Array de níveis atuais (1-10)
+            performance_score: Array de scores (0-1)
+            rng: ``numpy.random.Generator``; um novo gerador quando omitido
+        
+        Returns:
+            Array com o nível recomendado de cada sessão
+        """
+        current_difficulty = np.asarray(current_difficulty, dtype=np.int64)
+        performance_score = np.asarray(performance_score, dtype=np.float64)
+        if rng is None:
+            rng = np.random.default_rng()
+        
+        increase = performance_score > 0.85
+        maybe_increase = ~increase & (performance_score > 0.7)
+        decrease = ~increase & ~maybe_increase & (performance_score < 0.4)
+        maybe_decrease = ~increase & ~maybe_increase & ~decrease & (performance_score < 0.55)
         
-        if len(self.performance_history) < 5:
+        # Um sorteio por sessão nos ramos aleatórios, na ordem das linhas
+        coin = np.zeros(len(performance_score), dtype=np.int64)
+        random_branch = maybe_increase | maybe_decrease
+        draws = np.count_nonzero(random_branch)
+        if draws:
+            coin[random_branch] = rng.random(draws) > 0.5
+        
+        return np.select(
+            [increase, maybe_increase, decrease, maybe_decrease],
+            [
+                np.minimum(10, current_difficulty + 1),
+                current_difficulty + coin,
+                np.maximum(1, current_difficulty - 1),
+                np.maximum(1, current_difficulty - coin),
+            ],
+            current_difficulty
+        )
+    
+    def _detect_patterns(self, stats):
+        """Detecta padrões no histórico de performance de um estudante"""
+        
+        if len(stats) < 5:
             return {
                 'trend': 'insufficient_data',
                 'consistency': 0,
                 'confidence': 0
             }
         
-        # Pegar últimas 20 sessões
-        recent = self.performance_history[-20:]
-        scores = [h['score'] for h in recent]
+        # Últimas 20 sessões
+        recent = stats.recent_moments
+        start = len(stats) - recent.count
         
         # Calcular tendência
-        if len(scores) >= 10:
-            recent_avg = np.mean(scores[-5:])
-            older_avg = np.mean(scores[:5])
+        if recent.count >= 10:
+            recent_avg = stats.range_mean(len(stats) - 5, len(stats))
+            older_avg = stats.range_mean(start, start + 5)
             
             if recent_avg > older_avg + 0.1:
                 trend = 'improving'
@@ -197,66 +971,61 @@ class AIEngine:
             trend = 'stable'
         
         # Calcular consistência (inverso da variância)
-        variance = np.var(scores)
-        consistency = max(0, 1 - variance * 2)
+        consistency = max(0, 1 - recent.variance * 2)
         
         # Calcular confiança baseado em quantidade de dados
-        confidence = min(len(self.performance_history) / 20, 1)
+        confidence = min(len(stats) / 20, 1)
         
         return {
             'trend': trend,
             'consistency': consistency,
-            'average_score': np.mean(scores),
+            'average_score': recent.mean,
             'confidence': confidence,
-            'sessions_analyzed': len(scores)
+            'sessions_analyzed': recent.count
         }
     
     def _classify_session(self, performance_score):
         """Classifica a qualidade da sessão"""
-        if performance_score >= 0.85:
-            return 'excellent'
-        elif performance_score >= 0.7:
-            return 'good'
-        elif performance_score >= 0.5:
-            return 'average'
-        elif performance_score >= 0.3:
-            return 'below_average'
-        else:
-            return 'poor'
+        for threshold, quality in SESSION_QUALITY:
+            if performance_score >= threshold:
+                return quality
+        return 'poor'
     
-    def predict_optimal_session_time(self):
-        """Prediz tempo ideal de sessão baseado em histórico"""
-        
-        if len(self.performance_history) < 10:
-            return 15  # Default 15 minutos
-        
-        # Analisar quando performance começa a cair
-        sessions = self.performance_history[-30:]
+    def _classify_sessions(self, performance_score):
+        """Versão vetorizada de ``_classify_session``"""
+        return np.select(
+            [performance_score >= threshold for threshold, _ in SESSION_QUALITY],
+            [quality for _, quality in SESSION_QUALITY],
+            'poor'
+        )
+    
+    def predict_optimal_session_time(self, student_id):
+        """Prediz tempo ideal de sessão baseado no histórico do estudante"""
         
-        # Agrupar por tempo de sessão
-        time_performance = {}
-        for session in sessions:
-            time_bucket = int(session['data']['time_spent'] / 300) * 5  # Buckets de 5 min
-            if time_bucket not in time_performance:
-                time_performance[time_bucket] = []
-            time_performance[time_bucket].append(session['score'])
+        state = self.students.get(student_id)
+        with state.lock:
+            if len(state.stats) < 10:
+                return 15  # Default 15 minutos
+            
+            # Score médio por tempo de sessão nas últimas 30 sessões
+            time_performance = state.stats.time_bucket_means()
         
         # Encontrar ponto onde performance cai significativamente
         optimal_time = 15
-        for time, scores in sorted(time_performance.items()):
-            avg_score = np.mean(scores)
+        for minutes, avg_score in sorted(time_performance.items()):
             if avg_score < 0.6:
-                optimal_time = max(10, time - 5)
+                optimal_time = max(10, minutes - 5)
                 break
-            optimal_time = time
+            optimal_time = minutes
         
         return min(30, optimal_time)
     
-    def generate_personalized_recommendations(self, user_profile):
+    def generate_personalized_recommendations(self, student_id, user_profile):
         """
         Gera recomendações personalizadas baseadas no perfil do usuário
         
         Args:
+            student_id: ID do estudante
             user_profile: dict com informações do usuário
                 - age: int
                 - diagnosis: str ('TDAH', 'TEA', 'both')
@@ -269,7 +1038,7 @@ class AIEngine:
         
         recommendations = {
             'games': [],
-            'session_duration': self.predict_optimal_session_time(),
+            'session_duration': self.predict_optimal_session_time(student_id),
             'frequency': 'daily',
             'tips': []
         }
@@ -292,45 +1061,46 @@ class AIEngine:
             recommendations['tips'].append('Rotina consistente ajuda no engajamento')
         
         # Ajustar baseado em padrões detectados
-        patterns = self._detect_patterns()
+        state = self.students.get(student_id)
+        with state.lock:
+            patterns = self._detect_patterns(state.stats)
         if patterns['trend'] == 'declining':
             recommendations['tips'].append('Considere reduzir a duração das sessões')
             recommendations['session_duration'] = max(10, recommendations['session_duration'] - 5)
         
         return recommendations
     
-    def export_analytics(self):
-        """Exporta análises para relatório"""
-        
-        if not self.performance_history:
-            return {'error': 'No data available'}
-        
-        scores = [h['score'] for h in self.performance_history]
+    def export_analytics(self, student_id):
+        """Exporta análises do estudante para relatório"""
         
-        return {
-            'total_sessions': len(self.performance_history),
-            'average_performance': np.mean(scores),
-            'best_performance': np.max(scores),
-            'worst_performance': np.min(scores),
-            'improvement_rate': self._calculate_improvement_rate(),
-            'consistency_score': 1 - np.var(scores),
-            'patterns': self._detect_patterns(),
-            'last_session': self.performance_history[-1] if self.performance_history else None
-        }
+        state = self.students.get(student_id)
+        with state.lock:
+            stats = state.stats
+            if not len(stats):
+                return {'error': 'No data available'}
+            
+            return {
+                'total_sessions': len(stats),
+                'average_performance': stats.history.mean,
+                'best_performance': stats.maximum,
+                'worst_performance': stats.minimum,
+                'improvement_rate': self._calculate_improvement_rate(stats),
+                'consistency_score': 1 - stats.history.variance,
+                'patterns': self._detect_patterns(stats),
+                'last_session': state.last_session
+            }
     
-    def _calculate_improvement_rate(self):
+    def _calculate_improvement_rate(self, stats):
         """Calcula taxa de melhora ao longo do tempo"""
         
-        if len(self.performance_history) < 10:
+        if len(stats) < 10:
             return 0
         
         # Comparar primeira metade com segunda metade
-        mid = len(self.performance_history) // 2
-        first_half = [h['score'] for h in self.performance_history[:mid]]
-        second_half = [h['score'] for h in self.performance_history[mid:]]
-        
-        improvement = np.mean(second_half) - np.mean(first_half)
-        return improvement
+        mid = len(stats) // 2
+        return stats.range_mean(mid, len(stats)) - stats.range_mean(0, mid)
 
-# Instância global
-ai_engine = AIEngine()
+# Instância global; o modelo só é lido na primeira recomendação. O carregador
+# de histórico é injetado pela aplicação (``shared_ai_engine`` em app.py) sobre
+# a engine do Flask-SQLAlchemy, para usar o mesmo banco e o mesmo pool da API.
+ai_engine = AIEngine(difficulty_model=DifficultyModel(os.getenv('AI_DIFFICULTY_MODEL_PATH', 'models')))
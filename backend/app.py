@@ -7,25 +7,44 @@ Adult users authenticate; children are represented by pseudonymous profiles.
 
 from __future__ import annotations
 
+import atexit
+import base64
 import hashlib
 import json
 import os
 import secrets
+import threading
+import time
 import uuid
+import zlib
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Callable, NamedTuple
 
+import click
 import jwt
-from flask import Flask, g, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import UniqueConstraint, text
+from sqlalchemy import Index, UniqueConstraint, and_, case, delete, func, insert, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.event import listens_for
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import joinedload, make_transient_to_detached, relationship
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.schema import CreateColumn
 from werkzeug.exceptions import HTTPException
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from audit_writer import AuditBuffer
+from game_event_storage import GameEventStorage
+
+try:  # Optional shared tier for the consent cache.
+    import redis
+except ImportError:  # pragma: no cover - redis is listed in requirements.txt
+    redis = None
+
 
 UTC = timezone.utc
 APP_ENV = os.getenv("APP_ENV", os.getenv("FLASK_ENV", "development")).lower()
@@ -64,6 +83,24 @@ app.config.update(
     REFRESH_TOKEN_DAYS=int(os.getenv("REFRESH_TOKEN_DAYS", "30")),
     CONSENT_VERSION=os.getenv("CONSENT_VERSION", "2026-01"),
     MAX_CONTENT_LENGTH=2 * 1024 * 1024,
+    EXPORT_STREAM_BATCH=int(os.getenv("EXPORT_STREAM_BATCH", "500")),
+    GAMEPLAY_SYNC_BATCH_MAX=int(os.getenv("GAMEPLAY_SYNC_BATCH_MAX", "100")),
+    GAME_EVENTS_STORAGE=os.getenv("GAME_EVENTS_STORAGE", "table").lower(),
+    GAME_EVENTS_RETENTION_MONTHS=int(os.getenv("GAME_EVENTS_RETENTION_MONTHS", "0")),
+    GAME_EVENTS_PARTITIONS_AHEAD=int(os.getenv("GAME_EVENTS_PARTITIONS_AHEAD", "3")),
+    AUTH_CACHE_TTL_SECONDS=float(os.getenv("AUTH_CACHE_TTL_SECONDS", "0")),
+    AUTH_CACHE_MAX_ENTRIES=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000")),
+    CONSENT_CACHE_MAX_ENTRIES=int(os.getenv("CONSENT_CACHE_MAX_ENTRIES", "50000")),
+    CONSENT_CACHE_REDIS_URL=os.getenv("CONSENT_CACHE_REDIS_URL", ""),
+    CONSENT_CACHE_REDIS_TTL_SECONDS=int(os.getenv("CONSENT_CACHE_REDIS_TTL_SECONDS", "3600")),
+    AUDIT_MODE=os.getenv("AUDIT_MODE", "sync").lower(),
+    AUDIT_FLUSH_RECORDS=int(os.getenv("AUDIT_FLUSH_RECORDS", "200")),
+    AUDIT_FLUSH_INTERVAL_MS=int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500")),
+    AUDIT_SPOOL_DIR=os.getenv("AUDIT_SPOOL_DIR") or os.path.join(app.instance_path, "audit-spool"),
+    TELEMETRY_INGEST_MODE=os.getenv("TELEMETRY_INGEST_MODE", "sync").lower(),
+    TELEMETRY_QUEUE_MAX_EVENTS=int(os.getenv("TELEMETRY_QUEUE_MAX_EVENTS", "50000")),
+    TELEMETRY_QUEUE_BATCH_EVENTS=int(os.getenv("TELEMETRY_QUEUE_BATCH_EVENTS", "5000")),
+    TELEMETRY_QUEUE_FLUSH_MS=int(os.getenv("TELEMETRY_QUEUE_FLUSH_MS", "200")),
 )
 
 db = SQLAlchemy(app)
@@ -147,6 +184,8 @@ class StudentProfile(db.Model):
     ativo = db.Column(db.Boolean, nullable=False, default=True)
     data_criacao = db.Column(db.DateTime(timezone=True), nullable=False, default=utc_now)
     data_exclusao = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Bumped in the same transaction as every consent change; see ConsentCache.
+    consent_revision = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     organization = relationship("Organization", back_populates="students")
     guardian_links = relationship("GuardianLink", back_populates="student", cascade="all, delete-orphan")
@@ -156,7 +195,10 @@ class StudentProfile(db.Model):
 
 class GuardianLink(db.Model):
     __tablename__ = "guardian_links"
-    __table_args__ = (UniqueConstraint("student_id", "guardian_id", name="uq_guardian_student"),)
+    __table_args__ = (
+        UniqueConstraint("student_id", "guardian_id", name="uq_guardian_student"),
+        Index("ix_guardian_links_guardian_student_ativo", "guardian_id", "student_id", "ativo"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("student_profiles.id", ondelete="CASCADE"), nullable=False)
@@ -171,6 +213,7 @@ class GuardianLink(db.Model):
 
 class Consent(db.Model):
     __tablename__ = "consents"
+    __table_args__ = (Index("ix_consents_student_purpose_status_granted", "student_id", "finalidade", "status", "concedido_em"),)
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("student_profiles.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -203,7 +246,11 @@ class Activity(db.Model):
 
 class GameSession(db.Model):
     __tablename__ = "game_sessions"
-    __table_args__ = (UniqueConstraint("organization_id", "idempotency_key", name="uq_game_session_idempotency"),)
+    __table_args__ = (
+        UniqueConstraint("organization_id", "idempotency_key", name="uq_game_session_idempotency"),
+        Index("ix_game_sessions_student_created", "student_id", "data_criacao", "id"),
+        Index("ix_game_sessions_org_student_status", "organization_id", "student_id", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     public_id = db.Column(db.String(64), nullable=False, unique=True, index=True, default=lambda: str(uuid.uuid4()))
@@ -237,11 +284,39 @@ class GameEvent(db.Model):
     session_id = db.Column(db.Integer, db.ForeignKey("game_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     tipo = db.Column(db.String(60), nullable=False)
     payload_json = db.Column(db.JSON, nullable=False, default=dict)
-    ocorrido_em = db.Column(db.DateTime(timezone=True), nullable=False, default=utc_now)
+    ocorrido_em = db.Column(db.DateTime(timezone=True), nullable=False, default=utc_now, index=True)
 
     session = relationship("GameSession", back_populates="events")
 
 
+class StudentStats(db.Model):
+    """Rollup of completed sessions, maintained incrementally by ``_complete_session``."""
+
+    __tablename__ = "student_stats"
+
+    student_id = db.Column(db.Integer, db.ForeignKey("student_profiles.id", ondelete="CASCADE"), primary_key=True)
+    organization_id = db.Column(db.Integer, db.ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    last_completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+
+class StudentActivityStats(db.Model):
+    __tablename__ = "student_activity_stats"
+
+    student_id = db.Column(db.Integer, db.ForeignKey("student_profiles.id", ondelete="CASCADE"), primary_key=True)
+    activity_id = db.Column(db.Integer, db.ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True)
+    organization_id = db.Column(db.Integer, db.ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Integer, nullable=False, default=0)
+    best_accuracy = db.Column(db.Float, nullable=True)
+    acertos = db.Column(db.Integer, nullable=False, default=0)
+    erros = db.Column(db.Integer, nullable=False, default=0)
+    last_completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    activity = relationship("Activity")
+
+
 class RefreshToken(db.Model):
     __tablename__ = "refresh_tokens"
 
@@ -258,6 +333,7 @@ class RefreshToken(db.Model):
 
 class AuditEvent(db.Model):
     __tablename__ = "audit_events"
+    __table_args__ = (Index("ix_audit_events_org_created", "organization_id", "created_at", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     organization_id = db.Column(db.Integer, db.ForeignKey("organizations.id", ondelete="SET NULL"), nullable=True, index=True)
@@ -368,18 +444,82 @@ def revoke_refresh(raw_token: str | None):
         stored.revoked_at = utc_now()
 
 
+# Compliance-critical actions are always written in the request's transaction.
+SYNC_AUDIT_ACTIONS = frozenset({
+    "consent_granted",
+    "consent_pending",
+    "consent_revoked",
+    "student_deletion_requested",
+    "student_exported",
+})
+
+
+def _write_audit_records(records: list[dict[str, Any]]) -> None:
+    rows = [{**record, "created_at": datetime.fromisoformat(record["created_at"])} for record in records]
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(insert(AuditEvent), rows)
+
+
+audit_buffer = AuditBuffer(
+    _write_audit_records,
+    app.config["AUDIT_SPOOL_DIR"],
+    flush_records=app.config["AUDIT_FLUSH_RECORDS"],
+    flush_interval_ms=app.config["AUDIT_FLUSH_INTERVAL_MS"],
+)
+atexit.register(audit_buffer.close)
+
+
+@listens_for(db.session, "after_commit")
+def _release_buffered_audit(session):
+    if session.in_nested_transaction():
+        return  # releasing a savepoint; the events wait for the outermost commit
+    for _, record in session.info.pop("audit_pending", ()):
+        audit_buffer.append(record)
+
+
+def _within_transaction(transaction, ancestor) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@listens_for(db.session, "after_soft_rollback")
+def _discard_buffered_audit(session, previous_transaction):
+    # A savepoint rollback only drops the events recorded inside that savepoint.
+    if not previous_transaction.nested:
+        session.info.pop("audit_pending", None)
+        return
+    pending = session.info.get("audit_pending")
+    if pending:
+        pending[:] = [(transaction, record) for transaction, record in pending if not _within_transaction(transaction, previous_transaction)]
+
+
 def audit(action: str, resource_type: str, resource_id: str | None = None, organization_id: int | None = None, metadata: dict[str, Any] | None = None):
+    """Record an audit event alongside the current transaction.
+
+    With ``AUDIT_MODE=buffered`` the event is handed to ``audit_buffer`` only
+    once the transaction commits, so rolled-back work is still never audited;
+    actions in ``SYNC_AUDIT_ACTIONS`` always go in the same transaction.
+    """
     actor = getattr(g, "current_user", None)
-    db.session.add(
-        AuditEvent(
-            organization_id=organization_id,
-            actor_user_id=actor.id if actor else None,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            metadata_json=metadata or {},
-        )
-    )
+    values = {
+        "organization_id": organization_id,
+        "actor_user_id": actor.id if actor else None,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "metadata_json": metadata or {},
+    }
+    if app.config["AUDIT_MODE"] == "buffered" and action not in SYNC_AUDIT_ACTIONS:
+        session = db.session()
+        if not session.in_transaction():
+            session.begin()  # so a rollback before any SQL still discards the event
+        transaction = session.get_nested_transaction() or session.get_transaction()
+        session.info.setdefault("audit_pending", []).append((transaction, {**values, "created_at": utc_now().isoformat()}))
+        return
+    db.session.add(AuditEvent(**values))
 
 
 def require_db_write():
@@ -387,7 +527,124 @@ def require_db_write():
         raise RuntimeError("Database unavailable")
 
 
-def authenticate_request() -> User | None:
+class AuthContext:
+    """Identity of the current request, resolved once by ``token_required``."""
+
+    def __init__(self, user: User, issued_at: int, memberships: dict[int, OrganizationMembership]):
+        self.user = user
+        self.issued_at = issued_at
+        self.memberships = memberships
+        self._guardian_student_ids: set[int] | None = None
+
+    @classmethod
+    def for_user(cls, user: User, issued_at: int) -> "AuthContext":
+        active = sorted((membership for membership in user.memberships if membership.ativo), key=lambda membership: membership.id)
+        return cls(user=user, issued_at=issued_at, memberships={membership.organization_id: membership for membership in active})
+
+    def membership(self, organization_id: int | None = None) -> OrganizationMembership | None:
+        if organization_id:
+            return self.memberships.get(organization_id)
+        return next(iter(self.memberships.values()), None)
+
+    def is_guardian_of(self, student_id: int) -> bool:
+        if self._guardian_student_ids is None:
+            self._guardian_student_ids = set(
+                db.session.scalars(select(GuardianLink.student_id).where(GuardianLink.guardian_id == self.user.id, GuardianLink.ativo.is_(True)))
+            )
+        return student_id in self._guardian_student_ids
+
+
+class AuthCache:
+    """Process-local TTL cache of user + membership rows keyed by ``(user_id, iat)``.
+
+    Entries hold plain column values, not ORM instances, and are re-attached to
+    the request session without a query. Disabled when the TTL is zero.
+
+    ``invalidate_user`` only reaches the current process: another worker keeps
+    serving its snapshot (a deactivated user, a removed membership) until the
+    entry expires. ``AUTH_CACHE_TTL_SECONDS`` is therefore the staleness bound
+    across workers and should stay at a few seconds.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple[int, int], tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[int, int]) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            self._entries.pop(key, None)
+            return None
+
+    def put(self, key: tuple[int, int], snapshot: dict[str, Any], ttl: float, max_entries: int) -> None:
+        with self._lock:
+            while len(self._entries) >= max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + ttl, snapshot)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+auth_cache = AuthCache()
+
+
+def _column_values(instance) -> dict[str, Any]:
+    return {attribute.key: getattr(instance, attribute.key) for attribute in db.inspect(type(instance)).column_attrs}
+
+
+def _detached(model, values: dict[str, Any]):
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return instance
+
+
+def _auth_snapshot(user: User) -> dict[str, Any]:
+    return {
+        "user": _column_values(user),
+        "memberships": [(_column_values(membership), _column_values(membership.organization)) for membership in user.memberships],
+    }
+
+
+def _user_from_snapshot(snapshot: dict[str, Any]) -> User:
+    user = _detached(User, snapshot["user"])
+    memberships = []
+    for membership_values, organization_values in snapshot["memberships"]:
+        membership = _detached(OrganizationMembership, membership_values)
+        set_committed_value(membership, "organization", _detached(Organization, organization_values))
+        set_committed_value(membership, "user", user)
+        memberships.append(membership)
+    set_committed_value(user, "memberships", memberships)
+    return db.session.merge(user, load=False)
+
+
+def load_auth_context(user_id: int, issued_at: int) -> AuthContext | None:
+    ttl = app.config["AUTH_CACHE_TTL_SECONDS"]
+    snapshot = auth_cache.get((user_id, issued_at)) if ttl > 0 else None
+    if snapshot is not None:
+        user = _user_from_snapshot(snapshot)
+    else:
+        user = db.session.execute(
+            select(User)
+            .where(User.id == user_id)
+            .options(joinedload(User.memberships).joinedload(OrganizationMembership.organization))
+        ).unique().scalar_one_or_none()
+        if user and ttl > 0:
+            auth_cache.put((user_id, issued_at), _auth_snapshot(user), ttl, app.config["AUTH_CACHE_MAX_ENTRIES"])
+    if not user or not user.ativo:
+        return None
+    return AuthContext.for_user(user, issued_at)
+
+
+def authenticate_request() -> AuthContext | None:
     header = request.headers.get("Authorization", "")
     if not header.startswith("Bearer "):
         return None
@@ -395,33 +652,47 @@ def authenticate_request() -> User | None:
     try:
         payload = jwt.decode(raw_token, app.config["SECRET_KEY"], algorithms=["HS256"], issuer="neuroplay")
         user_id = int(payload["user_id"])
+        issued_at = int(payload.get("iat", 0))
     except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
         return None
-    user = db.session.get(User, user_id)
-    if not user or not user.ativo:
-        return None
-    return user
+    return load_auth_context(user_id, issued_at)
 
 
 def token_required(view: Callable):
     @wraps(view)
     def decorated(*args, **kwargs):
-        user = authenticate_request()
-        if not user:
+        auth = authenticate_request()
+        if not auth:
             return json_error("Sessão ausente ou expirada", 401, "UNAUTHENTICATED")
-        g.current_user = user
-        return view(user, *args, **kwargs)
+        g.auth = auth
+        g.current_user = auth.user
+        return view(auth.user, *args, **kwargs)
 
     return decorated
 
 
+def _auth_for(user: User) -> AuthContext | None:
+    auth = getattr(g, "auth", None)
+    return auth if auth is not None and auth.user is user else None
+
+
 def get_membership(user: User, organization_id: int | None = None) -> OrganizationMembership | None:
+    auth = _auth_for(user)
+    if auth is not None:
+        return auth.membership(organization_id)
     query = OrganizationMembership.query.filter_by(user_id=user.id, ativo=True)
     if organization_id:
         query = query.filter_by(organization_id=organization_id)
     return query.first()
 
 
+def is_linked_guardian(user: User, student_id: int) -> bool:
+    auth = _auth_for(user)
+    if auth is not None:
+        return auth.is_guardian_of(student_id)
+    return GuardianLink.query.filter_by(student_id=student_id, guardian_id=user.id, ativo=True).first() is not None
+
+
 def selected_organization(user: User) -> OrganizationMembership | None:
     raw = request.headers.get("X-Organization-ID") or request.args.get("organization_id")
     try:
@@ -442,19 +713,142 @@ def student_for_user(user: User, student_id: int) -> tuple[StudentProfile | None
     membership = get_membership(user, student.organization_id)
     if membership:
         return student, membership
-    guardian = GuardianLink.query.filter_by(student_id=student.id, guardian_id=user.id, ativo=True).first()
-    if guardian:
+    if is_linked_guardian(user, student.id):
         return student, None
     return None, None
 
 
-def has_active_consent(student_id: int, purpose: str = "gameplay_educacional") -> bool:
-    consent = (
-        Consent.query.filter_by(student_id=student_id, finalidade=purpose, status="granted")
-        .order_by(Consent.concedido_em.desc())
-        .first()
-    )
-    return bool(consent and not consent.revogado_em)
+class ConsentCache:
+    """Consent state keyed by ``(student_id, finalidade)`` with an optional Redis tier.
+
+    Every entry is stamped with the student's ``consent_revision``, which is
+    bumped in the same transaction that grants, revokes or deletes. A reader
+    always compares against the revision of the student row it just loaded, so
+    a stale entry in any worker or in Redis is ignored as soon as the change
+    commits; local invalidation only frees memory early.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[tuple[int, str], tuple[int, bool]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_url = None
+
+    def _shared(self):
+        url = app.config["CONSENT_CACHE_REDIS_URL"]
+        if not url or redis is None:
+            return None
+        if url != self._redis_url:
+            self._redis, self._redis_url = redis.Redis.from_url(url), url
+        return self._redis
+
+    @staticmethod
+    def _redis_key(key: tuple[int, str]) -> str:
+        return f"neuroplay:consent:{key[0]}:{key[1]}"
+
+    def get_many(self, revisions: dict[int, int], purpose: str) -> dict[int, bool]:
+        found, missing = {}, []
+        with self._lock:
+            for student_id, revision in revisions.items():
+                entry = self._entries.get((student_id, purpose))
+                if entry and entry[0] == revision:
+                    self._entries.move_to_end((student_id, purpose))
+                    found[student_id] = entry[1]
+                else:
+                    missing.append(student_id)
+        shared = self._shared() if missing else None
+        if shared is not None:
+            try:
+                values = shared.mget([self._redis_key((student_id, purpose)) for student_id in missing])
+            except redis.RedisError:
+                app.logger.warning("Cache de consentimento indisponível no Redis", exc_info=True)
+                values = []
+            promoted = {}
+            for student_id, value in zip(missing, values):
+                if value is None:
+                    continue
+                revision, _, active = value.decode(errors="replace").partition(":")
+                # Anything that is not "<revision>:<0|1>" counts as a miss
+                if revision.isdigit() and int(revision) == revisions[student_id] and active in {"0", "1"}:
+                    promoted[student_id] = active == "1"
+            self._store_local(revisions, promoted, purpose)
+            found.update(promoted)
+        return found
+
+    def put_many(self, revisions: dict[int, int], states: dict[int, bool], purpose: str) -> None:
+        self._store_local(revisions, states, purpose)
+        shared = self._shared() if states else None
+        if shared is None:
+            return
+        ttl = app.config["CONSENT_CACHE_REDIS_TTL_SECONDS"]
+        try:
+            with shared.pipeline(transaction=False) as pipeline:
+                for student_id, active in states.items():
+                    pipeline.set(self._redis_key((student_id, purpose)), f"{revisions[student_id]}:{int(active)}", ex=ttl)
+                pipeline.execute()
+        except redis.RedisError:
+            app.logger.warning("Cache de consentimento indisponível no Redis", exc_info=True)
+
+    def _store_local(self, revisions: dict[int, int], states: dict[int, bool], purpose: str) -> None:
+        max_entries = app.config["CONSENT_CACHE_MAX_ENTRIES"]
+        with self._lock:
+            for student_id, active in states.items():
+                self._entries[(student_id, purpose)] = (revisions[student_id], active)
+                self._entries.move_to_end((student_id, purpose))
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_student(self, student_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == student_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+consent_cache = ConsentCache()
+
+
+def consent_changed(student: StudentProfile) -> None:
+    """Record a consent-state change for ``student`` in the current transaction."""
+    student.consent_revision = StudentProfile.consent_revision + 1
+    consent_cache.invalidate_student(student.id)
+
+
+def _consent_states(revisions: dict[int, int], purpose: str) -> dict[int, bool]:
+    states = consent_cache.get_many(revisions, purpose)
+    missing = [student_id for student_id in revisions if student_id not in states]
+    if missing:
+        loaded = dict.fromkeys(missing, False)
+        latest_seen = set()
+        # Newest granted consent first per student, straight off the consents index.
+        for student_id, revoked_at in db.session.execute(
+            select(Consent.student_id, Consent.revogado_em)
+            .where(Consent.student_id.in_(missing), Consent.finalidade == purpose, Consent.status == "granted")
+            .order_by(Consent.student_id, Consent.concedido_em.desc())
+        ).all():
+            if student_id not in latest_seen:
+                latest_seen.add(student_id)
+                loaded[student_id] = revoked_at is None
+        consent_cache.put_many(revisions, loaded, purpose)
+        states.update(loaded)
+    return states
+
+
+def has_active_consent(student: StudentProfile, purpose: str = "gameplay_educacional") -> bool:
+    return _consent_states({student.id: student.consent_revision}, purpose).get(student.id, False)
+
+
+def has_active_consent_many(student_ids, purpose: str = "gameplay_educacional") -> dict[int, bool]:
+    """Consent flags for many students: one revision lookup plus one query for cache misses."""
+    student_ids = set(student_ids)
+    if not student_ids:
+        return {}
+    revisions = dict(db.session.execute(select(StudentProfile.id, StudentProfile.consent_revision).where(StudentProfile.id.in_(student_ids))).all())
+    states = _consent_states(revisions, purpose)
+    return {student_id: states.get(student_id, False) for student_id in student_ids}
 
 
 def activity_payload(activity: Activity) -> dict[str, Any]:
@@ -469,20 +863,72 @@ def activity_payload(activity: Activity) -> dict[str, Any]:
     }
 
 
-def student_payload(student: StudentProfile, sessions: list[GameSession] | None = None) -> dict[str, Any]:
-    sessions = sessions if sessions is not None else []
-    completed = [session for session in sessions if session.status == "completed"]
-    last_activity = max((session.completed_at for session in completed if session.completed_at), default=None)
+class StudentSummary(NamedTuple):
+    pontos_totais: int
+    jogos_completos: int
+    ultima_atividade: datetime | None
+    consentimento_ativo: bool
+
+
+def student_summary(student: StudentProfile) -> StudentSummary:
+    stats = db.session.get(StudentStats, student.id)
+    return StudentSummary(
+        pontos_totais=stats.score_sum if stats else 0,
+        jogos_completos=stats.completed_count if stats else 0,
+        ultima_atividade=stats.last_completed_at if stats else None,
+        consentimento_ativo=has_active_consent(student),
+    )
+
+
+def student_payload(student: StudentProfile, summary: StudentSummary | None = None) -> dict[str, Any]:
+    if summary is None:
+        summary = student_summary(student)
+    last_activity = summary.ultima_atividade
     return {
         "id": student.id,
         "nome": student.apelido,
         "apelido": student.apelido,
         "codigo": student.codigo,
-        "pontos_totais": sum(session.score for session in completed),
-        "nivel": 1 + min(9, len(completed) // 5),
-        "jogos_completos": len(completed),
+        "pontos_totais": summary.pontos_totais,
+        "nivel": 1 + min(9, summary.jogos_completos // 5),
+        "jogos_completos": summary.jogos_completos,
         "ultima_atividade": last_activity.isoformat() if last_activity else None,
-        "consentimento_ativo": has_active_consent(student.id),
+        "consentimento_ativo": summary.consentimento_ativo,
+    }
+
+
+def student_roster(organization_id: int) -> list[tuple[StudentProfile, StudentSummary]]:
+    """Load every active student of an organization with its totals in one query.
+
+    Totals come from the ``student_stats`` rollup and the consent flags from
+    the consent cache (one extra query for misses), so the cost is O(students)
+    in a constant number of round trips regardless of how much gameplay
+    history exists.
+    """
+    statement = (
+        select(StudentProfile, StudentStats.score_sum, StudentStats.completed_count, StudentStats.last_completed_at)
+        .outerjoin(StudentStats, StudentStats.student_id == StudentProfile.id)
+        .where(StudentProfile.organization_id == organization_id, StudentProfile.ativo.is_(True))
+        .order_by(StudentProfile.apelido)
+    )
+    rows = db.session.execute(statement).all()
+    consents = _consent_states({student.id: student.consent_revision for student, *_ in rows}, "gameplay_educacional")
+    return [
+        (student, StudentSummary(points or 0, completed or 0, last_activity, consents.get(student.id, False)))
+        for student, points, completed, last_activity in rows
+    ]
+
+
+def activity_stats_payload(stats: StudentActivityStats) -> dict[str, Any]:
+    total = stats.acertos + stats.erros
+    return {
+        "activity_id": stats.activity_id,
+        "game_type": stats.activity.slug if stats.activity else None,
+        "jogos_completos": stats.completed_count,
+        "melhor_pontuacao": stats.best_score,
+        "melhor_precisao": stats.best_accuracy,
+        "precisao": round(stats.acertos / total, 4) if total else None,
+        "ultima_atividade": stats.last_completed_at.isoformat() if stats.last_completed_at else None,
     }
 
 
@@ -559,6 +1005,59 @@ def _require_json() -> dict[str, Any]:
     return data if isinstance(data, dict) else {}
 
 
+# ---------------------------------------------------------------------------
+# Keyset pagination
+# ---------------------------------------------------------------------------
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor("Cursor de paginação inválido") from exc
+
+
+def page_limit(default: int = 50, maximum: int = 500) -> int:
+    return min(max(request.args.get("limit", default, type=int), 1), maximum)
+
+
+def keyset_page(query, created_column, id_column, limit: int, cursor: str | None = None, descending: bool = True):
+    """Return one page ordered by ``(created_column, id_column)`` and the cursor of the next one.
+
+    The cursor encodes the last row's sort key, so each page is an index range
+    read instead of an OFFSET scan and stays stable while new rows arrive.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(created_column < created_at, and_(created_column == created_at, id_column < row_id)))
+        else:
+            query = query.filter(or_(created_column > created_at, and_(created_column == created_at, id_column > row_id)))
+    ordering = (created_column.desc(), id_column.desc()) if descending else (created_column.asc(), id_column.asc())
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+
+
+@app.errorhandler(InvalidCursor)
+def handle_invalid_cursor(error):
+    return json_error(str(error), 400, "INVALID_CURSOR")
+
+
 @app.errorhandler(IntegrityError)
 def handle_integrity_error(error):
     db.session.rollback()
@@ -664,6 +1163,7 @@ def create_organization_v1(user: User):
     db.session.flush()
     audit("organization_created", "organization", str(organization.id), organization.id)
     db.session.commit()
+    auth_cache.invalidate_user(user.id)
     return jsonify({"id": organization.id, "nome": organization.nome, "slug": organization.slug, "papel": "owner"}), 201
 
 
@@ -673,11 +1173,7 @@ def students_v1(user: User):
     membership = selected_organization(user)
     if not membership:
         return json_error("Organização não selecionada ou não autorizada", 403, "FORBIDDEN")
-    students = StudentProfile.query.filter_by(organization_id=membership.organization_id, ativo=True).order_by(StudentProfile.apelido).all()
-    payload = []
-    for student in students:
-        sessions = GameSession.query.filter_by(student_id=student.id, organization_id=membership.organization_id).all()
-        payload.append(student_payload(student, sessions))
+    payload = [student_payload(student, summary=summary) for student, summary in student_roster(membership.organization_id)]
     return jsonify({"students": payload, "organization_id": membership.organization_id})
 
 
@@ -714,20 +1210,103 @@ def get_student_v1(user: User, student_id: int):
     return jsonify(student_payload(student))
 
 
+def consent_export_payload(consent: Consent) -> dict[str, Any]:
+    return {"id": consent.id, "purpose": consent.finalidade, "version": consent.versao, "status": consent.status, "created_at": consent.data_criacao.isoformat()}
+
+
+def _ndjson_line(kind: str, data: dict[str, Any]) -> bytes:
+    return json.dumps({"type": kind, "data": data}, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _export_ndjson(student_id: int):
+    """Yield the student's export one record per line, reading with server-side cursors.
+
+    Runs after the view returned, so it reloads the student in the streaming
+    context instead of touching instances from the request session.
+    """
+    batch = app.config["EXPORT_STREAM_BATCH"]
+    student = db.session.get(StudentProfile, student_id)
+    yield _ndjson_line("student", student_payload(student))
+    sessions = db.session.execute(
+        select(GameSession)
+        .where(GameSession.student_id == student.id)
+        .order_by(GameSession.data_criacao.asc(), GameSession.id.asc())
+        .execution_options(yield_per=batch)
+    ).scalars()
+    for session in sessions:
+        yield _ndjson_line("session", session_payload(session))
+    events = db.session.execute(
+        select(GameEvent.id, GameSession.public_id, GameEvent.tipo, GameEvent.payload_json, GameEvent.ocorrido_em)
+        .join(GameSession, GameEvent.session_id == GameSession.id)
+        .where(GameSession.student_id == student.id)
+        .order_by(GameEvent.session_id.asc(), GameEvent.id.asc())
+        .execution_options(yield_per=batch)
+    )
+    for event_id, session_public_id, tipo, payload, ocorrido_em in events:
+        yield _ndjson_line("event", {
+            "id": event_id,
+            "session_id": session_public_id,
+            "type": tipo,
+            "data": payload,
+            "occurred_at": ocorrido_em.isoformat() if ocorrido_em else None,
+        })
+    consents = db.session.execute(
+        select(Consent)
+        .where(Consent.student_id == student.id)
+        .order_by(Consent.data_criacao.asc(), Consent.id.asc())
+        .execution_options(yield_per=batch)
+    ).scalars()
+    for consent in consents:
+        yield _ndjson_line("consent", consent_export_payload(consent))
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _stream_student_export(student_id: int) -> Response:
+    chunks = _export_ndjson(student_id)
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-store"}
+    if request.accept_encodings["gzip"]:
+        chunks = _gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(chunks), mimetype="application/x-ndjson", headers=headers)
+
+
 @app.get("/api/v1/students/<int:student_id>/export")
 @token_required
 def export_student_v1(user: User, student_id: int):
     student, _ = student_for_user(user, student_id)
     if not student:
         return json_error("Estudante não encontrado", 404, "NOT_FOUND")
-    sessions = GameSession.query.filter_by(student_id=student.id).order_by(GameSession.data_criacao.asc()).all()
-    consents = Consent.query.filter_by(student_id=student.id).order_by(Consent.data_criacao.asc()).all()
-    audit("student_exported", "student", str(student.id), student.organization_id)
+    if request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"]) == "application/x-ndjson":
+        # The audit record is committed before the first byte is streamed.
+        audit("student_exported", "student", str(student.id), student.organization_id, {"format": "ndjson"})
+        db.session.commit()
+        return _stream_student_export(student.id)
+    cursor = request.args.get("cursor")
+    sessions, next_cursor = keyset_page(
+        GameSession.query.filter_by(student_id=student.id),
+        GameSession.data_criacao,
+        GameSession.id,
+        page_limit(),
+        cursor,
+        descending=False,
+    )
+    # Consents are small and bounded per student; they travel with the first page.
+    consents = [] if cursor else Consent.query.filter_by(student_id=student.id).order_by(Consent.data_criacao.asc(), Consent.id.asc()).all()
+    audit("student_exported", "student", str(student.id), student.organization_id, {"cursor": bool(cursor)})
     db.session.commit()
     return jsonify({
-        "student": student_payload(student, sessions),
+        "student": student_payload(student),
         "sessions": [session_payload(session) for session in sessions],
-        "consents": [{"id": consent.id, "purpose": consent.finalidade, "version": consent.versao, "status": consent.status, "created_at": consent.data_criacao.isoformat()} for consent in consents],
+        "consents": [consent_export_payload(consent) for consent in consents],
+        "next_cursor": next_cursor,
     })
 
 
@@ -739,6 +1318,7 @@ def delete_student_v1(user: User, student_id: int):
         return json_error("Estudante não encontrado ou operação não autorizada", 404, "NOT_FOUND")
     student.ativo = False
     student.data_exclusao = utc_now()
+    consent_changed(student)
     audit("student_deletion_requested", "student", str(student.id), student.organization_id)
     db.session.commit()
     return jsonify({"success": True, "student_id": student.id, "status": "deleted"})
@@ -780,8 +1360,8 @@ def list_consents_v1(user: User):
     else:
         memberships = [membership.organization_id for membership in user.memberships if membership.ativo]
         query = query.join(StudentProfile).filter(StudentProfile.organization_id.in_(memberships))
-    consents = query.order_by(Consent.data_criacao.desc()).all()
-    return jsonify({"consents": [{
+    consents, next_cursor = keyset_page(query, Consent.data_criacao, Consent.id, page_limit(), request.args.get("cursor"))
+    return jsonify({"next_cursor": next_cursor, "consents": [{
         "id": consent.id,
         "student_id": consent.student_id,
         "finalidade": consent.finalidade,
@@ -800,8 +1380,7 @@ def create_consent_v1(user: User):
     student, membership = student_for_user(user, int(student_id)) if student_id else (None, None)
     if not student:
         return json_error("Estudante não encontrado", 404, "NOT_FOUND")
-    linked_guardian = GuardianLink.query.filter_by(student_id=student.id, guardian_id=user.id, ativo=True).first()
-    if not linked_guardian and not can_manage_students(membership):
+    if not is_linked_guardian(user, student.id) and not can_manage_students(membership):
         return json_error("Somente responsável vinculado ou gestor autorizado pode registrar consentimento", 403, "FORBIDDEN")
     status = str(data.get("status") or "granted").lower()
     if status not in {"granted", "revoked", "pending"}:
@@ -817,6 +1396,7 @@ def create_consent_v1(user: User):
         revogado_em=utc_now() if status == "revoked" else None,
     )
     db.session.add(consent)
+    consent_changed(student)
     db.session.flush()
     audit("consent_" + status, "consent", str(consent.id), student.organization_id, {"student_id": student.id, "purpose": consent.finalidade})
     db.session.commit()
@@ -830,11 +1410,11 @@ def revoke_consent_v1(user: User, consent_id: int):
     if not consent:
         return json_error("Consentimento não encontrado", 404, "NOT_FOUND")
     student, membership = student_for_user(user, consent.student_id)
-    linked_guardian = GuardianLink.query.filter_by(student_id=consent.student_id, guardian_id=user.id, ativo=True).first()
-    if not student or (not can_manage_students(membership) and not linked_guardian):
+    if not student or (not can_manage_students(membership) and not is_linked_guardian(user, consent.student_id)):
         return json_error("Operação não autorizada", 403, "FORBIDDEN")
     consent.status = "revoked"
     consent.revogado_em = utc_now()
+    consent_changed(student)
     audit("consent_revoked", "consent", str(consent.id), student.organization_id, {"student_id": student.id})
     db.session.commit()
     return jsonify({"success": True, "consent_id": consent.id, "status": consent.status})
@@ -846,9 +1426,14 @@ def audit_events_v1(user: User):
     membership = selected_organization(user)
     if not membership or membership.papel not in {"owner", "admin"}:
         return json_error("Somente administradores podem consultar auditoria", 403, "FORBIDDEN")
-    limit = min(max(request.args.get("limit", 100, type=int), 1), 500)
-    events = AuditEvent.query.filter_by(organization_id=membership.organization_id).order_by(AuditEvent.created_at.desc()).limit(limit).all()
-    return jsonify({"events": [{
+    events, next_cursor = keyset_page(
+        AuditEvent.query.filter_by(organization_id=membership.organization_id),
+        AuditEvent.created_at,
+        AuditEvent.id,
+        page_limit(default=100),
+        request.args.get("cursor"),
+    )
+    return jsonify({"next_cursor": next_cursor, "events": [{
         "id": event.id,
         "action": event.action,
         "resource_type": event.resource_type,
@@ -869,6 +1454,17 @@ def activities_v1():
     return jsonify({"activities": [activity_payload(activity) for activity in activities]})
 
 
+def _activity_id(data: dict[str, Any]) -> int | None:
+    try:
+        return int(data["activity_id"]) if data.get("activity_id") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _game_type(data: dict[str, Any]) -> str:
+    return str(data.get("game_type") or data.get("tipo") or "").strip()
+
+
 def _activity_for_data(data: dict[str, Any]) -> Activity | None:
     activity_id = data.get("activity_id")
     game_type = str(data.get("game_type") or data.get("tipo") or "").strip()
@@ -878,6 +1474,10 @@ def _activity_for_data(data: dict[str, Any]) -> Activity | None:
     return activity
 
 
+def _idempotency_key(data: dict[str, Any]) -> str:
+    return str(data.get("session_id") or data.get("idempotency_key") or "").strip()
+
+
 def _create_or_get_session(user: User, data: dict[str, Any], complete: bool = False) -> tuple[GameSession | None, str | None, int]:
     membership = selected_organization(user)
     student_id = data.get("student_id") or data.get("aluno_id")
@@ -889,12 +1489,12 @@ def _create_or_get_session(user: User, data: dict[str, Any], complete: bool = Fa
     if not student or (membership and student.organization_id != membership.organization_id):
         return None, "Estudante não encontrado ou não autorizado", 404
     organization_id = student.organization_id
-    if not has_active_consent(student.id):
+    if not has_active_consent(student):
         return None, "Consentimento válido é necessário antes de registrar gameplay", 403
     activity = _activity_for_data(data)
     if not activity:
         return None, "Atividade não encontrada", 404
-    idempotency_key = str(request.headers.get("Idempotency-Key") or data.get("session_id") or data.get("idempotency_key") or "").strip()
+    idempotency_key = str(request.headers.get("Idempotency-Key") or _idempotency_key(data)).strip()
     if len(idempotency_key) < 8:
         return None, "Idempotency-Key ou session_id é obrigatório", 400
     existing = GameSession.query.filter_by(organization_id=organization_id, idempotency_key=idempotency_key).first()
@@ -919,27 +1519,174 @@ def _create_or_get_session(user: User, data: dict[str, Any], complete: bool = Fa
     return session, None, 201
 
 
-def _complete_session(session: GameSession, data: dict[str, Any]) -> None:
-    if session.status == "completed":
-        return
+def _completion_values(data: dict[str, Any]) -> dict[str, Any]:
     def as_int(name: str, default: int = 0) -> int:
         try:
             return max(0, int(data.get(name, default)))
         except (TypeError, ValueError):
             return default
-    session.score = as_int("score", data.get("pontos", 0))
-    session.duration_seconds = as_int("duration_seconds", data.get("tempo_gasto", 0))
-    session.acertos = as_int("acertos", 0)
-    session.erros = as_int("erros", 0)
-    total = session.acertos + session.erros
-    session.accuracy = round(session.acertos / total, 4) if total else None
-    session.status = "completed"
-    session.completed_at = utc_now()
+    acertos = as_int("acertos", 0)
+    erros = as_int("erros", 0)
+    total = acertos + erros
+    return {
+        "score": as_int("score", data.get("pontos", 0)),
+        "duration_seconds": as_int("duration_seconds", data.get("tempo_gasto", 0)),
+        "acertos": acertos,
+        "erros": erros,
+        "accuracy": round(acertos / total, 4) if total else None,
+        "status": "completed",
+        "completed_at": utc_now(),
+    }
+
+
+def _event_rows(session_id: int, data: dict[str, Any]) -> list[dict[str, Any]]:
     events = data.get("events") if isinstance(data.get("events"), list) else []
+    rows = []
     for event in events[:200]:
         if isinstance(event, dict) and event.get("type"):
             payload = event.get("data") if isinstance(event.get("data"), dict) else {}
-            db.session.add(GameEvent(session_id=session.id, tipo=str(event["type"])[:60], payload_json=payload))
+            rows.append({"session_id": session_id, "tipo": str(event["type"])[:60], "payload_json": payload})
+    return rows
+
+
+def _complete_session(session: GameSession, data: dict[str, Any]) -> None:
+    if session.status == "completed":
+        return
+    for name, value in _completion_values(data).items():
+        setattr(session, name, value)
+    write_game_events(_event_rows(session.id, data))
+    _record_completion_stats([session])
+
+
+def write_game_events(rows: list[dict[str, Any]]) -> None:
+    """Append event rows with one executemany INSERT in the current transaction.
+
+    The rows never enter the identity map, which is what makes this cheaper
+    than ``db.session.add`` per event; SQLAlchemy batches them into multi-row
+    VALUES statements on both SQLite and PostgreSQL.
+    """
+    if rows:
+        db.session.execute(insert(GameEvent), rows)
+
+
+def _upsert_statement(model):
+    """INSERT ... ON CONFLICT construct for the dialects the product supports."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise RuntimeError(f"Upsert não suportado para o banco {dialect}")
+
+
+def _greatest(column, value):
+    return case((or_(column.is_(None), column < value), value), else_=column)
+
+
+def _record_completion_stats(sessions: list[GameSession]) -> None:
+    """Fold completed sessions into the rollups inside the caller's transaction.
+
+    Sessions are pre-aggregated per student and per activity, then written with
+    one executemany upsert per rollup table.
+    """
+    students: dict[int, dict[str, Any]] = {}
+    activities: dict[tuple[int, int], dict[str, Any]] = {}
+    for session in sessions:
+        row = students.setdefault(session.student_id, {
+            "student_id": session.student_id,
+            "organization_id": session.organization_id,
+            "completed_count": 0,
+            "score_sum": 0,
+            "last_completed_at": session.completed_at,
+        })
+        row["completed_count"] += 1
+        row["score_sum"] += session.score
+        row["last_completed_at"] = max(row["last_completed_at"], session.completed_at)
+        row = activities.setdefault((session.student_id, session.activity_id), {
+            "student_id": session.student_id,
+            "activity_id": session.activity_id,
+            "organization_id": session.organization_id,
+            "completed_count": 0,
+            "best_score": session.score,
+            "best_accuracy": session.accuracy,
+            "acertos": 0,
+            "erros": 0,
+            "last_completed_at": session.completed_at,
+        })
+        row["completed_count"] += 1
+        row["best_score"] = max(row["best_score"], session.score)
+        if session.accuracy is not None:
+            row["best_accuracy"] = max(row["best_accuracy"] or 0.0, session.accuracy)
+        row["acertos"] += session.acertos
+        row["erros"] += session.erros
+        row["last_completed_at"] = max(row["last_completed_at"], session.completed_at)
+    if not students:
+        return
+
+    statement = _upsert_statement(StudentStats)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["student_id"],
+            set_={
+                "completed_count": StudentStats.completed_count + statement.excluded.completed_count,
+                "score_sum": StudentStats.score_sum + statement.excluded.score_sum,
+                "last_completed_at": _greatest(StudentStats.last_completed_at, statement.excluded.last_completed_at),
+            },
+        ),
+        list(students.values()),
+    )
+    statement = _upsert_statement(StudentActivityStats)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["student_id", "activity_id"],
+            set_={
+                "completed_count": StudentActivityStats.completed_count + statement.excluded.completed_count,
+                "best_score": _greatest(StudentActivityStats.best_score, statement.excluded.best_score),
+                "best_accuracy": _greatest(StudentActivityStats.best_accuracy, statement.excluded.best_accuracy),
+                "acertos": StudentActivityStats.acertos + statement.excluded.acertos,
+                "erros": StudentActivityStats.erros + statement.excluded.erros,
+                "last_completed_at": _greatest(StudentActivityStats.last_completed_at, statement.excluded.last_completed_at),
+            },
+        ),
+        list(activities.values()),
+    )
+
+
+def rebuild_student_stats() -> int:
+    """Recompute both rollups from ``game_sessions``; returns the number of students."""
+    completed = GameSession.status == "completed"
+    db.session.execute(delete(StudentActivityStats))
+    db.session.execute(delete(StudentStats))
+    db.session.execute(
+        insert(StudentStats).from_select(
+            ["student_id", "organization_id", "completed_count", "score_sum", "last_completed_at"],
+            select(
+                GameSession.student_id,
+                func.min(GameSession.organization_id),
+                func.count(GameSession.id),
+                func.sum(GameSession.score),
+                func.max(GameSession.completed_at),
+            ).where(completed).group_by(GameSession.student_id),
+        )
+    )
+    db.session.execute(
+        insert(StudentActivityStats).from_select(
+            ["student_id", "activity_id", "organization_id", "completed_count", "best_score", "best_accuracy", "acertos", "erros", "last_completed_at"],
+            select(
+                GameSession.student_id,
+                GameSession.activity_id,
+                func.min(GameSession.organization_id),
+                func.count(GameSession.id),
+                func.max(GameSession.score),
+                func.max(GameSession.accuracy),
+                func.sum(GameSession.acertos),
+                func.sum(GameSession.erros),
+                func.max(GameSession.completed_at),
+            ).where(completed).group_by(GameSession.student_id, GameSession.activity_id),
+        )
+    )
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(StudentStats))
 
 
 @app.post("/api/v1/gameplay/sessions")
@@ -978,6 +1725,119 @@ def sync_gameplay_v1(user: User):
     return jsonify({"success": True, "processing": "completed", "session": session_payload(session)}), status if status != 200 else 200
 
 
+def _sync_batch(user: User, items: list[Any]) -> list[dict[str, Any]]:
+    """Create and complete many offline sessions with set-based lookups and bulk inserts.
+
+    Mirrors ``_create_or_get_session(complete=True)`` item by item: every
+    lookup runs once for the whole batch and all new sessions, events and
+    rollup updates are written in the caller's transaction.
+    """
+    membership = selected_organization(user)
+    results: list[dict[str, Any]] = []
+    candidates: list[tuple[int, dict[str, Any], int, str]] = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": "rejected", "error": "Sessão inválida", "code": 400})
+            continue
+        key = _idempotency_key(item)
+        try:
+            student_id = int(item.get("student_id") or item.get("aluno_id"))
+        except (TypeError, ValueError):
+            results.append({"index": index, "session_id": key or None, "status": "rejected", "error": "student_id é obrigatório", "code": 400})
+            continue
+        if len(key) < 8:
+            results.append({"index": index, "session_id": key or None, "status": "rejected", "error": "session_id é obrigatório", "code": 400})
+            continue
+        candidates.append((index, item, student_id, key[:160]))
+
+    student_ids = {student_id for _, _, student_id, _ in candidates}
+    loaded = StudentProfile.query.filter(StudentProfile.id.in_(student_ids), StudentProfile.ativo.is_(True)).all() if student_ids else []
+    consents = _consent_states({student.id: student.consent_revision for student in loaded}, "gameplay_educacional")
+    students: dict[int, tuple[StudentProfile, bool]] = {student.id: (student, consents.get(student.id, False)) for student in loaded}
+    activity_ids = {_activity_id(item) for _, item, _, _ in candidates} - {None}
+    slugs = {_game_type(item) for _, item, _, _ in candidates}
+    activities = Activity.query.filter(or_(Activity.id.in_(activity_ids), Activity.slug.in_(slugs))).all() if candidates else []
+    activities_by_id = {activity.id: activity for activity in activities}
+    activities_by_slug = {activity.slug: activity for activity in activities}
+    organization_ids = {student.organization_id for student, _ in students.values()}
+    keys = {key for _, _, _, key in candidates}
+    existing = {
+        (session.organization_id, session.idempotency_key): session
+        for session in GameSession.query.filter(GameSession.organization_id.in_(organization_ids), GameSession.idempotency_key.in_(keys))
+    } if organization_ids and keys else {}
+
+    pending: list[tuple[int, dict[str, Any], dict[str, Any]]] = []
+    claimed: set[tuple[int, str]] = set()
+    for index, item, student_id, key in candidates:
+        student, consent = students.get(student_id, (None, False))
+        authorized = student is not None and (get_membership(user, student.organization_id) or is_linked_guardian(user, student.id))
+        if not authorized or (membership and student.organization_id != membership.organization_id):
+            results.append({"index": index, "session_id": key, "status": "rejected", "error": "Estudante não encontrado ou não autorizado", "code": 404})
+            continue
+        if not consent:
+            results.append({"index": index, "session_id": key, "status": "rejected", "error": "Consentimento válido é necessário antes de registrar gameplay", "code": 403})
+            continue
+        activity = activities_by_id.get(_activity_id(item)) or activities_by_slug.get(_game_type(item))
+        if not activity:
+            results.append({"index": index, "session_id": key, "status": "rejected", "error": "Atividade não encontrada", "code": 404})
+            continue
+        identity = (student.organization_id, key)
+        if identity in existing:
+            results.append({"index": index, "session_id": key, "status": "duplicate", "session": session_payload(existing[identity])})
+            continue
+        if identity in claimed:
+            results.append({"index": index, "session_id": key, "status": "duplicate"})
+            continue
+        claimed.add(identity)
+        row = {
+            "organization_id": student.organization_id,
+            "student_id": student.id,
+            "activity_id": activity.id,
+            "created_by_user_id": user.id,
+            "idempotency_key": key,
+            "game_type": activity.slug,
+            "versao_jogo": str(item.get("versao_jogo") or activity.versao)[:30],
+            "metadata_json": item.get("metadata") if isinstance(item.get("metadata"), dict) else {},
+            **_completion_values(item),
+        }
+        pending.append((index, item, row))
+
+    if pending:
+        # RETURNING order is not guaranteed for multi-row inserts; match rows back by their unique key.
+        created = {
+            (session.organization_id, session.idempotency_key): session
+            for session in db.session.scalars(insert(GameSession).returning(GameSession), [row for _, _, row in pending])
+        }
+        sessions = [created[(row["organization_id"], row["idempotency_key"])] for _, _, row in pending]
+        write_game_events([event for session, (_, item, _) in zip(sessions, pending) for event in _event_rows(session.id, item)])
+        _record_completion_stats(sessions)
+        for session, (index, _, row) in zip(sessions, pending):
+            results.append({"index": index, "session_id": row["idempotency_key"], "status": "created", "session": session_payload(session)})
+        for organization_id in {session.organization_id for session in sessions}:
+            audit(
+                "game_sessions_batch_created",
+                "game_session",
+                None,
+                organization_id,
+                {"sessions": [session.public_id for session in sessions if session.organization_id == organization_id]},
+            )
+    return sorted(results, key=lambda result: result["index"])
+
+
+@app.post("/api/v1/gameplay/sync/batch")
+@token_required
+def sync_gameplay_batch_v1(user: User):
+    items = _require_json().get("sessions")
+    if not isinstance(items, list) or not items:
+        return json_error("Nenhuma sessão fornecida")
+    if len(items) > app.config["GAMEPLAY_SYNC_BATCH_MAX"]:
+        return json_error(f"Lote excede o limite de {app.config['GAMEPLAY_SYNC_BATCH_MAX']} sessões", 413, "BATCH_TOO_LARGE")
+    results = _sync_batch(user, items)
+    db.session.commit()
+    summary = {status: sum(result["status"] == status for result in results) for status in ("created", "duplicate", "rejected")}
+    return jsonify({"success": True, "processing": "completed", "summary": summary, "results": results})
+
+
 @app.get("/api/v1/gameplay/sessions/<public_id>/status")
 @token_required
 def game_session_status_v1(user: User, public_id: str):
@@ -996,10 +1856,19 @@ def progress_v1(user: User, student_id: int):
     student, _ = student_for_user(user, student_id)
     if not student:
         return json_error("Estudante não encontrado", 404, "NOT_FOUND")
-    sessions = GameSession.query.filter_by(student_id=student.id).order_by(GameSession.data_criacao.desc()).all()
+    sessions, next_cursor = keyset_page(
+        GameSession.query.filter_by(student_id=student.id),
+        GameSession.data_criacao,
+        GameSession.id,
+        page_limit(),
+        request.args.get("cursor"),
+    )
+    activities = StudentActivityStats.query.filter_by(student_id=student.id).order_by(StudentActivityStats.activity_id).all()
     return jsonify({
-        "student": student_payload(student, sessions),
+        "student": student_payload(student),
         "sessions": [session_payload(session) for session in sessions],
+        "activities": [activity_stats_payload(stats) for stats in activities],
+        "next_cursor": next_cursor,
     })
 
 
@@ -1022,7 +1891,7 @@ def login_legacy():
 @app.get("/api/alunos")
 @token_required
 def students_legacy(user: User):
-    response = students_v1(user)
+    response = students_v1.__wrapped__(user)
     if isinstance(response, tuple):
         return response
     data = response.get_json() or {}
@@ -1032,25 +1901,32 @@ def students_legacy(user: User):
 @app.post("/api/alunos")
 @token_required
 def create_student_legacy(user: User):
-    response = create_student_v1(user)
+    response = create_student_v1.__wrapped__(user)
     return response
 
 
 @app.get("/api/progresso/<int:aluno_id>")
 @token_required
 def progress_legacy(user: User, aluno_id: int):
-    response = progress_v1(user, aluno_id)
-    if isinstance(response, tuple):
-        return response
-    data = response.get_json() or {}
+    student, _ = student_for_user(user, aluno_id)
+    if not student:
+        return json_error("Estudante não encontrado", 404, "NOT_FOUND")
+    # The legacy contract is the full history as a list, so walk every page.
+    sessions: list[GameSession] = []
+    cursor = None
+    while True:
+        page, cursor = keyset_page(GameSession.query.filter_by(student_id=student.id), GameSession.data_criacao, GameSession.id, 500, cursor)
+        sessions.extend(page)
+        if not cursor:
+            break
     return jsonify([{
-        "atividade_id": session["activity_id"],
-        "pontos": session["score"],
-        "tempo_gasto": session["duration_seconds"],
-        "acertos": session["acertos"],
-        "erros": session["erros"],
-        "data": session["completed_at"],
-    } for session in data.get("sessions", [])])
+        "atividade_id": session.activity_id,
+        "pontos": session.score,
+        "tempo_gasto": session.duration_seconds,
+        "acertos": session.acertos,
+        "erros": session.erros,
+        "data": session.completed_at.isoformat() if session.completed_at else None,
+    } for session in sessions])
 
 
 @app.post("/api/progresso")
@@ -1059,7 +1935,7 @@ def save_progress_legacy(user: User):
     data = _require_json()
     if not data.get("session_id"):
         data["session_id"] = f"legacy-{uuid.uuid4()}"
-    return sync_gameplay_v1(user)
+    return sync_gameplay_v1.__wrapped__(user)
 
 
 @app.get("/api/atividades")
@@ -1087,6 +1963,8 @@ def health_check():
         db.session.execute(text("SELECT 1"))
         checks["database"] = "ok"
         checks["status"] = "healthy"
+        if app.config["TELEMETRY_INGEST_MODE"] == "queue" and telemetry_queue is not None:
+            checks["telemetry_queue"] = telemetry_queue.stats()
         return jsonify(checks), 200
     except Exception as exc:
         app.logger.warning("Database health failed: %s", exc.__class__.__name__)
@@ -1101,18 +1979,70 @@ def api_health_check():
 
 
 try:
-    from telemetry_service import TelemetryService
-
-    def get_telemetry_db():
-        import sqlite3
-        return sqlite3.connect(os.getenv("TELEMETRY_DB_PATH", "telemetry.db"))
+    from telemetry_service import TelemetryIngestQueue, TelemetryService
 
-    telemetry_service = TelemetryService(get_telemetry_db())
+    # Connections open lazily per process/thread, so this is safe before gunicorn forks.
+    telemetry_service = TelemetryService.from_path(
+        os.getenv("TELEMETRY_DB_PATH", "telemetry.db"),
+        synchronous=os.getenv("TELEMETRY_SQLITE_SYNCHRONOUS", "NORMAL"),
+        busy_timeout_ms=int(os.getenv("TELEMETRY_BUSY_TIMEOUT_MS", "5000")),
+    )
+    # Used when TELEMETRY_INGEST_MODE=queue; the writer thread starts on the first submit.
+    telemetry_queue = TelemetryIngestQueue(
+        telemetry_service,
+        max_events=app.config["TELEMETRY_QUEUE_MAX_EVENTS"],
+        batch_events=app.config["TELEMETRY_QUEUE_BATCH_EVENTS"],
+        flush_interval_ms=app.config["TELEMETRY_QUEUE_FLUSH_MS"],
+    )
+    atexit.register(telemetry_queue.close)
 except Exception as telemetry_import_error:  # pragma: no cover - optional legacy module
     telemetry_service = None
+    telemetry_queue = None
     app.logger.warning("Telemetry service unavailable: %s", telemetry_import_error.__class__.__name__)
 
 
+_ai_engine_lock = threading.Lock()
+
+
+def shared_ai_engine() -> Any:
+    """The process-wide ``ai_engine.ai_engine``, rehydrating students from ``game_sessions``.
+
+    The module is imported on first use (numpy/scikit-learn) and its history
+    loader runs on ``db.engine``, so it reads the same database, with the same
+    pool settings, as the API.
+    """
+    import ai_engine
+
+    engine = ai_engine.ai_engine
+    if engine.students.loader is None:
+        with _ai_engine_lock:
+            if engine.students.loader is None:
+                with app.app_context():
+                    database = db.engine
+
+                def load_history(student_id: int, limit: int) -> list:
+                    with database.connect() as connection:
+                        return ai_engine.game_session_history(connection, student_id, limit)
+
+                engine.students.loader = load_history
+    return engine
+
+
+TELEMETRY_IDENTITY_FIELDS = {"user_id", "usuario_id", "organization_id", "student_id", "aluno_id"}
+
+
+def _telemetry_event(event: dict[str, Any], user: User) -> dict[str, Any]:
+    # Do not accept identity fields from the client as authorization metadata.
+    sanitized = {key: value for key, value in event.items() if key not in TELEMETRY_IDENTITY_FIELDS}
+    sanitized["event_type"] = str(event.get("event_type") or event.get("type") or "unknown")[:60]
+    sanitized.pop("type", None)
+    for field in ("session_id", "game_module"):
+        if sanitized.get(field) is not None:
+            sanitized[field] = str(sanitized[field])[:120]
+    sanitized["user_id"] = user.id
+    return sanitized
+
+
 @app.post("/api/telemetry/batch")
 @token_required
 def telemetry_batch(user: User):
@@ -1122,14 +2052,39 @@ def telemetry_batch(user: User):
     events = data.get("events") if isinstance(data.get("events"), list) else []
     if not events:
         return json_error("Nenhum evento fornecido")
-    # Do not accept identity fields from the client as authorization metadata.
-    sanitized = [{"type": str(event.get("type", "unknown"))[:60], "data": event.get("data", {})} for event in events if isinstance(event, dict)]
+    sanitized = [_telemetry_event(event, user) for event in events if isinstance(event, dict)]
+    if app.config["TELEMETRY_INGEST_MODE"] == "queue" and telemetry_queue is not None:
+        return _enqueue_telemetry(sanitized)
     result = telemetry_service.process_batch(sanitized)
     audit("telemetry_batch", "telemetry", metadata={"count": len(sanitized)})
     db.session.commit()
     return jsonify(result), 200 if result.get("success") else 500
 
 
+def _enqueue_telemetry(events: list[dict[str, Any]]):
+    # Validated here, so missing timestamps are the receive time and the writer thread only inserts.
+    rows, accepted, errors = telemetry_service.validate_events(events)
+    if len(rows) > telemetry_queue.max_events:
+        return json_error(
+            f"Lote maior que a fila de telemetria ({telemetry_queue.max_events} eventos); divida o envio",
+            413,
+            "TELEMETRY_BATCH_TOO_LARGE",
+        )
+    if not telemetry_queue.submit(rows, accepted):
+        response = json_error("Fila de telemetria cheia; tente novamente mais tarde", 429, "TELEMETRY_BACKPRESSURE")
+        response[0].headers["Retry-After"] = str(telemetry_queue.retry_after())
+        return response
+    audit("telemetry_batch", "telemetry", metadata={"count": len(accepted), "queued": True})
+    db.session.commit()
+    return jsonify({
+        "success": True,
+        "queued": len(accepted),
+        "total": len(events),
+        "errors": errors,
+        "queue_depth": telemetry_queue.stats()["depth"],
+    }), 202
+
+
 @app.get("/api/telemetry/session/<session_id>")
 @token_required
 def get_session_summary(user: User, session_id: str):
@@ -1141,18 +2096,161 @@ def get_session_summary(user: User, session_id: str):
     return jsonify(summary), 200
 
 
+@app.get("/api/telemetry/rollups/<game_module>")
+@token_required
+def get_telemetry_rollups(user: User, game_module: str):
+    if telemetry_service is None:
+        return json_error("Telemetria indisponível", 503, "SERVICE_UNAVAILABLE")
+    try:
+        rollups = telemetry_service.get_rollups(
+            game_module,
+            request.args.get("start", ""),
+            request.args.get("end", ""),
+            grain=request.args.get("grain") or None,
+        )
+    except ValueError as exc:
+        return json_error(str(exc), 400, "VALIDATION_ERROR")
+    return jsonify(rollups), 200
+
+
+def game_event_storage(connection) -> GameEventStorage:
+    return GameEventStorage(
+        connection,
+        retention_months=app.config["GAME_EVENTS_RETENTION_MONTHS"],
+        partitions_ahead=app.config["GAME_EVENTS_PARTITIONS_AHEAD"],
+    )
+
+
+def create_schema() -> None:
+    """``create_all`` plus, when configured on PostgreSQL, a month-partitioned ``game_events``."""
+    partitioned = app.config["GAME_EVENTS_STORAGE"] == "partitioned"
+    if not partitioned or db.engine.dialect.name != "postgresql":
+        if partitioned:
+            app.logger.warning("GAME_EVENTS_STORAGE=partitioned requer PostgreSQL; usando tabela simples")
+        db.create_all()
+        upgrade_schema()
+        return
+    events_table = GameEvent.__table__
+    with db.engine.begin() as connection:
+        existing = db.inspect(connection).has_table(events_table.name)
+        db.metadata.create_all(connection, tables=[table for table in db.metadata.sorted_tables if table is not events_table])
+        storage = game_event_storage(connection)
+        if existing and not storage.is_partitioned():
+            app.logger.warning("game_events já existe sem particionamento; migre os dados antes de ativar o modo particionado")
+        else:
+            storage.create_partitioned_table()
+    upgrade_schema()
+
+
+def upgrade_schema() -> list[str]:
+    """Create model columns and indexes missing from tables that predate them.
+
+    ``create_all`` only creates columns and indexes together with new tables,
+    so this is the idempotent migration step for existing deployments. Added
+    columns must be nullable or carry a ``server_default``.
+    """
+    created = []
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                with db.engine.begin() as connection:
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                created.append(f"{table.name}.{column.name}")
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    if created:
+        app.logger.info("Colunas e índices criados: %s", ", ".join(created))
+    return created
+
+
 @app.cli.command("init-db")
 def init_db_command():
     """Create tables and publish the non-personal activity catalog."""
     with app.app_context():
-        db.create_all()
+        create_schema()
         seed_activities()
+        if not db.session.scalar(select(StudentStats.student_id).limit(1)) and db.session.scalar(
+            select(GameSession.id).where(GameSession.status == "completed").limit(1)
+        ):
+            rebuild_student_stats()
+        if telemetry_service is not None:
+            telemetry_service.migrate()
         print("Banco inicializado e catálogo de atividades publicado.")
 
 
+@app.cli.command("export-telemetry-parquet")
+@click.option("--output", default=lambda: os.getenv("TELEMETRY_PARQUET_DIR", "telemetry-parquet"), show_default="TELEMETRY_PARQUET_DIR", help="Dataset root directory.")
+@click.option("--name", default="parquet", show_default=True, help="Watermark name; use one per destination.")
+def export_telemetry_parquet_command(output: str, name: str):
+    """Append telemetry events newer than the watermark to a date-partitioned Parquet dataset."""
+    if telemetry_service is None:
+        raise click.ClickException("Telemetria indisponível")
+    try:
+        report = telemetry_service.export_parquet(output, name=name)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc)) from exc
+    print(f"Eventos exportados: {report['exported']} (marca d'água {report['watermark']})")
+    for path in report["files"]:
+        print(f"  {path}")
+
+
+@app.cli.command("train-difficulty-model")
+@click.option("--output", default=lambda: os.getenv("AI_DIFFICULTY_MODEL_PATH", "models"), show_default="AI_DIFFICULTY_MODEL_PATH", help="Artifact directory.")
+@click.option("--estimators", default=100, show_default=True, help="Trees in the random forest.")
+def train_difficulty_model_command(output: str, estimators: int):
+    """Fit the difficulty model on completed game_sessions and write a versioned artifact."""
+    from ai_engine import difficulty_training_rows, save_difficulty_artifact, train_difficulty_model
+
+    with db.engine.connect() as connection:
+        try:
+            artifact = train_difficulty_model(difficulty_training_rows(connection), n_estimators=estimators)
+        except ValueError as exc:
+            raise click.ClickException(str(exc)) from exc
+    path = save_difficulty_artifact(artifact, output)
+    print(f"Modelo de dificuldade {artifact['version']} treinado com {artifact['samples']} sessões: {path}")
+
+
+@app.cli.command("maintain-game-events")
+@click.option("--archive", is_flag=True, help="Detach/copy expired events to archive tables instead of dropping them.")
+def maintain_game_events_command(archive: bool):
+    """Create upcoming game_events partitions and apply the configured retention."""
+    with app.app_context(), db.engine.begin() as connection:
+        report = game_event_storage(connection).maintain(archive=archive)
+    print(f"Partições criadas: {', '.join(report.created) or 'nenhuma'}")
+    print(f"Partições removidas: {', '.join(report.dropped) or 'nenhuma'}")
+    print(f"Arquivadas: {', '.join(report.archived) or 'nenhuma'}")
+    if report.deleted_rows:
+        print(f"Eventos expirados removidos: {report.deleted_rows}")
+
+
+@app.cli.command("rebuild-student-stats")
+def rebuild_student_stats_command():
+    """Backfill the student_stats rollups from the full game_sessions history."""
+    with app.app_context():
+        total = rebuild_student_stats()
+        print(f"Estatísticas recalculadas para {total} estudantes.")
+
+
+@app.cli.command("rebuild-telemetry-metrics")
+def rebuild_telemetry_metrics_command():
+    """Recompute telemetry session_metrics and rollups from the raw cognitive_events."""
+    if telemetry_service is None:
+        raise click.ClickException("Telemetria indisponível")
+    print(f"Métricas de telemetria recalculadas: {telemetry_service.rebuild_session_metrics()} linhas.")
+    print(f"Agregados de telemetria recalculados: {telemetry_service.rebuild_rollups()} baldes.")
+
+
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        create_schema()
         if not IS_PRODUCTION:
             seed_activities()
     app.run(debug=APP_ENV == "development", port=int(os.getenv("PORT", "5000")))
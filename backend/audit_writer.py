@@ -0,0 +1,193 @@
+"""Buffered, spool-backed writer for audit records.
+
+Each worker process keeps audit records in memory and hands them to a bulk
+``sink`` every ``flush_records`` records or ``flush_interval_ms``
+milliseconds, whichever comes first. Every record is also appended to a
+per-process spool file before ``append`` returns, so records buffered by a
+worker that crashes are written by the next worker that starts. Delivery is
+at-least-once: a crash between the sink's commit and the spool cleanup
+replays that batch.
+
+The spool is flushed to the OS but not fsynced, so it survives a crash of
+the worker process, not of the host: records buffered when the machine
+loses power are lost.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+
+logger = logging.getLogger(__name__)
+
+Sink = Callable[[list[dict[str, Any]]], None]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_spool(path: Path) -> list[dict[str, Any]]:
+    records = []
+    with path.open("r", encoding="utf-8") as spool:
+        for line in spool:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; everything before it is intact.
+                logger.warning("Linha inválida ignorada no spool de auditoria %s", path)
+    return records
+
+
+class AuditBuffer:
+    """Per-process audit buffer with a background flusher.
+
+    The flusher thread starts on the first ``append`` in each process, so a
+    buffer created before a pre-fork server forks still works in the workers.
+    """
+
+    def __init__(self, sink: Sink, spool_dir: str | os.PathLike, flush_records: int = 200, flush_interval_ms: int = 500):
+        self.sink = sink
+        self.spool_dir = Path(spool_dir)
+        self.flush_records = max(1, flush_records)
+        self.flush_interval = max(1, flush_interval_ms) / 1000
+        self._records: list[dict[str, Any]] = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._spool = None
+        self._pid = None
+        self._thread = None
+        self._stopping = False
+        self._sequence = 0
+        self._failed = False
+
+    @property
+    def spool_path(self) -> Path:
+        return self.spool_dir / f"audit-{os.getpid()}.ndjson"
+
+    def _ensure_started(self) -> None:
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._records = []
+        self._spool = None
+        self._stopping = False
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._condition:
+            self._ensure_started()
+            if self._spool is None:
+                self._spool = self.spool_path.open("a", encoding="utf-8")
+            self._spool.write(line)
+            self._spool.flush()
+            self._records.append(record)
+            if len(self._records) >= self.flush_records:
+                self._condition.notify()
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._records) if self._pid == os.getpid() else 0
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of records written."""
+        with self._flush_lock:
+            with self._condition:
+                if self._pid != os.getpid() or not self._records:
+                    return 0
+                records, self._records = self._records, []
+                self._spool.close()
+                self._spool = None
+                self._sequence += 1
+                batch = self.spool_path.with_suffix(f".{self._sequence}.flushing")
+                self.spool_path.rename(batch)
+            try:
+                self.sink(records)
+            except Exception:
+                # The batch file stays on disk and is replayed by recover().
+                logger.exception("Falha ao gravar %s eventos de auditoria; mantidos em %s", len(records), batch)
+                self._failed = True
+                return 0
+            batch.unlink()
+            if self._failed:
+                self.recover()
+            return len(records)
+
+    def recover(self, include_own: bool = True) -> int:
+        """Replay spool files left by dead processes and, unless ``include_own`` is
+        false, batches this process failed to flush."""
+        if not self.spool_dir.is_dir():
+            return 0
+        recovered = 0
+        failed = False
+        for path in sorted(self.spool_dir.iterdir()):
+            prefix, _, rest = path.name.partition("-")
+            pid = rest.split("-" if prefix == "recovering" else ".", 1)[0]
+            if prefix not in {"audit", "recovering"} or not pid.isdigit() or path == self.spool_path:
+                continue
+            if int(pid) == os.getpid() and not include_own:
+                continue
+            if int(pid) != os.getpid() and _pid_alive(int(pid)):
+                continue
+            claimed = path if prefix == "recovering" and int(pid) == os.getpid() else path.with_name(f"recovering-{os.getpid()}-{path.name}")
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue  # Another worker claimed it first.
+            records = _read_spool(claimed)
+            if records:
+                try:
+                    self.sink(records)
+                except Exception:
+                    # The claimed file stays on disk; this process retries it on the next recover().
+                    logger.exception("Falha ao regravar %s eventos de auditoria de %s", len(records), claimed)
+                    failed = True
+                    continue
+            claimed.unlink()
+            recovered += len(records)
+        if include_own:
+            self._failed = failed
+        elif failed:
+            self._failed = True
+        return recovered
+
+    def close(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread() and self._pid == os.getpid():
+            thread.join(timeout=self.flush_interval * 4)
+        self.flush()
+
+    def _run(self) -> None:
+        try:
+            self.recover(include_own=False)
+        except Exception:
+            logger.exception("Falha ao recuperar spool de auditoria em %s", self.spool_dir)
+        while True:
+            with self._condition:
+                if not self._stopping and len(self._records) < self.flush_records:
+                    self._condition.wait(self.flush_interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                # Keep the flusher alive; the records stay buffered and spooled for the next pass.
+                logger.exception("Falha no gravador de auditoria")
+            if stopping:
+                return
@@ -0,0 +1,191 @@
+"""Storage maintenance for the append-only ``game_events`` table.
+
+On PostgreSQL the table can be range-partitioned by month on ``ocorrido_em``:
+retention becomes a metadata operation (DROP or DETACH PARTITION) instead of a
+DELETE over years of rows, and the hot partition keeps small indexes. Rows that
+arrive before their month's partition exists land in the DEFAULT partition; they
+are moved into the partition when it is created and deleted by date on
+retention. SQLite, used in development, keeps the plain table and falls back to
+a DELETE by date.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, bindparam, text
+from sqlalchemy.engine import Connection
+
+
+UTC = timezone.utc
+TABLE_NAME = "game_events"
+ARCHIVE_TABLE_NAME = "game_events_archive"
+DEFAULT_PARTITION = "game_events_default"
+PARTITION_PATTERN = re.compile(r"^game_events_p(\d{4})_(\d{2})$")
+
+# Mirrors the GameEvent model. The primary key must include the partition key.
+PARTITIONED_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS game_events (
+    id BIGSERIAL NOT NULL,
+    session_id INTEGER NOT NULL REFERENCES game_sessions (id) ON DELETE CASCADE,
+    tipo VARCHAR(60) NOT NULL,
+    payload_json JSON NOT NULL,
+    ocorrido_em TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id, ocorrido_em)
+) PARTITION BY RANGE (ocorrido_em)
+"""
+
+# Typed so the cutoff is rendered exactly like the ORM stores ``ocorrido_em``.
+_CUTOFF = bindparam("cutoff", type_=DateTime(timezone=True))
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(UTC) if moment.tzinfo else moment.replace(tzinfo=UTC)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE_NAME}_p{month.year:04d}_{month.month:02d}"
+
+
+@dataclass
+class MaintenanceReport:
+    created: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    archived: list[str] = field(default_factory=list)
+    deleted_rows: int = 0
+
+
+class GameEventStorage:
+    """Creates future partitions and enforces retention for ``game_events``.
+
+    ``retention_months`` of zero keeps every row. All statements run on the
+    given connection; the caller owns the transaction.
+    """
+
+    def __init__(self, connection: Connection, retention_months: int = 0, partitions_ahead: int = 3):
+        self.connection = connection
+        self.retention_months = max(0, retention_months)
+        self.partitions_ahead = max(0, partitions_ahead)
+
+    @property
+    def is_postgresql(self) -> bool:
+        return self.connection.dialect.name == "postgresql"
+
+    def is_partitioned(self) -> bool:
+        if not self.is_postgresql:
+            return False
+        kind = self.connection.execute(
+            text("SELECT c.relkind FROM pg_class c WHERE c.oid = to_regclass(:name)"),
+            {"name": TABLE_NAME},
+        ).scalar()
+        return kind == "p"
+
+    def create_partitioned_table(self, now: datetime | None = None) -> list[str]:
+        if not self.is_postgresql:
+            raise RuntimeError("Particionamento de game_events requer PostgreSQL")
+        self.connection.execute(text(PARTITIONED_TABLE_DDL))
+        self.connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE_NAME} DEFAULT"))
+        self.connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_game_events_session_id ON {TABLE_NAME} (session_id)"))
+        return self.ensure_partitions(now)
+
+    def partitions(self) -> dict[datetime, str]:
+        rows = self.connection.execute(text(
+            "SELECT child.relname FROM pg_inherits inh "
+            "JOIN pg_class child ON child.oid = inh.inhrelid "
+            "WHERE inh.inhparent = to_regclass(:name)"
+        ), {"name": TABLE_NAME}).scalars()
+        found = {}
+        for name in rows:
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                found[datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=UTC)] = name
+        return found
+
+    def ensure_partitions(self, now: datetime | None = None) -> list[str]:
+        """Create the current month's partition and ``partitions_ahead`` future ones."""
+        current = month_start(now or datetime.now(UTC))
+        existing = self.partitions()
+        created = []
+        for offset in range(self.partitions_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            self._create_partition(month)
+            created.append(partition_name(month))
+        return created
+
+    def _create_partition(self, month: datetime) -> None:
+        """Create ``month``'s partition, first moving its rows out of the DEFAULT partition.
+
+        PostgreSQL refuses to create a partition while the DEFAULT partition
+        holds rows in its range, so those rows go into a standalone table that
+        is then attached.
+        """
+        name = partition_name(month)
+        bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        in_range = "ocorrido_em >= :start AND ocorrido_em < :end"
+        params = {"start": month, "end": add_months(month, 1)}
+        stranded = self.connection.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"), params
+        ).scalar()
+        if not stranded:
+            self.connection.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE_NAME} FOR VALUES {bounds}"))
+            return
+        self.connection.execute(text(f"CREATE TABLE {name} (LIKE {TABLE_NAME} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        self.connection.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"), params)
+        self.connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), params)
+        self.connection.execute(text(f"ALTER TABLE {TABLE_NAME} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+
+    def retention_cutoff(self, now: datetime | None = None) -> datetime | None:
+        if not self.retention_months:
+            return None
+        return add_months(month_start(now or datetime.now(UTC)), -self.retention_months)
+
+    def apply_retention(self, now: datetime | None = None, archive: bool = False) -> MaintenanceReport:
+        report = MaintenanceReport()
+        cutoff = self.retention_cutoff(now)
+        if cutoff is None:
+            return report
+        if self.is_partitioned():
+            for month, name in sorted(self.partitions().items()):
+                if add_months(month, 1) > cutoff:
+                    continue
+                if archive:
+                    self.connection.execute(text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {name}"))
+                    self.connection.execute(text(f"ALTER TABLE {name} RENAME TO {name.replace(TABLE_NAME, ARCHIVE_TABLE_NAME, 1)}"))
+                    report.archived.append(name)
+                else:
+                    self.connection.execute(text(f"DROP TABLE {name}"))
+                    report.dropped.append(name)
+            # Expired rows that never got a monthly partition
+            self._delete_before(DEFAULT_PARTITION, cutoff, archive, report)
+            return report
+        self._delete_before(TABLE_NAME, cutoff, archive, report)
+        return report
+
+    def _delete_before(self, table: str, cutoff: datetime, archive: bool, report: MaintenanceReport) -> None:
+        if archive:
+            self.connection.execute(text(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE_NAME} AS SELECT * FROM {table} WHERE 1 = 0"))
+            self.connection.execute(
+                text(f"INSERT INTO {ARCHIVE_TABLE_NAME} SELECT * FROM {table} WHERE ocorrido_em < :cutoff").bindparams(_CUTOFF),
+                {"cutoff": cutoff},
+            )
+            report.archived.append(ARCHIVE_TABLE_NAME)
+        report.deleted_rows += self.connection.execute(
+            text(f"DELETE FROM {table} WHERE ocorrido_em < :cutoff").bindparams(_CUTOFF),
+            {"cutoff": cutoff},
+        ).rowcount
+
+    def maintain(self, now: datetime | None = None, archive: bool = False) -> MaintenanceReport:
+        created = self.ensure_partitions(now) if self.is_partitioned() else []
+        report = self.apply_retention(now, archive=archive)
+        report.created = created
+        return report
@@ -3,22 +3,580 @@ Serviço de Telemetria para NeuroPlay 2.0
 Processa e armazena dados de performance cognitiva
 """
 
-from datetime import datetime
-from typing import List, Dict, Any
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+EVENT_FIELDS = ('session_id', 'user_id', 'game_module', 'event_type', 'timestamp')
+
+# Códigos inteiros dos tipos de evento conhecidos; 0 para os demais, cujo nome
+# continua em ``event_type``. Códigos publicados não podem mudar.
+EVENT_CODES = {
+    'session_start': 1,
+    'session_end': 2,
+    'go_nogo_response': 3,
+    'math_solve': 4,
+}
+GO_NOGO = EVENT_CODES['go_nogo_response']
+MATH = EVENT_CODES['math_solve']
+
+INSERT_EVENT_SQL = """
+    INSERT INTO cognitive_events (
+        session_id,
+        user_id,
+        game_module,
+        event_type,
+        event_code,
+        timestamp,
+        was_correct,
+        reaction_time_ms,
+        event_data
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_SESSION_METRICS_SQL = """
+    INSERT INTO session_metrics (
+        session_id, event_type, user_id, game_module, events, correct,
+        reaction_time_sum, reaction_time_count, first_at, last_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (session_id, event_type) DO UPDATE SET
+        user_id = COALESCE(session_metrics.user_id, excluded.user_id),
+        game_module = COALESCE(session_metrics.game_module, excluded.game_module),
+        events = session_metrics.events + excluded.events,
+        correct = session_metrics.correct + excluded.correct,
+        reaction_time_sum = session_metrics.reaction_time_sum + excluded.reaction_time_sum,
+        reaction_time_count = session_metrics.reaction_time_count + excluded.reaction_time_count,
+        first_at = MIN(session_metrics.first_at, excluded.first_at),
+        last_at = MAX(session_metrics.last_at, excluded.last_at)
+"""
+
+# Mesmas regras de ``_session_metric_rows``, aplicadas aos eventos brutos.
+SESSION_METRICS_BACKFILL_SQL = """
+    INSERT INTO session_metrics (
+        session_id, event_type, user_id, game_module, events, correct,
+        reaction_time_sum, reaction_time_count, first_at, last_at
+    )
+    SELECT
+        session_id,
+        COALESCE(event_type, ''),
+        MIN(user_id),
+        MIN(game_module),
+        COUNT(*),
+        COALESCE(SUM(was_correct), 0),
+        COALESCE(SUM(CASE WHEN reaction_time_ms > 0 THEN reaction_time_ms END), 0),
+        COALESCE(SUM(reaction_time_ms > 0), 0),
+        MIN(timestamp),
+        MAX(timestamp)
+    FROM cognitive_events
+    WHERE session_id IS NOT NULL
+    GROUP BY session_id, COALESCE(event_type, '')
+"""
+
+# Grãos das agregações por módulo, do mais grosso ao mais fino: nome,
+# formato do início do balde (UTC) e duração em segundos.
+ROLLUP_GRAINS: Tuple[Tuple[str, str, int], ...] = (
+    ('day', '%Y-%m-%d 00:00:00', 86400),
+    ('hour', '%Y-%m-%d %H:00:00', 3600),
+    ('minute', '%Y-%m-%d %H:%M:00', 60),
+)
+
+UPSERT_ROLLUPS_SQL = """
+    INSERT INTO telemetry_rollups (
+        grain, game_module, bucket_start, events, correct, incorrect,
+        reaction_time_count, reaction_time_sum, reaction_time_sumsq,
+        reaction_time_min, reaction_time_max
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (grain, game_module, bucket_start) DO UPDATE SET
+        events = telemetry_rollups.events + excluded.events,
+        correct = telemetry_rollups.correct + excluded.correct,
+        incorrect = telemetry_rollups.incorrect + excluded.incorrect,
+        reaction_time_count = telemetry_rollups.reaction_time_count + excluded.reaction_time_count,
+        reaction_time_sum = telemetry_rollups.reaction_time_sum + excluded.reaction_time_sum,
+        reaction_time_sumsq = telemetry_rollups.reaction_time_sumsq + excluded.reaction_time_sumsq,
+        reaction_time_min = COALESCE(MIN(telemetry_rollups.reaction_time_min, excluded.reaction_time_min),
+                                     telemetry_rollups.reaction_time_min, excluded.reaction_time_min),
+        reaction_time_max = COALESCE(MAX(telemetry_rollups.reaction_time_max, excluded.reaction_time_max),
+                                     telemetry_rollups.reaction_time_max, excluded.reaction_time_max)
+"""
+
+# Mesmas regras de ``_rollup_rows``; eventos com timestamp ilegível ficam de fora.
+# ``utc_strftime`` (registrada em toda conexão) interpreta o timestamp
+# como ``_parse_timestamp``: o ``strftime`` do SQLite recusa offsets sem ``:``
+# e aceita formatos diferentes dos da ingestão.
+ROLLUPS_BACKFILL_SQL = """
+    INSERT INTO telemetry_rollups (
+        grain, game_module, bucket_start, events, correct, incorrect,
+        reaction_time_count, reaction_time_sum, reaction_time_sumsq,
+        reaction_time_min, reaction_time_max
+    )
+    SELECT
+        grains.grain,
+        COALESCE(events.game_module, ''),
+        utc_strftime(grains.format, events.timestamp) AS bucket_start,
+        COUNT(*),
+        COALESCE(SUM(events.was_correct = 1), 0),
+        COALESCE(SUM(events.was_correct = 0), 0),
+        COALESCE(SUM(events.reaction_time_ms > 0), 0),
+        COALESCE(SUM(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms END), 0),
+        COALESCE(SUM(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms * events.reaction_time_ms END), 0),
+        MIN(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms END),
+        MAX(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms END)
+    FROM cognitive_events AS events
+    CROSS JOIN (
+        SELECT 'day' AS grain, '%Y-%m-%d 00:00:00' AS format
+        UNION ALL SELECT 'hour', '%Y-%m-%d %H:00:00'
+        UNION ALL SELECT 'minute', '%Y-%m-%d %H:%M:00'
+    ) AS grains
+    WHERE bucket_start IS NOT NULL
+    GROUP BY grains.grain, COALESCE(events.game_module, ''), bucket_start
+"""
+
+# Métricas por sessão num único GROUP BY sobre as colunas tipadas, com a
+# mesma semântica de ``_session_metric_rows``.
+PROGRESS_SQL = f"""
+    SELECT
+        session_id,
+        COUNT(*) AS total_events,
+        MIN(timestamp) AS start_time,
+        MAX(timestamp) AS end_time,
+        SUM(event_code = {GO_NOGO}) AS go_nogo_total,
+        SUM(event_code = {GO_NOGO} AND was_correct = 1) AS go_nogo_correct,
+        AVG(CASE WHEN event_code = {GO_NOGO} AND reaction_time_ms > 0 THEN reaction_time_ms END) AS go_nogo_reaction,
+        SUM(event_code = {MATH}) AS math_total,
+        SUM(event_code = {MATH} AND was_correct = 1) AS math_correct,
+        AVG(CASE WHEN event_code = {MATH} AND reaction_time_ms > 0 THEN reaction_time_ms END) AS math_reaction
+    FROM cognitive_events
+    WHERE user_id = ? AND game_module = ?
+    GROUP BY session_id
+    ORDER BY start_time, session_id
+"""
+
+
+# Migrações do esquema, em ordem. Cada versão é aplicada uma única vez e
+# registrada em ``telemetry_schema_version``; nunca edite uma versão publicada.
+MIGRATIONS: List[Tuple[int, List[str]]] = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS cognitive_events (
+            id INTEGER PRIMARY KEY,
+            session_id TEXT,
+            game_module TEXT,
+            event_type TEXT,
+            timestamp TEXT NOT NULL,
+            event_data TEXT NOT NULL DEFAULT '{}'
+        )
+        """,
+        # Resumo da sessão: busca por sessão já na ordem de timestamp
+        'CREATE INDEX IF NOT EXISTS ix_cognitive_events_session_time ON cognitive_events (session_id, timestamp)',
+        # Progresso por módulo: sessões distintas lidas só do índice
+        'CREATE INDEX IF NOT EXISTS ix_cognitive_events_module_session ON cognitive_events (game_module, session_id)',
+    ]),
+    (2, [
+        'ALTER TABLE cognitive_events ADD COLUMN user_id INTEGER',
+        # Progresso do usuário: as linhas de cada sessão chegam agrupadas
+        'CREATE INDEX IF NOT EXISTS ix_cognitive_events_user_module_session ON cognitive_events (user_id, game_module, session_id)',
+    ]),
+    (3, [
+        # Totais por sessão e família de evento, mantidos na ingestão
+        """
+        CREATE TABLE IF NOT EXISTS session_metrics (
+            session_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            user_id INTEGER,
+            game_module TEXT,
+            events INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            reaction_time_sum REAL NOT NULL,
+            reaction_time_count INTEGER NOT NULL,
+            first_at TEXT NOT NULL,
+            last_at TEXT NOT NULL,
+            PRIMARY KEY (session_id, event_type)
+        ) WITHOUT ROWID
+        """,
+        # Cópia congelada do backfill da época, quando as métricas ainda estavam no JSON
+        """
+        INSERT INTO session_metrics (
+            session_id, event_type, user_id, game_module, events, correct,
+            reaction_time_sum, reaction_time_count, first_at, last_at
+        )
+        SELECT
+            session_id,
+            COALESCE(event_type, ''),
+            MIN(user_id),
+            MIN(game_module),
+            COUNT(*),
+            SUM(COALESCE(json_extract(event_data, '$.was_correct'), 0) NOT IN (0, '')),
+            COALESCE(SUM(CASE WHEN json_type(event_data, '$.reaction_time_ms') IN ('integer', 'real')
+                              AND json_extract(event_data, '$.reaction_time_ms') > 0
+                         THEN json_extract(event_data, '$.reaction_time_ms') END), 0),
+            COALESCE(SUM(json_type(event_data, '$.reaction_time_ms') IN ('integer', 'real')
+                         AND json_extract(event_data, '$.reaction_time_ms') > 0), 0),
+            MIN(timestamp),
+            MAX(timestamp)
+        FROM cognitive_events
+        WHERE session_id IS NOT NULL
+        GROUP BY session_id, COALESCE(event_type, '')
+        """,
+    ]),
+    (4, [
+        # Campos quentes tipados; o JSON guarda só o restante do evento
+        'ALTER TABLE cognitive_events ADD COLUMN event_code INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE cognitive_events ADD COLUMN was_correct INTEGER',
+        'ALTER TABLE cognitive_events ADD COLUMN reaction_time_ms REAL',
+        """
+        UPDATE cognitive_events SET
+            event_code = CASE event_type
+                WHEN 'session_start' THEN 1
+                WHEN 'session_end' THEN 2
+                WHEN 'go_nogo_response' THEN 3
+                WHEN 'math_solve' THEN 4
+                ELSE 0
+            END,
+            was_correct = CASE
+                WHEN json_type(event_data, '$.was_correct') IS NULL THEN NULL
+                WHEN COALESCE(json_extract(event_data, '$.was_correct'), 0) NOT IN (0, '') THEN 1
+                ELSE 0
+            END,
+            reaction_time_ms = CASE
+                WHEN json_type(event_data, '$.reaction_time_ms') IN ('integer', 'real')
+                THEN json_extract(event_data, '$.reaction_time_ms')
+            END
+        """,
+        """
+        UPDATE cognitive_events SET event_data = json_remove(event_data, '$.was_correct')
+        WHERE json_type(event_data, '$.was_correct') IN ('true', 'false')
+        """,
+        """
+        UPDATE cognitive_events SET event_data = json_remove(event_data, '$.reaction_time_ms')
+        WHERE json_type(event_data, '$.reaction_time_ms') IN ('integer', 'real')
+        """,
+    ]),
+    (5, [
+        # Até onde cada exportação incremental já foi (por id de evento)
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_export_watermarks (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            exported_at TEXT NOT NULL
+        )
+        """,
+    ]),
+    (6, [
+        # Agregados por módulo e balde de tempo para os painéis
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_rollups (
+            grain TEXT NOT NULL,
+            game_module TEXT NOT NULL,
+            bucket_start TEXT NOT NULL,
+            events INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            incorrect INTEGER NOT NULL,
+            reaction_time_count INTEGER NOT NULL,
+            reaction_time_sum REAL NOT NULL,
+            reaction_time_sumsq REAL NOT NULL,
+            reaction_time_min REAL,
+            reaction_time_max REAL,
+            PRIMARY KEY (grain, game_module, bucket_start)
+        ) WITHOUT ROWID
+        """,
+        # Cópia congelada do backfill de ``rebuild_rollups`` nesta versão (usa ``utc_strftime``)
+        """
+        INSERT INTO telemetry_rollups (
+            grain, game_module, bucket_start, events, correct, incorrect,
+            reaction_time_count, reaction_time_sum, reaction_time_sumsq,
+            reaction_time_min, reaction_time_max
+        )
+        SELECT
+            grains.grain,
+            COALESCE(events.game_module, ''),
+            utc_strftime(grains.format, events.timestamp) AS bucket_start,
+            COUNT(*),
+            COALESCE(SUM(events.was_correct = 1), 0),
+            COALESCE(SUM(events.was_correct = 0), 0),
+            COALESCE(SUM(events.reaction_time_ms > 0), 0),
+            COALESCE(SUM(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms END), 0),
+            COALESCE(SUM(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms * events.reaction_time_ms END), 0),
+            MIN(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms END),
+            MAX(CASE WHEN events.reaction_time_ms > 0 THEN events.reaction_time_ms END)
+        FROM cognitive_events AS events
+        CROSS JOIN (
+            SELECT 'day' AS grain, '%Y-%m-%d 00:00:00' AS format
+            UNION ALL SELECT 'hour', '%Y-%m-%d %H:00:00'
+            UNION ALL SELECT 'minute', '%Y-%m-%d %H:%M:00'
+        ) AS grains
+        WHERE bucket_start IS NOT NULL
+        GROUP BY grains.grain, COALESCE(events.game_module, ''), bucket_start
+        """,
+    ]),
+]
+
+EXPORT_COLUMNS = (
+    'id', 'session_id', 'user_id', 'game_module', 'event_type', 'event_code',
+    'timestamp', 'was_correct', 'reaction_time_ms', 'event_data'
+)
+DICTIONARY_COLUMNS = ('session_id', 'game_module', 'event_type')
+DAY_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:  # pragma: no cover - depende do ambiente
+        raise RuntimeError('Exportação Parquet requer o pacote pyarrow') from exc
+    return pyarrow, pyarrow.parquet
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    try:
+        moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _utc_strftime(time_format: str, timestamp) -> Optional[str]:
+    """``timestamp`` convertido para UTC e formatado; None se ilegível"""
+    moment = _parse_timestamp(timestamp)
+    return None if moment is None else moment.astimezone(timezone.utc).strftime(time_format)
+
+
+def register_sql_functions(connection):
+    """
+    Registra ``utc_strftime`` na conexão, para que o SQL agrupe e ordene por
+    timestamp com as mesmas regras de ``_parse_timestamp``
+    """
+    if isinstance(connection, sqlite3.Connection):
+        connection.create_function('utc_strftime', 2, _utc_strftime, deterministic=True)
+    return connection
+
+
+def configure_sqlite(connection, synchronous: str = 'NORMAL'):
+    """
+    Ajusta uma conexão SQLite para ingestão em lote
+
+    WAL permite leituras durante a escrita; com ``synchronous=NORMAL`` o
+    fsync acontece nos checkpoints e não a cada commit, sem risco de
+    corrupção (apenas as últimas transações podem se perder numa queda de
+    energia).
+    """
+    if isinstance(connection, sqlite3.Connection):
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(f'PRAGMA synchronous={synchronous}')
+        register_sql_functions(connection)
+    return connection
+
+
+class SingleConnection:
+    """
+    Adapta uma conexão já aberta à interface de ``SQLiteConnections``
+
+    Leituras e escritas compartilham a conexão, serializadas por um lock.
+    Útil para testes e bancos ``:memory:``.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            yield self.connection
+
+    reader = writer
+
+    def close(self):
+        self.connection.close()
+
+
+class SQLiteConnections:
+    """
+    Conexões SQLite seguras para threads e para fork
+
+    Há uma conexão de escrita por processo, protegida por um lock (o SQLite
+    aceita um escritor por vez de qualquer forma), e conexões somente
+    leitura emprestadas de um pool: cada leitura usa uma conexão exclusiva e
+    a devolve ao final, e no máximo ``max_idle_readers`` ficam abertas sem
+    uso, então threads que terminam não deixam conexões para trás. Com WAL,
+    as leituras não esperam a escrita. Todas são abertas sob demanda e
+    reabertas quando o PID muda, então um objeto criado antes do fork do
+    gunicorn nunca compartilha handles com os workers.
+    """
+
+    def __init__(self, path: str, synchronous: str = 'NORMAL', busy_timeout_ms: int = 5000, max_idle_readers: int = 4):
+        if path == ':memory:':
+            raise ValueError('Use SingleConnection para bancos em memória')
+        self.path = path
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self._pid = None
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self.max_idle_readers = max(0, max_idle_readers)
+        self._idle_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        connection.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        return register_sql_functions(connection)
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # Handles herdados do processo pai não são fechados: pertencem a ele.
+            self._pid = os.getpid()
+            self._writer = None
+            self._write_lock = threading.RLock()
+            self._idle_readers = []
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        self._check_fork()
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = configure_sqlite(self._open(), self.synchronous)
+            yield self._writer
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        self._check_fork()
+        pid = self._pid
+        with self._readers_lock:
+            connection = self._idle_readers.pop() if self._idle_readers else None
+        if connection is None:
+            connection = self._open()
+            connection.execute('PRAGMA query_only=ON')
+        try:
+            yield connection
+        finally:
+            if pid == os.getpid():
+                with self._readers_lock:
+                    if len(self._idle_readers) < self.max_idle_readers:
+                        self._idle_readers.append(connection)
+                        connection = None
+                if connection is not None:
+                    connection.close()
+
+    def close(self):
+        self._check_fork()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for connection in self._idle_readers:
+                connection.close()
+            self._idle_readers = []
+
 
 class TelemetryService:
     """
     Gerencia coleta e análise de telemetria dos jogos
     """
     
-    def __init__(self, db_connection):
-        self.db = db_connection
+    def __init__(self, db_connection, synchronous: str = 'NORMAL'):
+        """
+        Args:
+            db_connection: Conexão SQLite aberta ou um gerenciador como ``SQLiteConnections``
+            synchronous: Nível de ``PRAGMA synchronous`` para a conexão aberta
+        """
+        if synchronous.upper() not in {'OFF', 'NORMAL', 'FULL', 'EXTRA'}:
+            raise ValueError(f'synchronous inválido: {synchronous}')
+        if isinstance(db_connection, sqlite3.Connection):
+            db_connection = SingleConnection(configure_sqlite(db_connection, synchronous.upper()))
+        self.connections = db_connection
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+    
+    @classmethod
+    def from_path(cls, path: str, synchronous: str = 'NORMAL', busy_timeout_ms: int = 5000) -> 'TelemetryService':
+        """
+        Cria o serviço sobre um arquivo SQLite com conexões abertas sob demanda
+        """
+        if synchronous.upper() not in {'OFF', 'NORMAL', 'FULL', 'EXTRA'}:
+            raise ValueError(f'synchronous inválido: {synchronous}')
+        return cls(SQLiteConnections(path, synchronous.upper(), busy_timeout_ms))
+    
+    def migrate(self) -> List[int]:
+        """
+        Aplica as migrações pendentes de ``MIGRATIONS``
+        
+        Idempotente e seguro entre processos: ``BEGIN IMMEDIATE`` serializa
+        workers que iniciam juntos, e cada um relê a versão dentro da
+        transação.
+        
+        Returns:
+            Versões aplicadas nesta chamada
+        """
+        with self.connections.writer() as db:
+            if db.in_transaction:
+                db.commit()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                db.execute("""
+                    CREATE TABLE IF NOT EXISTS telemetry_schema_version (
+                        version INTEGER PRIMARY KEY,
+                        applied_at TEXT NOT NULL
+                    )
+                """)
+                current = db.execute('SELECT COALESCE(MAX(version), 0) FROM telemetry_schema_version').fetchone()[0]
+                applied = []
+                for version, statements in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    for statement in statements:
+                        db.execute(statement)
+                    db.execute(
+                        'INSERT INTO telemetry_schema_version (version, applied_at) VALUES (?, ?)',
+                        (version, datetime.utcnow().isoformat())
+                    )
+                    applied.append(version)
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+        self._schema_ready = True
+        return applied
+    
+    def ensure_schema(self):
+        """
+        Roda ``migrate`` uma vez por instância, antes do primeiro acesso
+        """
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self.migrate()
+    
+    def _writer(self):
+        self.ensure_schema()
+        return self.connections.writer()
+    
+    def _reader(self):
+        self.ensure_schema()
+        return self.connections.reader()
     
     def process_batch(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Processa lote de eventos de telemetria
         
+        Todos os eventos válidos são gravados com ``executemany`` numa única
+        transação. Eventos malformados são rejeitados antes da escrita; se o
+        banco recusar alguma linha, o lote é regravado com um savepoint por
+        evento para que apenas as linhas recusadas sejam reportadas.
+        
         Args:
             events: Lista de eventos com dados de performance
             
@@ -26,22 +584,12 @@ class TelemetryService:
             Resultado do processamento
         """
         try:
-            processed_count = 0
-            errors = []
-            
-            for event in events:
-                try:
-                    self._store_event(event)
-                    processed_count += 1
-                except Exception as e:
-                    errors.append({
-                        'event': event,
-                        'error': str(e)
-                    })
+            rows, accepted, errors = self.validate_events(events)
+            errors.extend(self._insert_rows(rows, accepted))
             
             return {
                 'success': True,
-                'processed': processed_count,
+                'processed': len(events) - len(errors),
                 'total': len(events),
                 'errors': errors
             }
@@ -52,152 +600,463 @@ class TelemetryService:
                 'error': str(e)
             }
     
-    def _store_event(self, event: Dict[str, Any]):
+    def write_rows(self, rows: List[Tuple], events: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Armazena evento individual no banco
+        Grava linhas já produzidas por ``validate_events``, sem validá-las de novo
+        
+        Args:
+            rows: Linhas de ``cognitive_events``
+            events: Eventos correspondentes, para reportar os recusados pelo banco
+            
+        Returns:
+            Resultado no mesmo formato de ``process_batch``
         """
-        cursor = self.db.cursor()
+        try:
+            errors = self._insert_rows(rows, events)
+            return {
+                'success': True,
+                'processed': len(rows) - len(errors),
+                'total': len(rows),
+                'errors': errors
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def validate_events(self, events: List[Dict[str, Any]]) -> Tuple[List[Tuple], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Converte os eventos em linhas sem tocar no banco
         
-        # Extrai dados do evento
-        session_id = event.get('session_id')
-        game_module = event.get('game_module')
-        event_type = event.get('event_type')
-        timestamp = event.get('timestamp', datetime.utcnow().isoformat())
+        Timestamps ausentes recebem o instante da validação.
+        
+        Returns:
+            Linhas válidas, os eventos correspondentes e os erros dos rejeitados
+        """
+        rows = []
+        accepted = []
+        errors = []
+        
+        for event in events:
+            try:
+                rows.append(self._event_row(event))
+                accepted.append(event)
+            except (TypeError, ValueError) as e:
+                errors.append({
+                    'event': event,
+                    'error': str(e)
+                })
+        
+        return rows, accepted, errors
+    
+    @staticmethod
+    def _event_row(event: Dict[str, Any]) -> Tuple:
+        """
+        Valida um evento e o converte na linha de ``cognitive_events``
+        """
+        if not isinstance(event, dict):
+            raise TypeError('Evento deve ser um objeto')
         
         # Dados específicos do evento
         event_data = {
             k: v for k, v in event.items()
-            if k not in ['session_id', 'game_module', 'event_type', 'timestamp']
+            if k not in EVENT_FIELDS
         }
         
-        # Insere no banco
-        cursor.execute("""
-            INSERT INTO cognitive_events (
-                session_id,
-                game_module,
-                event_type,
-                timestamp,
-                event_data
-            ) VALUES (?, ?, ?, ?, ?)
-        """, (
-            session_id,
-            game_module,
+        # Campos quentes vão para colunas tipadas; valores de tipo inesperado
+        # continuam também no JSON para não perder informação
+        was_correct = None
+        if 'was_correct' in event_data:
+            was_correct = 1 if event_data['was_correct'] else 0
+            if isinstance(event_data['was_correct'], bool):
+                del event_data['was_correct']
+        
+        reaction_time_ms = event_data.get('reaction_time_ms')
+        if isinstance(reaction_time_ms, (int, float)) and not isinstance(reaction_time_ms, bool):
+            del event_data['reaction_time_ms']
+        else:
+            reaction_time_ms = None
+        
+        event_type = event.get('event_type')
+        return (
+            event.get('session_id'),
+            event.get('user_id'),
+            event.get('game_module'),
             event_type,
-            timestamp,
+            EVENT_CODES.get(event_type, 0),
+            event.get('timestamp', datetime.utcnow().isoformat()),
+            was_correct,
+            reaction_time_ms,
             json.dumps(event_data)
-        ))
+        )
+    
+    def _insert_rows(self, rows: List[Tuple], events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Grava as linhas numa transação; retorna os eventos recusados pelo banco
+        """
+        if not rows:
+            return []
         
-        self.db.commit()
+        with self._writer() as db:
+            try:
+                with db:
+                    db.executemany(INSERT_EVENT_SQL, rows)
+                    db.executemany(UPSERT_SESSION_METRICS_SQL, self._session_metric_rows(rows))
+                    db.executemany(UPSERT_ROLLUPS_SQL, self._rollup_rows(rows))
+                return []
+            except sqlite3.Error:
+                pass
+            
+            # Alguma linha foi recusada: regrava isolando cada evento num savepoint
+            errors = []
+            with db:
+                cursor = db.cursor()
+                if not db.in_transaction:
+                    # Sem BEGIN explícito, o RELEASE do savepoint externo faria commit por evento
+                    cursor.execute('BEGIN')
+                stored_rows = []
+                for row, event in zip(rows, events):
+                    cursor.execute('SAVEPOINT telemetry_event')
+                    try:
+                        cursor.execute(INSERT_EVENT_SQL, row)
+                        stored_rows.append(row)
+                    except sqlite3.Error as e:
+                        cursor.execute('ROLLBACK TO telemetry_event')
+                        errors.append({
+                            'event': event,
+                            'error': str(e)
+                        })
+                    cursor.execute('RELEASE telemetry_event')
+                cursor.executemany(UPSERT_SESSION_METRICS_SQL, self._session_metric_rows(stored_rows))
+                cursor.executemany(UPSERT_ROLLUPS_SQL, self._rollup_rows(stored_rows))
+            return errors
     
-    def get_session_summary(self, session_id: str) -> Dict[str, Any]:
+    @staticmethod
+    def _session_metric_rows(rows: List[Tuple]) -> List[Tuple]:
         """
-        Gera resumo de uma sessão de jogo
+        Agrega um lote por (sessão, tipo de evento) para o upsert em ``session_metrics``
+        """
+        totals: Dict[Tuple[str, str], List[Any]] = {}
+        for session_id, user_id, game_module, event_type, _, timestamp, was_correct, reaction_time_ms, _ in rows:
+            if session_id is None:
+                continue
+            key = (session_id, event_type or '')
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [user_id, game_module, 0, 0, 0.0, 0, timestamp, timestamp]
+            entry[2] += 1
+            entry[3] += was_correct or 0
+            if reaction_time_ms is not None and reaction_time_ms > 0:
+                entry[4] += reaction_time_ms
+                entry[5] += 1
+            entry[6] = min(entry[6], timestamp)
+            entry[7] = max(entry[7], timestamp)
+        return [(session_id, event_type, *entry) for (session_id, event_type), entry in totals.items()]
+    
+    @staticmethod
+    def _rollup_rows(rows: List[Tuple]) -> List[Tuple]:
+        """
+        Agrega um lote por (grão, módulo, balde) para o upsert em ``telemetry_rollups``
+        """
+        totals: Dict[Tuple[str, str, str], List[Any]] = {}
+        for _, _, game_module, _, _, timestamp, was_correct, reaction_time_ms, _ in rows:
+            moment = _parse_timestamp(timestamp)
+            if moment is None:
+                continue
+            moment = moment.astimezone(timezone.utc)
+            has_reaction = reaction_time_ms is not None and reaction_time_ms > 0
+            for grain, bucket_format, _ in ROLLUP_GRAINS:
+                key = (grain, game_module or '', moment.strftime(bucket_format))
+                entry = totals.get(key)
+                if entry is None:
+                    entry = totals[key] = [0, 0, 0, 0, 0.0, 0.0, None, None]
+                entry[0] += 1
+                entry[1] += was_correct == 1
+                entry[2] += was_correct == 0
+                if has_reaction:
+                    entry[3] += 1
+                    entry[4] += reaction_time_ms
+                    entry[5] += reaction_time_ms * reaction_time_ms
+                    entry[6] = reaction_time_ms if entry[6] is None else min(entry[6], reaction_time_ms)
+                    entry[7] = reaction_time_ms if entry[7] is None else max(entry[7], reaction_time_ms)
+        return [(*key, *entry) for key, entry in totals.items()]
+    
+    def rebuild_session_metrics(self) -> int:
+        """
+        Recalcula ``session_metrics`` a partir de ``cognitive_events``
+        
+        Returns:
+            Número de linhas (sessão, tipo de evento) geradas
+        """
+        with self._writer() as db, db:
+            db.execute('DELETE FROM session_metrics')
+            db.execute(SESSION_METRICS_BACKFILL_SQL)
+            return db.execute('SELECT COUNT(*) FROM session_metrics').fetchone()[0]
+    
+    def rebuild_rollups(self) -> int:
+        """
+        Recalcula ``telemetry_rollups`` a partir de ``cognitive_events``
+        
+        Returns:
+            Número de baldes gerados, somando todos os grãos
+        """
+        with self._writer() as db, db:
+            db.execute('DELETE FROM telemetry_rollups')
+            db.execute(ROLLUPS_BACKFILL_SQL)
+            return db.execute('SELECT COUNT(*) FROM telemetry_rollups').fetchone()[0]
+    
+    def get_rollups(self, game_module: str, start, end, grain: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Série de precisão e tempo de reação de um módulo em ``[start, end)``
+        
+        Sem ``grain``, usa o grão mais grosso cujos baldes cobrem o intervalo
+        exatamente (início e fim alinhados ao grão): um intervalo de semanas
+        em dias inteiros lê uma linha por dia. Com ``grain`` explícito, o
+        intervalo é ampliado até os baldes que contêm o início e o fim, e o
+        intervalo efetivo é o devolvido em ``start``/``end``.
         
         Args:
-            session_id: ID da sessão
+            game_module: Nome do módulo
+            start: Início do intervalo (ISO 8601 ou ``datetime``; sem fuso = UTC)
+            end: Fim exclusivo do intervalo
+            grain: 'day', 'hour' ou 'minute'
             
         Returns:
-            Resumo com métricas agregadas
+            Grão usado, intervalo efetivo, um item por balde com dados e o
+            total do intervalo
         """
-        cursor = self.db.cursor()
+        start_at = start if isinstance(start, datetime) else _parse_timestamp(start)
+        end_at = end if isinstance(end, datetime) else _parse_timestamp(end)
+        if start_at is None or end_at is None:
+            raise ValueError('Intervalo inválido: use datas ISO 8601')
+        start_at = (start_at if start_at.tzinfo else start_at.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+        end_at = (end_at if end_at.tzinfo else end_at.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+        if end_at <= start_at:
+            raise ValueError('O fim do intervalo deve ser posterior ao início')
         
-        # Busca todos os eventos da sessão
-        cursor.execute("""
-            SELECT event_type, event_data, timestamp
-            FROM cognitive_events
-            WHERE session_id = ?
-            ORDER BY timestamp
-        """, (session_id,))
+        grains = {name: (bucket_format, seconds) for name, bucket_format, seconds in ROLLUP_GRAINS}
+        if grain is None:
+            grain = next((
+                name for name, _, seconds in ROLLUP_GRAINS
+                if start_at.timestamp() % seconds == 0 and end_at.timestamp() % seconds == 0
+            ), 'minute')
+        elif grain not in grains:
+            raise ValueError(f'Grão inválido: {grain}')
+        bucket_format, seconds = grains[grain]
+        start_at = datetime.strptime(start_at.strftime(bucket_format), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        end_floor = datetime.strptime(end_at.strftime(bucket_format), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        end_at = end_floor if end_floor == end_at else end_floor + timedelta(seconds=seconds)
         
-        events = cursor.fetchall()
+        with self._reader() as db:
+            rows = db.execute("""
+                SELECT bucket_start, events, correct, incorrect, reaction_time_count,
+                       reaction_time_sum, reaction_time_sumsq, reaction_time_min, reaction_time_max
+                FROM telemetry_rollups
+                WHERE grain = ? AND game_module = ? AND bucket_start >= ? AND bucket_start < ?
+                ORDER BY bucket_start
+            """, (grain, game_module, start_at.strftime(bucket_format), end_at.strftime(bucket_format))).fetchall()
         
-        if not events:
-            return {'error': 'Sessão não encontrada'}
+        buckets = [{'bucket_start': row[0], **self._rollup_summary(*row[1:])} for row in rows]
+        totals = self._rollup_summary(
+            sum(row[1] for row in rows),
+            sum(row[2] for row in rows),
+            sum(row[3] for row in rows),
+            sum(row[4] for row in rows),
+            sum(row[5] for row in rows),
+            sum(row[6] for row in rows),
+            min((row[7] for row in rows if row[7] is not None), default=None),
+            max((row[8] for row in rows if row[8] is not None), default=None),
+        )
         
-        # Processa eventos
-        summary = {
-            'session_id': session_id,
-            'total_events': len(events),
-            'start_time': events[0][2] if events else None,
-            'end_time': events[-1][2] if events else None,
-            'metrics': self._calculate_metrics(events)
+        return {
+            'game_module': game_module,
+            'grain': grain,
+            'start': start_at.isoformat(),
+            'end': end_at.isoformat(),
+            'buckets': buckets,
+            'totals': totals
         }
-        
-        return summary
     
-    def _calculate_metrics(self, events: List[tuple]) -> Dict[str, Any]:
+    @staticmethod
+    def _rollup_summary(events, correct, incorrect, count, total, sumsq, minimum, maximum) -> Dict[str, Any]:
         """
-        Calcula métricas cognitivas a partir dos eventos
+        Converte os acumuladores de um balde em precisão e estatísticas de reação
         """
-        metrics = {
-            'go_nogo': {
-                'total_responses': 0,
-                'correct_responses': 0,
-                'incorrect_responses': 0,
-                'avg_reaction_time': 0,
-                'accuracy': 0
-            },
-            'math': {
-                'total_attempts': 0,
-                'correct_answers': 0,
-                'avg_reaction_time': 0,
-                'accuracy': 0
+        mean = total / count if count else 0
+        return {
+            'events': events,
+            'correct': correct,
+            'incorrect': incorrect,
+            'accuracy': correct / (correct + incorrect) if correct + incorrect else 0,
+            'reaction_time': {
+                'count': count,
+                'mean': mean,
+                'stddev': math.sqrt(max(sumsq / count - mean * mean, 0)) if count else 0,
+                'min': minimum,
+                'max': maximum
             }
         }
+    
+    def export_parquet(self, directory: str, name: str = 'parquet', batch_rows: int = 50000) -> Dict[str, Any]:
+        """
+        Exporta eventos novos para Parquet particionado por data
         
-        go_nogo_times = []
-        math_times = []
+        Grava ``date=AAAA-MM-DD/part-<primeiro id>-<último id>.parquet`` com
+        colunas tipadas, strings em dicionário e linhas ordenadas por
+        ``(game_module, session_id, timestamp)``. Só lê eventos acima da marca
+        d'água ``name``, que avança depois que todos os arquivos foram
+        gravados; uma execução interrompida é refeita por inteiro na próxima,
+        que substitui os arquivos dela (mesmo primeiro id). Arquivos em
+        andamento começam com ``.`` e são ignorados por quem lê o conjunto.
         
-        for event_type, event_data_json, timestamp in events:
-            event_data = json.loads(event_data_json)
+        Args:
+            directory: Diretório raiz do conjunto de dados
+            name: Nome da marca d'água (uma por destino)
+            batch_rows: Linhas por row group
             
-            if event_type == 'go_nogo_response':
-                metrics['go_nogo']['total_responses'] += 1
-                
-                if event_data.get('was_correct'):
-                    metrics['go_nogo']['correct_responses'] += 1
-                else:
-                    metrics['go_nogo']['incorrect_responses'] += 1
-                
-                reaction_time = event_data.get('reaction_time_ms', 0)
-                if reaction_time > 0:
-                    go_nogo_times.append(reaction_time)
+        Returns:
+            Quantidade exportada, arquivos gerados e a nova marca d'água
+        """
+        pa, pq = _require_pyarrow()
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('session_id', pa.dictionary(pa.int32(), pa.string())),
+            ('user_id', pa.int64()),
+            ('game_module', pa.dictionary(pa.int32(), pa.string())),
+            ('event_type', pa.dictionary(pa.int32(), pa.string())),
+            ('event_code', pa.int16()),
+            ('timestamp', pa.timestamp('us', tz='UTC')),
+            ('was_correct', pa.bool_()),
+            ('reaction_time_ms', pa.float64()),
+            ('event_data', pa.string()),
+        ])
+        sorting = [pq.SortingColumn(schema.get_field_index(column)) for column in ('game_module', 'session_id', 'timestamp')]
+        
+        with self._reader() as db:
+            row = db.execute('SELECT last_id FROM telemetry_export_watermarks WHERE name = ?', (name,)).fetchone()
+            start = row[0] if row else 0
+            end = db.execute('SELECT COALESCE(MAX(id), 0) FROM cognitive_events').fetchone()[0]
+            if end <= start:
+                return {'exported': 0, 'files': [], 'watermark': start}
+            # Dia e ordem vêm do instante em UTC, o mesmo valor gravado na coluna
+            # ``timestamp``; nulos por último, como declara ``sorting_columns``
+            cursor = db.execute(f"""
+                SELECT {', '.join(EXPORT_COLUMNS)}, utc_strftime('%Y-%m-%d', timestamp) AS day
+                FROM cognitive_events
+                WHERE id > ? AND id <= ?
+                ORDER BY day, game_module IS NULL, game_module, session_id,
+                         utc_strftime('%Y-%m-%d %H:%M:%S.%f', timestamp) IS NULL,
+                         utc_strftime('%Y-%m-%d %H:%M:%S.%f', timestamp), id
+            """, (start, end))
             
-            elif event_type == 'math_solve':
-                metrics['math']['total_attempts'] += 1
-                
-                if event_data.get('was_correct'):
-                    metrics['math']['correct_answers'] += 1
-                
-                reaction_time = event_data.get('reaction_time_ms', 0)
-                if reaction_time > 0:
-                    math_times.append(reaction_time)
-        
-        # Calcula médias
-        if go_nogo_times:
-            metrics['go_nogo']['avg_reaction_time'] = sum(go_nogo_times) / len(go_nogo_times)
-        
-        if metrics['go_nogo']['total_responses'] > 0:
-            metrics['go_nogo']['accuracy'] = (
-                metrics['go_nogo']['correct_responses'] / 
-                metrics['go_nogo']['total_responses']
-            )
-        
-        if math_times:
-            metrics['math']['avg_reaction_time'] = sum(math_times) / len(math_times)
-        
-        if metrics['math']['total_attempts'] > 0:
-            metrics['math']['accuracy'] = (
-                metrics['math']['correct_answers'] / 
-                metrics['math']['total_attempts']
-            )
-        
-        return metrics
+            root = Path(directory)
+            prefix = f'part-{start + 1:012d}-'
+            for stale in root.glob(f'date=*/.{prefix}*'):
+                stale.unlink()
+            writers: Dict[str, Any] = {}
+            exported = 0
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_rows)
+                    if not rows:
+                        break
+                    by_day: Dict[str, List[tuple]] = {}
+                    for event in rows:
+                        day = event[-1] if DAY_PATTERN.match(event[-1] or '') else 'unknown'
+                        by_day.setdefault(day, []).append(event)
+                    for day, events in by_day.items():
+                        if day not in writers:
+                            target = root / f'date={day}' / f'part-{start + 1:012d}-{end:012d}.parquet'
+                            target.parent.mkdir(parents=True, exist_ok=True)
+                            temporary = target.with_name(f'.{target.name}.tmp')
+                            writers[day] = (target, temporary, pq.ParquetWriter(
+                                temporary, schema, compression='zstd', use_dictionary=True, sorting_columns=sorting
+                            ))
+                        columns = list(zip(*events))
+                        arrays = []
+                        for index, column in enumerate(EXPORT_COLUMNS):
+                            values = columns[index]
+                            if column == 'timestamp':
+                                values = [_parse_timestamp(value) for value in values]
+                            elif column == 'was_correct':
+                                values = [None if value is None else bool(value) for value in values]
+                            if column in DICTIONARY_COLUMNS:
+                                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+                            else:
+                                arrays.append(pa.array(values, type=schema.field(column).type))
+                        writers[day][2].write_table(pa.Table.from_arrays(arrays, schema=schema))
+                        exported += len(events)
+            finally:
+                for _, _, writer in writers.values():
+                    writer.close()
+        
+        # Uma execução anterior a partir da mesma marca d'água pode ter chegado
+        # a publicar arquivos com outro último id; eles seriam linhas duplicadas
+        targets = {target for target, _, _ in writers.values()}
+        for stale in root.glob(f'date=*/{prefix}*.parquet'):
+            if stale not in targets:
+                stale.unlink()
+        files = []
+        for target, temporary, _ in writers.values():
+            os.replace(temporary, target)
+            files.append(str(target))
+        
+        with self._writer() as db, db:
+            db.execute("""
+                INSERT INTO telemetry_export_watermarks (name, last_id, exported_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id, exported_at = excluded.exported_at
+            """, (name, end, datetime.utcnow().isoformat()))
+        
+        return {'exported': exported, 'files': sorted(files), 'watermark': end}
+    
+    def get_session_summary(self, session_id: str) -> Dict[str, Any]:
+        """
+        Gera resumo de uma sessão de jogo
+        
+        Lê os totais mantidos em ``session_metrics`` (uma linha por tipo de
+        evento), sem reprocessar os eventos da sessão.
+        
+        Args:
+            session_id: ID da sessão
+            
+        Returns:
+            Resumo com métricas agregadas
+        """
+        with self._reader() as db:
+            families = db.execute("""
+                SELECT event_type, events, correct, reaction_time_sum, reaction_time_count, first_at, last_at
+                FROM session_metrics
+                WHERE session_id = ?
+            """, (session_id,)).fetchall()
+        
+        if not families:
+            return {'error': 'Sessão não encontrada'}
+        
+        by_type = {family[0]: family for family in families}
+        
+        def totals(event_type):
+            _, events, correct, reaction_sum, reaction_count, _, _ = by_type.get(event_type, (event_type, 0, 0, 0, 0, None, None))
+            return events, correct, reaction_sum / reaction_count if reaction_count else 0
+        
+        summary = {
+            'session_id': session_id,
+            'total_events': sum(family[1] for family in families),
+            'start_time': min(family[5] for family in families),
+            'end_time': max(family[6] for family in families),
+            'metrics': self._metrics_from_totals(*totals('go_nogo_response'), *totals('math_solve'))
+        }
+        
+        return summary
     
     def get_user_progress(self, user_id: int, game_module: str) -> Dict[str, Any]:
         """
         Analisa progresso do usuário em um módulo específico
         
+        As métricas de todas as sessões vêm de uma única consulta agrupada
+        (filtrada por usuário e módulo); as tendências são calculadas sobre
+        esse resultado compacto.
+        
         Args:
             user_id: ID do usuário
             game_module: Nome do módulo (ex: 'cyber_runner')
@@ -205,26 +1064,19 @@ class TelemetryService:
         Returns:
             Análise de progresso com tendências
         """
-        cursor = self.db.cursor()
-        
-        # Busca todas as sessões do usuário neste módulo
-        cursor.execute("""
-            SELECT DISTINCT session_id
-            FROM cognitive_events
-            WHERE game_module = ?
-            ORDER BY timestamp
-        """, (game_module,))
-        
-        sessions = cursor.fetchall()
+        with self._reader() as db:
+            rows = db.execute(PROGRESS_SQL, (user_id, game_module)).fetchall()
         
-        if not sessions:
+        if not rows:
             return {'error': 'Nenhuma sessão encontrada'}
         
-        # Analisa cada sessão
-        session_summaries = []
-        for (session_id,) in sessions:
-            summary = self.get_session_summary(session_id)
-            session_summaries.append(summary)
+        session_summaries = [{
+            'session_id': session_id,
+            'total_events': total_events,
+            'start_time': start_time,
+            'end_time': end_time,
+            'metrics': self._metrics_from_totals(*totals)
+        } for session_id, total_events, start_time, end_time, *totals in rows]
         
         # Calcula tendências
         progress = {
@@ -235,6 +1087,27 @@ class TelemetryService:
         
         return progress
     
+    @staticmethod
+    def _metrics_from_totals(go_nogo_total, go_nogo_correct, go_nogo_reaction, math_total, math_correct, math_reaction) -> Dict[str, Any]:
+        """
+        Monta o dicionário de métricas go/no-go e matemática a partir de totais agregados
+        """
+        return {
+            'go_nogo': {
+                'total_responses': go_nogo_total,
+                'correct_responses': go_nogo_correct,
+                'incorrect_responses': go_nogo_total - go_nogo_correct,
+                'avg_reaction_time': go_nogo_reaction or 0,
+                'accuracy': go_nogo_correct / go_nogo_total if go_nogo_total else 0
+            },
+            'math': {
+                'total_attempts': math_total,
+                'correct_answers': math_correct,
+                'avg_reaction_time': math_reaction or 0,
+                'accuracy': math_correct / math_total if math_total else 0
+            }
+        }
+    
     def _calculate_trends(self, sessions: List[Dict]) -> Dict[str, Any]:
         """
         Calcula tendências de melhoria ao longo das sessões
@@ -283,3 +1156,138 @@ class TelemetryService:
             }
         
         return trends
+
+
+class TelemetryIngestQueue:
+    """
+    Fila limitada em memória entre a API e o ``TelemetryService``
+
+    A requisição valida (``validate_events``) e enfileira as linhas; uma
+    thread de escrita por processo as grava com ``write_rows`` em transações
+    de até ``batch_events`` eventos. Quando a fila atinge ``max_events`` o
+    lote inteiro é recusado para que o cliente reenvie depois
+    (backpressure); um lote maior que ``max_events`` nunca caberia e deve ser
+    recusado antes. Eventos aceitos e ainda não gravados se perdem se o
+    processo cair.
+    """
+
+    def __init__(self, service: TelemetryService, max_events: int = 50000, batch_events: int = 5000, flush_interval_ms: int = 200):
+        self.service = service
+        self.max_events = max(1, max_events)
+        self.batch_events = max(1, batch_events)
+        self.flush_interval = max(1, flush_interval_ms) / 1000
+        self._events: deque = deque()
+        self._condition = threading.Condition()
+        self._pid = None
+        self._thread = None
+        self._stopping = False
+        self._writing = 0
+        self._counters = {'accepted': 0, 'rejected': 0, 'written': 0, 'failed': 0, 'batches': 0}
+        self._events_per_second: Optional[float] = None
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        # Depois de um fork a fila herdada pertence ao processo pai
+        self._pid = os.getpid()
+        self._events = deque()
+        self._writing = 0
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='telemetry-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: List[Tuple], events: List[Dict[str, Any]]) -> bool:
+        """
+        Enfileira as linhas de ``validate_events`` e seus eventos; ``False``
+        quando não há espaço para o lote inteiro
+        """
+        with self._condition:
+            self._ensure_started()
+            if len(self._events) + len(rows) > self.max_events:
+                self._counters['rejected'] += len(rows)
+                return False
+            self._events.extend(zip(rows, events))
+            self._counters['accepted'] += len(rows)
+            if len(self._events) >= self.batch_events:
+                self._condition.notify()
+            return True
+
+    def retry_after(self) -> int:
+        """
+        Segundos estimados até a fila ter espaço, pela vazão medida do escritor
+        """
+        with self._condition:
+            depth = len(self._events) + self._writing
+            rate = self._events_per_second
+        if not rate:
+            return 1
+        return max(1, math.ceil(depth / rate))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            current = self._pid == os.getpid()
+            return {
+                'depth': len(self._events) if current else 0,
+                'in_flight': self._writing if current else 0,
+                'capacity': self.max_events,
+                'events_per_second': round(self._events_per_second, 1) if self._events_per_second else None,
+                **self._counters
+            }
+
+    def drain(self) -> int:
+        """
+        Grava tudo o que estiver na fila agora; retorna quantos eventos foram gravados
+        """
+        written = 0
+        while True:
+            with self._condition:
+                if self._pid != os.getpid() or not self._events:
+                    return written
+                count = min(len(self._events), self.batch_events)
+                batch = [self._events.popleft() for _ in range(count)]
+                self._writing += count
+            written += self._write(batch)
+
+    def _write(self, batch: List[Tuple[Tuple, Dict[str, Any]]]) -> int:
+        started = time.perf_counter()
+        rows, events = zip(*batch)
+        try:
+            result = self.service.write_rows(list(rows), list(events))
+        except Exception:
+            logger.exception('Falha ao gravar %s eventos de telemetria', len(batch))
+            result = {'success': False, 'error': 'exception'}
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        with self._condition:
+            self._writing -= len(batch)
+            self._counters['batches'] += 1
+            if result.get('success'):
+                self._counters['written'] += result['processed']
+                self._counters['failed'] += len(result['errors'])
+                rate = len(batch) / elapsed
+                self._events_per_second = rate if self._events_per_second is None else 0.8 * self._events_per_second + 0.2 * rate
+            else:
+                self._counters['failed'] += len(batch)
+        if not result.get('success'):
+            logger.error('Lote de telemetria descartado: %s', result.get('error'))
+        elif result['errors']:
+            logger.warning('%s eventos de telemetria recusados pelo banco', len(result['errors']))
+        return result.get('processed', 0)
+
+    def close(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread() and self._pid == os.getpid():
+            thread.join(timeout=self.flush_interval * 4)
+        self.drain()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._stopping and len(self._events) < self.batch_events:
+                    self._condition.wait(self.flush_interval)
+                stopping = self._stopping
+            self.drain()
+            if stopping:
+                return
@@ -23,6 +23,7 @@ def app():
         app_module.db.drop_all()
         app_module.db.create_all()
         app_module.seed_activities()
+        app_module.consent_cache.clear()
     yield flask_app
     with flask_app.app_context():
         app_module.db.session.remove()
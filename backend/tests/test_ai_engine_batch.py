@@ -0,0 +1,112 @@
+"""Vectorized AIEngine.analyze_sessions against the scalar path."""
+
+import time
+
+import numpy as np
+import pytest
+
+ai_engine = pytest.importorskip('ai_engine')
+pd = pytest.importorskip('pandas')
+
+
+def random_sessions(size, seed=11):
+    rng = np.random.default_rng(seed)
+    return {
+        'accuracy': rng.integers(0, 101, size),
+        'reaction_time': rng.uniform(100, 2500, size),
+        'errors': rng.integers(0, 15, size),
+        'success_streak': rng.integers(0, 15, size),
+        'difficulty_level': rng.integers(1, 11, size),
+    }
+
+
+def scalar(engine, sessions, rng):
+    scores, qualities, difficulties = [], [], []
+    for row in pd.DataFrame(sessions).to_dict('records'):
+        score = ai_engine.performance_score(row)
+        scores.append(score)
+        qualities.append(engine._classify_session(score))
+        difficulties.append(engine._recommend_difficulty(row['difficulty_level'], score, rng))
+    return scores, qualities, difficulties
+
+
+def test_batch_matches_scalar_path_including_random_draws():
+    engine = ai_engine.AIEngine()
+    sessions = random_sessions(5000)
+    # Scores exactly on the class and recommendation boundaries
+    sessions['accuracy'][:3] = [100, 100, 25]
+    sessions['reaction_time'][:3] = [0, 0, 2000]
+    sessions['errors'][:3] = [0, 0, 10]
+    sessions['success_streak'][:3] = [10, 10, 0]
+
+    scores, qualities, difficulties = scalar(engine, sessions, np.random.default_rng(3))
+    batch = engine.analyze_sessions(sessions, rng=np.random.default_rng(3))
+
+    assert batch['performance_score'].tolist() == scores
+    assert batch['session_quality'].tolist() == qualities
+    assert batch['recommended_difficulty'].tolist() == difficulties
+    assert len(engine.students) == 0
+
+
+def test_batch_accepts_a_dataframe():
+    engine = ai_engine.AIEngine()
+    frame = pd.DataFrame(random_sessions(10))
+    expected = engine.analyze_sessions(frame.to_dict('list'), rng=np.random.default_rng(5))
+    result = engine.analyze_sessions(frame, rng=np.random.default_rng(5))
+    for name, values in expected.items():
+        assert result[name].tolist() == values.tolist()
+
+
+@pytest.mark.slow
+def test_batch_throughput_for_one_million_sessions(record_property):
+    """Benchmark: reports sessions/s for both paths in the test properties; no timing assert."""
+    engine = ai_engine.AIEngine()
+    sessions = random_sessions(1_000_000)
+
+    sample = {name: values[:50_000] for name, values in sessions.items()}
+    started = time.perf_counter()
+    scalar(engine, sample, np.random.default_rng(1))
+    before = 50_000 / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    result = engine.analyze_sessions(sessions, rng=np.random.default_rng(1))
+    after = 1_000_000 / (time.perf_counter() - started)
+
+    assert len(result['performance_score']) == 1_000_000
+    record_property('scalar_sessions_per_second', round(before))
+    record_property('vectorized_sessions_per_second', round(after))
+
+
+def test_recommendations_are_reproducible_per_session():
+    engine = ai_engine.AIEngine()
+    borderline = {'accuracy': 80, 'reaction_time': 600, 'errors': 2, 'success_streak': 8, 'time_spent': 300, 'difficulty_level': 5}
+    assert 0.7 < ai_engine.performance_score(borderline) <= 0.85
+
+    runs = [
+        [engine.analyze_session(student, {**borderline, 'session_id': f'replay-{number}'})['recommended_difficulty'] for number in range(40)]
+        for student in ('ana', 'bia')
+    ]
+    assert runs[0] == runs[1]
+    assert set(runs[0]) == {5, 6}
+
+    scores = np.full(40, ai_engine.performance_score(borderline))
+    batch = engine.recommend_difficulties(np.full(40, 5), scores, np.random.default_rng(9))
+    assert batch.tolist() == engine.recommend_difficulties(np.full(40, 5), scores, np.random.default_rng(9)).tolist()
+
+    state = np.random.get_state()[1].copy()
+    engine.analyze_session('caio', borderline)
+    engine.analyze_sessions({name: [value] * 10 for name, value in borderline.items()})
+    assert (np.random.get_state()[1] == state).all()
+
+
+def test_session_generator_is_built_only_for_random_bands(monkeypatch):
+    built = []
+    monkeypatch.setattr(ai_engine, 'session_rng', lambda key: built.append(key) or np.random.default_rng(0))
+    engine = ai_engine.AIEngine()
+    clear = {'accuracy': 100, 'reaction_time': 0, 'errors': 0, 'success_streak': 10, 'time_spent': 300, 'difficulty_level': 5}
+    borderline = {'accuracy': 80, 'reaction_time': 600, 'errors': 2, 'success_streak': 8, 'time_spent': 300, 'difficulty_level': 5}
+
+    assert engine.analyze_session('ana', {**clear, 'session_id': 'clara'})['recommended_difficulty'] == 6
+    assert built == []
+    engine.analyze_session('ana', {**borderline, 'session_id': 'limite'})
+    assert built == ['limite']
@@ -0,0 +1,170 @@
+"""Trained difficulty model: offline training, lazy artifact and batched inference."""
+
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+ai_engine = pytest.importorskip('ai_engine')
+pytest.importorskip('joblib')
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+
+
+def seed_progression(app, organization_id, user_id, students=6, sessions_per_student=20):
+    """Sessions whose next difficulty goes up after >85% accuracy and down below 50%."""
+    rng = np.random.default_rng(4)
+    with app.app_context():
+        activity = app_module.Activity.query.filter_by(slug='mestres-sinal').first()
+        started = app_module.utc_now() - timedelta(days=30)
+        for index in range(students):
+            student = app_module.StudentProfile(organization_id=organization_id, apelido=f'Perfil Modelo {index}')
+            app_module.db.session.add(student)
+            app_module.db.session.flush()
+            difficulty = 5
+            for number in range(sessions_per_student):
+                accuracy = float(rng.choice([0.3, 0.7, 0.95]))
+                app_module.db.session.add(app_module.GameSession(
+                    organization_id=organization_id,
+                    student_id=student.id,
+                    activity_id=activity.id,
+                    created_by_user_id=user_id,
+                    idempotency_key=f'modelo-{student.id}-{number}',
+                    game_type=activity.slug,
+                    status='completed',
+                    duration_seconds=300,
+                    acertos=int(accuracy * 20),
+                    erros=20 - int(accuracy * 20),
+                    accuracy=accuracy,
+                    # Same shape the games send (e.g. SonicJump): no reaction time or streak
+                    metadata_json={'lives_remaining': 2, 'level': difficulty},
+                    completed_at=started + timedelta(hours=index * 100 + number),
+                ))
+                difficulty = min(10, difficulty + 1) if accuracy > 0.85 else max(1, difficulty - 1) if accuracy < 0.5 else difficulty
+        app_module.db.session.commit()
+
+
+def session(accuracy, difficulty_level=5):
+    return {
+        'accuracy': accuracy,
+        'reaction_time': 0,
+        'errors': 20 - int(accuracy / 5),
+        'success_streak': 0,
+        'time_spent': 300,
+        'difficulty_level': difficulty_level,
+    }
+
+
+@pytest.fixture
+def trained(app, client, runner, tmp_path):
+    account, _ = auth_headers(client, 'modelo@example.com', 'senha-segura-123', 'Escola Modelo')
+    seed_progression(app, account['organization_id'], account['usuario']['id'])
+    result = runner.invoke(args=['train-difficulty-model', '--output', str(tmp_path), '--estimators', '20'])
+    assert result.exit_code == 0, result.output
+    return tmp_path
+
+
+def test_training_command_writes_a_versioned_artifact(trained):
+    [artifact] = trained.glob('difficulty-model-*.joblib')
+    assert (trained / 'LATEST').read_text().strip() == artifact.name
+
+    model = ai_engine.DifficultyModel(trained)
+    assert model._artifact is None
+    assert model.available and model.version == artifact.name[len('difficulty-model-'):-len('.joblib')]
+
+
+def test_engine_uses_the_model_for_single_and_batched_predictions(trained):
+    engine = ai_engine.AIEngine(difficulty_model=ai_engine.DifficultyModel(trained))
+    assert engine.analyze_session('ana', session(95))['recommended_difficulty'] == 6
+    assert engine.analyze_session('ana', session(30))['recommended_difficulty'] == 4
+
+    batch = {name: [session(accuracy)[name] for accuracy in (95, 70, 30)] for name in ai_engine.MODEL_FEATURES}
+    assert engine.predict(batch).tolist() == [6, 5, 4]
+    assert engine.analyze_sessions(batch)['recommended_difficulty'].tolist() == [6, 5, 4]
+
+
+def test_concurrent_recommendations_share_model_calls(trained):
+    model = ai_engine.DifficultyModel(trained, max_wait_ms=50)
+    model.artifact()
+    results = [None] * 32
+    barrier = threading.Barrier(len(results))
+
+    def recommend(index):
+        barrier.wait()
+        results[index] = model.recommend(session(95 if index % 2 else 30))
+
+    threads = [threading.Thread(target=recommend, args=(index,)) for index in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    model.batcher.close()
+
+    assert results == [6 if index % 2 else 4 for index in range(len(results))]
+    assert model.batcher.calls < len(results) // 4
+
+
+def test_missing_artifact_falls_back_to_rules(tmp_path):
+    engine = ai_engine.AIEngine(difficulty_model=ai_engine.DifficultyModel(tmp_path / 'ausente'))
+    rules = ai_engine.AIEngine()
+    sessions = {name: [session(accuracy)[name] for accuracy in (95, 60, 30)] for name in ai_engine.MODEL_FEATURES}
+    assert not engine.difficulty_model.available
+    assert engine.predict(sessions, rng=np.random.default_rng(1)).tolist() == rules.predict(sessions, rng=np.random.default_rng(1)).tolist()
+
+
+def test_training_requires_enough_history(app, runner, tmp_path):
+    result = runner.invoke(args=['train-difficulty-model', '--output', str(tmp_path)])
+    assert result.exit_code != 0
+    assert 'Dados insuficientes' in result.output
+    assert not list(tmp_path.iterdir())
+
+
+def test_unreadable_artifact_is_loaded_once_and_rules_apply(tmp_path, monkeypatch):
+    (tmp_path / 'difficulty-model-corrompido.joblib').write_bytes(b'not a pickle')
+    (tmp_path / 'LATEST').write_text('difficulty-model-corrompido.joblib\n')
+    model = ai_engine.DifficultyModel(tmp_path)
+    loads = []
+    monkeypatch.setattr(model, '_resolve', lambda original=model._resolve: loads.append(1) or original())
+
+    engine, rules = ai_engine.AIEngine(difficulty_model=model), ai_engine.AIEngine()
+    for number in range(3):
+        data = {**session(95), 'session_id': f'corrompido-{number}'}
+        assert engine.analyze_session('ana', data)['recommended_difficulty'] == rules.analyze_session('ana', data)['recommended_difficulty']
+    assert not model.available
+    assert len(loads) == 1
+
+
+def test_model_failure_during_a_call_falls_back_to_rules(trained, monkeypatch):
+    model = ai_engine.DifficultyModel(trained)
+    engine = ai_engine.AIEngine(difficulty_model=model)
+    assert model.available
+    monkeypatch.setattr(model, 'artifact', lambda: None)
+    monkeypatch.setattr(ai_engine.AIEngine, '_model', lambda self: model)
+
+    assert engine.analyze_session('ana', session(30))['recommended_difficulty'] == 4
+    batch = {name: [session(30)[name]] for name in ai_engine.MODEL_FEATURES}
+    assert engine.predict(batch).tolist() == [4]
+    model.batcher.close()
+
+
+def test_batcher_restarts_after_close():
+    batcher = ai_engine.MicroBatcher(lambda rows: rows[:, 0] * 2)
+    assert batcher.submit(np.array([1.0])).result(timeout=2) == 2
+    batcher.close()
+    assert batcher.submit(np.array([3.0])).result(timeout=2) == 6
+    batcher.close()
+
+
+def test_stuck_batcher_falls_back_to_rules(trained, monkeypatch):
+    model = ai_engine.DifficultyModel(trained, timeout_seconds=0.05)
+    engine, rules = ai_engine.AIEngine(difficulty_model=model), ai_engine.AIEngine()
+    assert model.available
+    release = threading.Event()
+    monkeypatch.setattr(model.batcher, 'predict', lambda rows: release.wait() and model.predict_features(rows))
+
+    data = {**session(95), 'session_id': 'preso'}
+    assert engine.analyze_session('ana', data)['recommended_difficulty'] == rules.analyze_session('ana', data)['recommended_difficulty']
+    release.set()
+    model.batcher.close()
@@ -0,0 +1,123 @@
+"""Per-student AIEngine history with LRU eviction and rehydration."""
+
+import pytest
+
+ai_engine = pytest.importorskip('ai_engine')
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+
+
+def session(accuracy, reaction_time=800, errors=2, success_streak=3, time_spent=600, difficulty_level=5):
+    return {
+        'accuracy': accuracy,
+        'reaction_time': reaction_time,
+        'errors': errors,
+        'success_streak': success_streak,
+        'time_spent': time_spent,
+        'difficulty_level': difficulty_level,
+    }
+
+
+def test_students_do_not_share_history():
+    engine = ai_engine.AIEngine()
+    for _ in range(10):
+        engine.analyze_session('ana', session(95, errors=0, success_streak=10))
+        engine.analyze_session('bia', session(20, errors=9, success_streak=0))
+
+    ana, bia = engine.export_analytics('ana'), engine.export_analytics('bia')
+    assert ana['total_sessions'] == bia['total_sessions'] == 10
+    assert ana['worst_performance'] > bia['best_performance']
+    assert ana['consistency_score'] == bia['consistency_score'] == 1
+    assert engine.export_analytics('caio') == {'error': 'No data available'}
+
+
+def test_history_is_a_bounded_ring_buffer():
+    engine = ai_engine.AIEngine(history_size=5)
+    for accuracy in range(10, 90, 10):
+        engine.analyze_session(1, session(accuracy))
+    assert engine.history(1) == [ai_engine.performance_score(session(accuracy)) for accuracy in (40, 50, 60, 70, 80)]
+
+
+def test_least_recently_used_students_are_evicted_and_rehydrated():
+    loads = []
+
+    def loader(student_id, limit):
+        loads.append((student_id, limit))
+        return [(None, session(50))] * 3
+
+    engine = ai_engine.AIEngine(history_size=4, max_students=2, history_loader=loader)
+    engine.analyze_session(1, session(90))
+    engine.analyze_session(2, session(90))
+    engine.history(1)
+    engine.analyze_session(3, session(90))
+
+    assert len(engine.students) == 2
+    assert 1 in engine.students and 2 not in engine.students
+    assert len(engine.history(2)) == 3
+    assert loads == [(1, 4), (2, 4), (3, 4), (2, 4)]
+
+
+def test_idle_students_leave_memory():
+    engine = ai_engine.AIEngine(idle_seconds=0)
+    engine.analyze_session(1, session(90))
+    assert engine.students.evict_idle() == 0
+
+
+def test_history_rehydrates_from_game_sessions(app, client):
+    _, headers = auth_headers(client, 'ia@example.com', 'senha-segura-123', 'Escola IA')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil IA'}).get_json()['id']
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    for number in range(3):
+        client.post('/api/v1/gameplay/sync', headers=headers, json={
+            'session_id': f'pytest-ia-session-{number:03d}',
+            'student_id': student_id,
+            'game_type': 'mestres-sinal',
+            'acertos': 8 + number,
+            'erros': 2 - number,
+            'duration_seconds': 300,
+            'metadata': {'reaction_time': 600, 'success_streak': 4, 'difficulty_level': 3},
+        })
+
+    with app.app_context():
+        database = app_module.db.engine
+
+    def loader(student_id, limit):
+        with database.connect() as connection:
+            return ai_engine.game_session_history(connection, student_id, limit)
+
+    engine = ai_engine.AIEngine(history_size=2, history_loader=loader)
+    last = session(100, reaction_time=600, errors=0, success_streak=4, time_spent=300, difficulty_level=3)
+    history = [ai_engine.performance_score({**last, 'accuracy': 90, 'errors': 1}), ai_engine.performance_score(last)]
+    assert engine.history(student_id) == history
+    assert engine.export_analytics(student_id)['last_session']['data'] == {**last, 'session_id': 'pytest-ia-session-002'}
+
+    # The session just stored by the API arrives again for live analysis
+    engine.analyze_session(student_id, {**last, 'session_id': 'pytest-ia-session-002'})
+    assert engine.history(student_id) == history
+    engine.analyze_session(student_id, {**last, 'session_id': 'pytest-ia-session-003'})
+    assert engine.history(student_id) == history[1:] + [ai_engine.performance_score(last)]
+
+
+def test_shared_engine_rehydrates_through_the_app_database(app, client):
+    _, headers = auth_headers(client, 'iacompartilhada@example.com', 'senha-segura-123', 'Escola IA Compartilhada')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil IA Compartilhada'}).get_json()['id']
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    client.post('/api/v1/gameplay/sync', headers=headers, json={
+        'session_id': 'pytest-ia-shared-001',
+        'student_id': student_id,
+        'game_type': 'mestres-sinal',
+        'acertos': 8,
+        'erros': 2,
+        'duration_seconds': 300,
+        'metadata': {'level': 4},
+    })
+
+    engine = app_module.shared_ai_engine()
+    assert engine is ai_engine.ai_engine and app_module.shared_ai_engine() is engine
+    engine.students.discard(student_id)
+    try:
+        assert len(engine.history(student_id)) == 1
+        assert engine.export_analytics(student_id)['last_session']['data']['session_id'] == 'pytest-ia-shared-001'
+    finally:
+        engine.students.discard(student_id)
@@ -0,0 +1,80 @@
+"""Streaming AIEngine statistics against the full-history computations."""
+
+import numpy as np
+import pytest
+
+ai_engine = pytest.importorskip('ai_engine')
+
+
+def reference(scores, times):
+    """The list-based computations the streaming statistics replace."""
+    recent = scores[-20:]
+    if len(recent) >= 10:
+        change = np.mean(recent[-5:]) - np.mean(recent[:5])
+        trend = 'improving' if change > 0.1 else 'declining' if change < -0.1 else 'stable'
+    else:
+        trend = 'stable'
+    mid = len(scores) // 2
+    buckets = {}
+    for score, time_spent in zip(scores[-30:], times[-30:]):
+        buckets.setdefault(int(time_spent / 300) * 5, []).append(score)
+    return {
+        'trend': trend,
+        'recent_mean': np.mean(recent),
+        'recent_variance': np.var(recent),
+        'mean': np.mean(scores),
+        'variance': np.var(scores),
+        'best': max(scores),
+        'worst': min(scores),
+        'improvement': np.mean(scores[mid:]) - np.mean(scores[:mid]) if len(scores) >= 10 else 0,
+        'buckets': {bucket: np.mean(values) for bucket, values in buckets.items()},
+    }
+
+
+@pytest.mark.parametrize('history_size', [5, 20, 30, 100])
+def test_streaming_statistics_match_full_history(history_size):
+    rng = np.random.default_rng(21)
+    engine = ai_engine.AIEngine(history_size=history_size)
+    scores, times = [], []
+    for number in range(260):
+        data = {
+            'accuracy': float(rng.uniform(0, 100)) if number < 150 else 95.0,
+            'reaction_time': float(rng.uniform(200, 2200)),
+            'errors': int(rng.integers(0, 12)),
+            'success_streak': int(rng.integers(0, 12)),
+            'time_spent': float(rng.uniform(60, 2400)),
+            'difficulty_level': 5,
+        }
+        patterns = engine.analyze_session('ana', data)['patterns']
+        scores = (scores + [ai_engine.performance_score(data)])[-history_size:]
+        times = (times + [data['time_spent']])[-history_size:]
+        expected = reference(scores, times)
+
+        if len(scores) >= 5:
+            assert patterns['trend'] == expected['trend']
+            assert patterns['average_score'] == pytest.approx(expected['recent_mean'])
+            assert patterns['consistency'] == pytest.approx(max(0, 1 - expected['recent_variance'] * 2))
+            assert patterns['sessions_analyzed'] == min(len(scores), 20)
+
+        analytics = engine.export_analytics('ana')
+        assert analytics['total_sessions'] == len(scores)
+        assert analytics['average_performance'] == pytest.approx(expected['mean'])
+        assert analytics['consistency_score'] == pytest.approx(1 - expected['variance'])
+        assert (analytics['best_performance'], analytics['worst_performance']) == (expected['best'], expected['worst'])
+        assert analytics['improvement_rate'] == pytest.approx(expected['improvement'], abs=1e-12)
+
+        state = engine.students.get('ana')
+        assert state.stats.time_bucket_means() == pytest.approx(expected['buckets'])
+
+    assert engine.history('ana') == scores
+
+
+def test_running_moments_remove_undoes_add():
+    moments = ai_engine.RunningMoments()
+    for value in (0.2, 0.9, 0.4, 0.7):
+        moments.add(value)
+    moments.remove(0.2)
+    moments.remove(0.9)
+    assert moments.count == 2
+    assert moments.mean == pytest.approx(0.55)
+    assert moments.variance == pytest.approx(np.var([0.4, 0.7]))
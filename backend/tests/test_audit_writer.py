@@ -0,0 +1,155 @@
+"""Buffered audit pipeline: bulk flushes, crash recovery and synchronous actions."""
+
+import json
+import time
+
+import pytest
+
+from audit_writer import AuditBuffer
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+
+
+def record(number):
+    return {'action': 'login', 'resource_type': 'user', 'resource_id': str(number), 'created_at': '2026-01-01T00:00:00+00:00'}
+
+
+def test_flushes_in_bulk_when_batch_fills(tmp_path):
+    batches = []
+    buffer = AuditBuffer(batches.append, tmp_path, flush_records=3, flush_interval_ms=60_000)
+    for number in range(7):
+        buffer.append(record(number))
+    deadline = time.monotonic() + 5
+    while sum(map(len, batches)) < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+    assert [item['resource_id'] for batch in batches for item in batch] == [str(number) for number in range(7)]
+    assert all(len(batch) >= 1 for batch in batches) and len(batches) <= 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_flushes_after_interval(tmp_path):
+    batches = []
+    buffer = AuditBuffer(batches.append, tmp_path, flush_records=1000, flush_interval_ms=20)
+    buffer.append(record(1))
+    deadline = time.monotonic() + 5
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+    assert batches == [[record(1)]]
+
+
+def test_spool_left_by_dead_worker_is_replayed(tmp_path):
+    dead_pid = 2 ** 22 + 12345
+    spool = tmp_path / f'audit-{dead_pid}.ndjson'
+    spool.write_text(json.dumps(record(1)) + '\n' + json.dumps(record(2)) + '\n{"torn', encoding='utf-8')
+    failed = tmp_path / f'audit-{dead_pid}.3.flushing'
+    failed.write_text(json.dumps(record(3)) + '\n', encoding='utf-8')
+
+    batches = []
+    buffer = AuditBuffer(batches.append, tmp_path)
+    assert buffer.recover() == 3
+    assert sorted(item['resource_id'] for batch in batches for item in batch) == ['1', '2', '3']
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_flush_keeps_batch_for_retry(tmp_path):
+    calls = []
+
+    def flaky(records):
+        calls.append(records)
+        if len(calls) == 1:
+            raise RuntimeError('database unavailable')
+
+    buffer = AuditBuffer(flaky, tmp_path, flush_records=1000, flush_interval_ms=60_000)
+    buffer.append(record(1))
+    assert buffer.flush() == 0
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.flushing']
+    buffer.append(record(2))
+    assert buffer.flush() == 1
+    buffer.close()
+    assert [item['resource_id'] for batch in calls[1:] for item in batch] == ['2', '1']
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_repeated_sink_failures_keep_the_flusher_running(tmp_path):
+    calls = []
+
+    def flaky(records):
+        calls.append([item['resource_id'] for item in records])
+        if len(calls) in (1, 3):
+            raise RuntimeError('database unavailable')
+
+    buffer = AuditBuffer(flaky, tmp_path, flush_records=1, flush_interval_ms=10)
+
+    def wait_for(count):
+        deadline = time.monotonic() + 5
+        while len(calls) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    buffer.append(record(1))
+    wait_for(1)
+    buffer.append(record(2))
+    wait_for(3)
+    assert calls[:3] == [['1'], ['2'], ['1']]
+    assert [path.name.startswith('recovering-') for path in tmp_path.iterdir()] == [True]
+
+    buffer.append(record(3))
+    wait_for(5)
+    assert buffer._thread.is_alive()
+    buffer.close()
+    assert calls[3:] == [['3'], ['1']]
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def buffered_audit(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'AUDIT_MODE', 'buffered')
+    monkeypatch.setattr(app_module.audit_buffer, 'spool_dir', tmp_path)
+    yield app_module.audit_buffer
+    app_module.audit_buffer.flush()
+
+
+def audit_actions(app):
+    with app.app_context():
+        return [row.action for row in app_module.AuditEvent.query.order_by(app_module.AuditEvent.id)]
+
+
+def test_buffered_mode_defers_routine_events_but_not_consent(app, client, buffered_audit):
+    _, headers = auth_headers(client, 'buffer@example.com', 'senha-segura-123', 'Escola Buffer')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Buffer'}).get_json()['id']
+    assert audit_actions(app) == []
+
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    assert audit_actions(app) == ['consent_granted']
+
+    assert buffered_audit.flush() >= 3
+    actions = audit_actions(app)
+    assert actions[0] == 'consent_granted'
+    assert {'account_created', 'student_created'} <= set(actions[1:])
+
+
+def test_buffered_events_of_rolled_back_work_are_dropped(app, buffered_audit):
+    with app.test_request_context():
+        app_module.audit('student_created', 'student', '1')
+        app_module.db.session.rollback()
+        app_module.audit('login', 'user', '1')
+        app_module.db.session.commit()
+    buffered_audit.flush()
+    assert audit_actions(app) == ['login']
+
+
+def test_savepoint_rollback_keeps_events_of_the_outer_transaction(app, buffered_audit):
+    with app.test_request_context():
+        app_module.audit('student_created', 'student', '1')
+        outer = app_module.db.session.begin_nested()
+        app_module.audit('student_updated', 'student', '1')
+        inner = app_module.db.session.begin_nested()
+        app_module.audit('student_deleted', 'student', '1')
+        inner.commit()
+        outer.rollback()
+        with app_module.db.session.begin_nested():
+            app_module.audit('login', 'user', '1')
+        app_module.db.session.commit()
+    buffered_audit.flush()
+    assert audit_actions(app) == ['student_created', 'login']
@@ -0,0 +1,69 @@
+"""Request-scoped authentication context and its process-local cache."""
+
+import time
+
+import pytest
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+from tests.test_roster import count_queries, record_statements
+
+
+@pytest.fixture
+def auth_cache_enabled(app):
+    app_module.auth_cache.clear()
+    app.config['AUTH_CACHE_TTL_SECONDS'] = 60
+    yield
+    app.config['AUTH_CACHE_TTL_SECONDS'] = 0
+    app_module.auth_cache.clear()
+
+
+def test_user_and_memberships_load_in_one_query(app, client):
+    _, headers = auth_headers(client, 'contexto@example.com', 'senha-segura-123', 'Escola Contexto')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Contexto'}).get_json()['id']
+
+    response, statements = record_statements(app, lambda: client.get(f'/api/v1/students/{student_id}', headers=headers))
+    assert response.status_code == 200
+    assert sum('FROM users' in statement for statement in statements) == 1
+    assert not any('FROM organization_memberships' in statement for statement in statements)
+
+
+def test_cached_context_skips_identity_queries(app, client, auth_cache_enabled):
+    _, headers = auth_headers(client, 'cache@example.com', 'senha-segura-123', 'Escola Cache')
+
+    first, first_queries = count_queries(app, lambda: client.get('/api/v1/students', headers=headers))
+    second, second_queries = count_queries(app, lambda: client.get('/api/v1/students', headers=headers))
+    assert first.status_code == second.status_code == 200
+    assert second_queries == first_queries - 1
+
+    me = client.get('/api/v1/me', headers=headers).get_json()['usuario']
+    assert me['email'] == 'cache@example.com'
+    assert [organization['nome'] for organization in me['organizacoes']] == ['Escola Cache']
+
+
+def test_membership_change_invalidates_cached_context(client, auth_cache_enabled):
+    _, headers = auth_headers(client, 'invalida@example.com', 'senha-segura-123', 'Escola Original')
+    assert len(client.get('/api/v1/organizations', headers=headers).get_json()['organizations']) == 1
+
+    created = client.post('/api/v1/organizations', headers=headers, json={'nome': 'Escola Nova'})
+    assert created.status_code == 201
+
+    organizations = client.get('/api/v1/organizations', headers=headers).get_json()['organizations']
+    assert sorted(organization['nome'] for organization in organizations) == ['Escola Nova', 'Escola Original']
+    new_headers = {**headers, 'X-Organization-ID': str(created.get_json()['id'])}
+    assert client.post('/api/v1/students', headers=new_headers, json={'apelido': 'Perfil Novo'}).status_code == 201
+
+
+def test_change_committed_elsewhere_is_visible_after_the_ttl(app, client, auth_cache_enabled):
+    account, headers = auth_headers(client, 'outroprocesso@example.com', 'senha-segura-123', 'Escola Outro Processo')
+    app.config['AUTH_CACHE_TTL_SECONDS'] = 0.2
+    assert client.get('/api/v1/students', headers=headers).status_code == 200
+
+    # Another worker deactivates the user; its invalidation never reaches this process.
+    with app.app_context():
+        app_module.db.session.get(app_module.User, account['usuario']['id']).ativo = False
+        app_module.db.session.commit()
+    assert client.get('/api/v1/students', headers=headers).status_code == 200
+
+    time.sleep(0.25)
+    assert client.get('/api/v1/students', headers=headers).status_code == 401
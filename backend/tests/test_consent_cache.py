@@ -0,0 +1,99 @@
+"""Consent-state cache: hits skip the database, changes are visible immediately."""
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+from tests.test_roster import record_statements
+
+
+def consent_statements(statements):
+    return [statement for statement in statements if 'FROM consents' in statement]
+
+
+def sync(client, headers, student_id, number):
+    return client.post('/api/v1/gameplay/sync', headers=headers, json={
+        'session_id': f'pytest-consent-cache-{number:03d}',
+        'student_id': student_id,
+        'game_type': 'mestres-sinal',
+        'score': number,
+    })
+
+
+def test_cached_consent_skips_query_and_revoke_is_immediate(app, client):
+    _, headers = auth_headers(client, 'consentcache@example.com', 'senha-segura-123', 'Escola Consent Cache')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Cache'}).get_json()['id']
+    consent_id = client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'}).get_json()['id']
+
+    assert sync(client, headers, student_id, 1).status_code == 201
+    response, statements = record_statements(app, lambda: sync(client, headers, student_id, 2))
+    assert response.status_code == 201
+    assert consent_statements(statements) == []
+
+    assert client.post(f'/api/v1/consents/{consent_id}/revoke', headers=headers).status_code == 200
+    assert sync(client, headers, student_id, 3).status_code == 403
+    [student] = client.get('/api/v1/students', headers=headers).get_json()['students']
+    assert student['consentimento_ativo'] is False
+
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    assert sync(client, headers, student_id, 4).status_code == 201
+
+
+def test_change_committed_elsewhere_bypasses_stale_entry(app, client):
+    _, headers = auth_headers(client, 'outroworker@example.com', 'senha-segura-123', 'Escola Outro Worker')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Worker'}).get_json()['id']
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    assert sync(client, headers, student_id, 1).status_code == 201
+
+    # Another worker revokes: this process keeps its entry, but the revision moves on.
+    with app.app_context():
+        consent = app_module.Consent.query.filter_by(student_id=student_id).one()
+        consent.status = 'revoked'
+        consent.revogado_em = app_module.utc_now()
+        student = app_module.db.session.get(app_module.StudentProfile, student_id)
+        student.consent_revision = app_module.StudentProfile.consent_revision + 1
+        app_module.db.session.commit()
+
+    assert sync(client, headers, student_id, 2).status_code == 403
+
+
+def test_has_active_consent_many_uses_two_queries_cold_and_one_warm(app, client):
+    _, headers = auth_headers(client, 'consentmany@example.com', 'senha-segura-123', 'Escola Consent Many')
+    student_ids = [client.post('/api/v1/students', headers=headers, json={'apelido': f'Perfil {index}'}).get_json()['id'] for index in range(4)]
+    for student_id in student_ids[::2]:
+        client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+
+    def lookup():
+        with app.app_context():
+            return app_module.has_active_consent_many(student_ids)
+
+    cold, statements = record_statements(app, lookup)
+    assert cold == {student_id: index % 2 == 0 for index, student_id in enumerate(student_ids)}
+    assert len(statements) == 2
+    warm, statements = record_statements(app, lookup)
+    assert warm == cold
+    assert len(statements) == 1
+
+    client.delete(f'/api/v1/students/{student_ids[0]}', headers=headers)
+    assert lookup()[student_ids[0]] is True  # soft delete keeps history; only the cache entry moves on
+
+
+class CorruptRedis:
+    def __init__(self, values):
+        self.values = values
+
+    def mget(self, keys):
+        return self.values[:len(keys)]
+
+
+def test_unparsable_shared_entries_are_cache_misses(app, client, monkeypatch):
+    _, headers = auth_headers(client, 'consentredis@example.com', 'senha-segura-123', 'Escola Consent Redis')
+    student_ids = [client.post('/api/v1/students', headers=headers, json={'apelido': f'Perfil Redis {index}'}).get_json()['id'] for index in range(4)]
+    for student_id in student_ids:
+        client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    shared = CorruptRedis([b'lixo:1', b':1', b'1:talvez', b'\xff\xfe'])
+    monkeypatch.setattr(app_module.consent_cache, '_shared', lambda: shared)
+    app_module.consent_cache.clear()
+
+    with app.app_context():
+        assert app_module.consent_cache.get_many({student_id: 1 for student_id in student_ids}, 'pesquisa') == {}
+        monkeypatch.setattr(app_module.consent_cache, 'put_many', lambda *args: None)
+        assert app_module.has_active_consent_many(student_ids) == {student_id: True for student_id in student_ids}
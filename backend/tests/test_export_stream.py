@@ -0,0 +1,60 @@
+"""Streaming NDJSON export for data-portability requests."""
+
+import gzip
+import json
+
+from tests.test_product_api import auth_headers
+
+
+def seed_student(client, headers, sessions=3):
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Export'}).get_json()['id']
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    for number in range(sessions):
+        client.post('/api/v1/gameplay/sync', headers=headers, json={
+            'session_id': f'pytest-export-session-{number:03d}',
+            'student_id': student_id,
+            'game_type': 'mestres-sinal',
+            'score': number,
+            'events': [{'type': 'round_completed', 'data': {'round': round_number}} for round_number in range(2)],
+        })
+    return student_id
+
+
+def parse(body):
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+def test_ndjson_export_streams_every_record_and_is_audited(client):
+    _, headers = auth_headers(client, 'ndjson@example.com', 'senha-segura-123', 'Escola NDJSON')
+    student_id = seed_student(client, headers)
+
+    response = client.get(f'/api/v1/students/{student_id}/export', headers={**headers, 'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    records = parse(response.data)
+    kinds = [record['type'] for record in records]
+    assert kinds == ['student'] + ['session'] * 3 + ['event'] * 6 + ['consent']
+    assert records[0]['data']['id'] == student_id
+    assert {record['data']['session_id'] for record in records if record['type'] == 'event'} == {
+        record['data']['id'] for record in records if record['type'] == 'session'
+    }
+
+    audit = client.get('/api/v1/audit-events', headers=headers).get_json()['events']
+    exported = [event for event in audit if event['action'] == 'student_exported']
+    assert exported and exported[0]['metadata'] == {'format': 'ndjson'}
+
+
+def test_ndjson_export_can_be_gzip_encoded(client):
+    _, headers = auth_headers(client, 'gzip@example.com', 'senha-segura-123', 'Escola Gzip')
+    student_id = seed_student(client, headers, sessions=1)
+
+    response = client.get(f'/api/v1/students/{student_id}/export', headers={
+        **headers,
+        'Accept': 'application/x-ndjson',
+        'Accept-Encoding': 'gzip',
+    })
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    records = parse(gzip.decompress(response.data))
+    assert [record['type'] for record in records] == ['student', 'session', 'event', 'event', 'consent']
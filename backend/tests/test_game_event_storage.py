@@ -0,0 +1,132 @@
+"""Retention and partition planning for game_events storage."""
+
+import os
+import re
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from game_event_storage import PARTITIONED_TABLE_DDL, GameEventStorage, add_months, month_start, partition_name
+from tests.conftest import app_module
+
+UTC = timezone.utc
+
+
+def test_month_arithmetic_and_partition_names():
+    march = month_start(datetime(2026, 3, 17, 15, 30, tzinfo=UTC))
+    assert march == datetime(2026, 3, 1, tzinfo=UTC)
+    assert add_months(march, 10) == datetime(2027, 1, 1, tzinfo=UTC)
+    assert add_months(march, -3) == datetime(2025, 12, 1, tzinfo=UTC)
+    assert partition_name(add_months(march, 10)) == 'game_events_p2027_01'
+
+
+def test_partitioned_ddl_matches_game_event_model():
+    table = app_module.GameEvent.__table__
+    body = PARTITIONED_TABLE_DDL.split('(', 1)[1].rsplit(') PARTITION BY', 1)[0]
+    lines = [line.strip().rstrip(',') for line in body.strip().splitlines()]
+    primary_key = re.fullmatch(r'PRIMARY KEY \((.*)\)', lines.pop()).group(1).split(', ')
+    columns = dict(line.split(' ', 1) for line in lines)
+
+    assert list(columns) == [column.name for column in table.columns]
+    assert primary_key == [column.name for column in table.primary_key] + ['ocorrido_em']
+    assert 'PARTITION BY RANGE (ocorrido_em)' in PARTITIONED_TABLE_DDL
+    dialect = postgresql.dialect()
+    for column in table.columns:
+        definition = columns[column.name]
+        # The surrogate key becomes a BIGSERIAL because it is no longer unique on its own.
+        expected_type = 'BIGSERIAL' if column.primary_key else column.type.compile(dialect=dialect)
+        assert definition.startswith(expected_type + ' '), column.name
+        assert ('NOT NULL' in definition) == (not column.nullable or column.primary_key), column.name
+        for foreign_key in column.foreign_keys:
+            reference = f'REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})'
+            assert reference in definition, column.name
+            if foreign_key.ondelete:
+                assert f'ON DELETE {foreign_key.ondelete}' in definition, column.name
+        if not column.foreign_keys:
+            assert 'REFERENCES' not in definition, column.name
+
+
+def seeded_engine():
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE game_events (id INTEGER PRIMARY KEY, session_id INTEGER, tipo VARCHAR(60), payload_json JSON, ocorrido_em DATETIME)'
+        ))
+        for number, stamp in enumerate(['2025-01-10 10:00:00.000000', '2025-12-31 23:59:59.000000', '2026-01-01 00:00:00.000000', '2026-10-18 08:00:00.000000']):
+            connection.execute(text("INSERT INTO game_events VALUES (:id, 1, 'tap', '{}', :stamp)"), {'id': number, 'stamp': stamp})
+    return engine
+
+
+def test_sqlite_retention_deletes_expired_months():
+    engine = seeded_engine()
+    with engine.begin() as connection:
+        storage = GameEventStorage(connection, retention_months=9)
+        assert storage.retention_cutoff(datetime(2026, 10, 18, tzinfo=UTC)) == datetime(2026, 1, 1, tzinfo=UTC)
+        report = storage.maintain(now=datetime(2026, 10, 18, tzinfo=UTC))
+        assert report.created == [] and report.deleted_rows == 2
+        assert connection.execute(text('SELECT id FROM game_events ORDER BY id')).scalars().all() == [2, 3]
+
+
+def test_sqlite_retention_can_archive_and_zero_keeps_everything():
+    engine = seeded_engine()
+    with engine.begin() as connection:
+        assert GameEventStorage(connection).maintain(now=datetime(2026, 10, 18, tzinfo=UTC)).deleted_rows == 0
+        report = GameEventStorage(connection, retention_months=9).maintain(now=datetime(2026, 10, 18, tzinfo=UTC), archive=True)
+        assert report.archived == ['game_events_archive']
+        assert connection.execute(text('SELECT id FROM game_events_archive ORDER BY id')).scalars().all() == [0, 1]
+        assert connection.execute(text('SELECT COUNT(*) FROM game_events')).scalar() == 2
+
+
+def test_maintenance_cli_runs_on_development_database(app, runner):
+    result = runner.invoke(args=['maintain-game-events'])
+    assert result.exit_code == 0, result.output
+    assert 'Partições criadas: nenhuma' in result.output
+
+
+@pytest.fixture
+def postgres():
+    url = os.environ.get('TEST_POSTGRES_URL')
+    if not url:
+        pytest.skip('TEST_POSTGRES_URL não definido')
+    schema = f'pytest_game_events_{os.getpid()}'
+    admin = create_engine(url)
+    with admin.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA {schema}'))
+    engine = create_engine(url, connect_args={'options': f'-csearch_path={schema}'})
+    try:
+        with engine.begin() as connection:
+            connection.execute(text('CREATE TABLE game_sessions (id SERIAL PRIMARY KEY)'))
+            connection.execute(text('INSERT INTO game_sessions DEFAULT VALUES'))
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        admin.dispose()
+
+
+def events_in(connection, table):
+    return connection.execute(text(f'SELECT ocorrido_em FROM {table} ORDER BY ocorrido_em')).scalars().all()
+
+
+@pytest.mark.postgres
+def test_partitioned_storage_moves_and_expires_default_partition_rows(postgres):
+    with postgres.begin() as connection:
+        storage = GameEventStorage(connection, retention_months=3, partitions_ahead=1)
+        assert storage.create_partitioned_table(now=datetime(2026, 10, 18, tzinfo=UTC)) == ['game_events_p2026_10', 'game_events_p2026_11']
+        for stamp in (datetime(2026, 5, 10, tzinfo=UTC), datetime(2026, 9, 15, tzinfo=UTC), datetime(2026, 10, 20, tzinfo=UTC), datetime(2026, 12, 5, tzinfo=UTC)):
+            connection.execute(
+                text("INSERT INTO game_events (session_id, tipo, payload_json, ocorrido_em) VALUES (1, 'tap', '{}', :stamp)"),
+                {'stamp': stamp},
+            )
+        assert len(events_in(connection, 'game_events_default')) == 3
+
+        report = storage.maintain(now=datetime(2026, 12, 1, tzinfo=UTC))
+        assert report.created == ['game_events_p2026_12', 'game_events_p2027_01']
+        assert report.dropped == [] and report.deleted_rows == 1
+        assert events_in(connection, 'game_events_default') == [datetime(2026, 9, 15, tzinfo=UTC)]
+        assert events_in(connection, 'game_events_p2026_12') == [datetime(2026, 12, 5, tzinfo=UTC)]
+        assert len(events_in(connection, 'game_events')) == 3
+        assert storage.is_partitioned()
@@ -0,0 +1,100 @@
+"""Game event write path: bulk insert versus per-object ORM adds."""
+
+import time
+
+import pytest
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+from tests.test_roster import record_statements
+
+EVENTS_PER_SESSION = 200
+
+
+def make_sessions(count):
+    organization = app_module.Organization(nome='Escola Bench', slug=f'escola-bench-{count}')
+    user = app_module.User(nome='Bench', email=f'bench-{count}@example.com', senha='x')
+    app_module.db.session.add_all([organization, user])
+    app_module.db.session.flush()
+    student = app_module.StudentProfile(organization_id=organization.id, apelido='Perfil Bench')
+    app_module.db.session.add(student)
+    app_module.db.session.flush()
+    activity = app_module.Activity.query.first()
+    sessions = [
+        app_module.GameSession(
+            organization_id=organization.id,
+            student_id=student.id,
+            activity_id=activity.id,
+            created_by_user_id=user.id,
+            idempotency_key=f'bench-{count}-{number}',
+            game_type=activity.slug,
+        )
+        for number in range(count)
+    ]
+    app_module.db.session.add_all(sessions)
+    app_module.db.session.commit()
+    return [session.id for session in sessions]
+
+
+def event_payload():
+    return {'events': [{'type': 'tap', 'data': {'index': index, 'hit': index % 3 == 0}} for index in range(EVENTS_PER_SESSION)]}
+
+
+def test_completion_persists_events_in_bulk(app, client):
+    _, headers = auth_headers(client, 'eventos@example.com', 'senha-segura-123', 'Escola Eventos')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Eventos'}).get_json()['id']
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    created = client.post('/api/v1/gameplay/sessions', headers=headers, json={
+        'session_id': 'pytest-events-session-001',
+        'student_id': student_id,
+        'game_type': 'mestres-sinal',
+    }).get_json()
+
+    events = event_payload()['events'] + [{'type': 'extra'}]
+    response = client.post(f"/api/v1/gameplay/sessions/{created['id']}/complete", headers=headers, json={'score': 5, 'events': events})
+    assert response.status_code == 200
+    with app.app_context():
+        stored = app_module.GameEvent.query.order_by(app_module.GameEvent.id).all()
+        assert len(stored) == EVENTS_PER_SESSION
+        assert stored[3].payload_json == {'index': 3, 'hit': True}
+        assert all(event.ocorrido_em is not None for event in stored)
+
+
+def test_bulk_event_insert_skips_the_identity_map(app):
+    with app.app_context():
+        [session_id] = make_sessions(1)
+
+        def write():
+            app_module.write_game_events(app_module._event_rows(session_id, event_payload()))
+
+        _, statements = record_statements(app, write)
+        assert len(statements) == 1 and 'INSERT INTO game_events' in statements[0]
+        assert not any(isinstance(instance, app_module.GameEvent) for instance in app_module.db.session.identity_map.values())
+        app_module.db.session.commit()
+        assert app_module.GameEvent.query.count() == EVENTS_PER_SESSION
+
+
+@pytest.mark.slow
+def test_bulk_event_insert_timing_against_orm_add(app, record_property):
+    """Benchmark: reports ms per session for both write paths; no timing assert."""
+    sessions = 20
+    with app.app_context():
+        orm_sessions = make_sessions(sessions)
+        bulk_sessions = make_sessions(sessions + 1)[:sessions]
+
+        started = time.perf_counter()
+        for session_id in orm_sessions:
+            for row in app_module._event_rows(session_id, event_payload()):
+                app_module.db.session.add(app_module.GameEvent(**row))
+            app_module.db.session.commit()
+        orm_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for session_id in bulk_sessions:
+            app_module.write_game_events(app_module._event_rows(session_id, event_payload()))
+            app_module.db.session.commit()
+        bulk_seconds = time.perf_counter() - started
+
+        assert app_module.GameEvent.query.count() == 2 * sessions * EVENTS_PER_SESSION
+    record_property('orm_add_ms_per_session', round(orm_seconds * 1000 / sessions, 2))
+    record_property('bulk_insert_ms_per_session', round(bulk_seconds * 1000 / sessions, 2))
@@ -0,0 +1,68 @@
+"""Keyset pagination contract for history endpoints."""
+
+from tests.test_product_api import auth_headers
+
+
+def seed_sessions(client, headers, count):
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Paginado'}).get_json()['id']
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    for number in range(count):
+        response = client.post('/api/v1/gameplay/sync', headers=headers, json={
+            'session_id': f'pytest-page-session-{number:03d}',
+            'student_id': student_id,
+            'game_type': 'mestres-sinal',
+            'score': number,
+        })
+        assert response.status_code == 201
+    return student_id
+
+
+def walk(client, url, headers, key):
+    items, cursor, pages = [], None, 0
+    while True:
+        response = client.get(url, headers=headers, query_string={'limit': 2, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        items.extend(body[key])
+        pages += 1
+        cursor = body['next_cursor']
+        if not cursor:
+            return items, pages
+
+
+def test_progress_and_export_pages_are_stable_and_complete(client):
+    _, headers = auth_headers(client, 'paginas@example.com', 'senha-segura-123', 'Escola Paginas')
+    student_id = seed_sessions(client, headers, 5)
+
+    progress, pages = walk(client, f'/api/v1/students/{student_id}/progress', headers, 'sessions')
+    assert pages == 3
+    assert [session['score'] for session in progress] == [4, 3, 2, 1, 0]
+
+    exported, _ = walk(client, f'/api/v1/students/{student_id}/export', headers, 'sessions')
+    assert [session['score'] for session in exported] == [0, 1, 2, 3, 4]
+
+    legacy = client.get(f'/api/progresso/{student_id}', headers=headers)
+    assert legacy.status_code == 200
+    assert sorted(item['pontos'] for item in legacy.get_json()) == [0, 1, 2, 3, 4]
+
+
+def test_consents_and_audit_are_paged(client):
+    _, headers = auth_headers(client, 'auditoria@example.com', 'senha-segura-123', 'Escola Auditoria')
+    student_id = seed_sessions(client, headers, 1)
+    for _ in range(2):
+        client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+
+    consents, _ = walk(client, '/api/v1/consents', headers, 'consents')
+    assert len(consents) == 3
+    assert len({consent['id'] for consent in consents}) == 3
+
+    events, pages = walk(client, '/api/v1/audit-events', headers, 'events')
+    assert pages > 1
+    assert len({event['id'] for event in events}) == len(events)
+
+
+def test_invalid_cursor_is_rejected(client):
+    _, headers = auth_headers(client, 'cursor@example.com', 'senha-segura-123', 'Escola Cursor')
+    response = client.get('/api/v1/audit-events', headers=headers, query_string={'cursor': 'nao-e-um-cursor'})
+    assert response.status_code == 400
+    assert response.get_json()['code'] == 'INVALID_CURSOR'
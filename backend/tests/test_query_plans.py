@@ -0,0 +1,116 @@
+"""Query plan regression tests: hot API queries must be served by indexes.
+
+Each scenario drives the real endpoint, captures the SELECT statements it
+issues and runs EXPLAIN on them against seeded data. SQLite reports full table
+scans as ``SCAN <table>``; on PostgreSQL sequential scans are disabled first,
+so a remaining ``Seq Scan`` means no usable index exists.
+"""
+
+import re
+
+import pytest
+from sqlalchemy import event
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+from tests.test_roster import seed_roster
+
+HOT_TABLES = {'game_sessions', 'consents', 'audit_events', 'guardian_links', 'student_profiles', 'student_stats', 'organization_memberships'}
+
+
+def capture_selects(app, call):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = call()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code < 300, response.get_json()
+    return captured
+
+
+def full_scans(app, statements):
+    with app.app_context():
+        connection = app_module.db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            dialect = app_module.db.engine.dialect.name
+            if dialect == 'postgresql':
+                cursor.execute('SET enable_seqscan = off')
+            scans = []
+            for statement, parameters in statements:
+                if dialect == 'sqlite':
+                    cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+                    details = [row[-1] for row in cursor.fetchall()]
+                    pattern = re.compile(r'^SCAN (\w+)')
+                else:
+                    cursor.execute('EXPLAIN ' + statement, parameters)
+                    details = [row[0].strip() for row in cursor.fetchall()]
+                    pattern = re.compile(r'Seq Scan on (\w+)')
+                for detail in details:
+                    match = pattern.search(detail)
+                    if match and match.group(1) in HOT_TABLES:
+                        scans.append((match.group(1), statement))
+            return scans
+        finally:
+            connection.close()
+
+
+@pytest.fixture
+def seeded(app, client):
+    account, headers = auth_headers(client, 'planos@example.com', 'senha-segura-123', 'Escola Planos')
+    seed_roster(app, account['organization_id'], account['usuario']['id'], size=60, sessions_per_student=5)
+    for index in range(3):
+        _, other_headers = auth_headers(client, f'outra{index}@example.com', 'senha-segura-123', f'Outra {index}')
+        other_account = client.get('/api/v1/me', headers=other_headers).get_json()['usuario']
+        seed_roster(app, other_account['organizacoes'][0]['id'], other_account['id'], size=40, sessions_per_student=5)
+    with app.app_context():
+        if app_module.db.engine.dialect.name == 'sqlite':
+            app_module.db.session.execute(app_module.text('ANALYZE'))
+        student = app_module.StudentProfile.query.filter_by(organization_id=account['organization_id'], apelido='Perfil 0000').one()
+        return headers, student.id
+
+
+def assert_indexed(app, call):
+    scans = full_scans(app, capture_selects(app, call))
+    assert not scans, '\n\n'.join(f'{table}: {statement}' for table, statement in scans)
+
+
+def test_students_roster_uses_indexes(app, client, seeded):
+    headers, _ = seeded
+    assert_indexed(app, lambda: client.get('/api/v1/students', headers=headers))
+
+
+def test_progress_pages_use_indexes(app, client, seeded):
+    headers, student_id = seeded
+    url = f'/api/v1/students/{student_id}/progress'
+    first = client.get(url, headers=headers, query_string={'limit': 2}).get_json()
+    assert_indexed(app, lambda: client.get(url, headers=headers, query_string={'limit': 2, 'cursor': first['next_cursor']}))
+
+
+def test_consent_check_and_idempotency_lookup_use_indexes(app, client, seeded):
+    headers, student_id = seeded
+    payload = {'session_id': 'pytest-plan-session-001', 'student_id': student_id, 'game_type': 'mestres-sinal', 'score': 3}
+    assert client.post('/api/v1/gameplay/sync', headers=headers, json=payload).status_code == 201
+    assert_indexed(app, lambda: client.post('/api/v1/gameplay/sync', headers=headers, json=payload))
+
+
+def test_audit_listing_uses_indexes(app, client, seeded):
+    headers, _ = seeded
+    first = client.get('/api/v1/audit-events', headers=headers, query_string={'limit': 1}).get_json()
+    assert_indexed(app, lambda: client.get('/api/v1/audit-events', headers=headers, query_string={'limit': 1, 'cursor': first['next_cursor']}))
+
+
+def test_upgrade_schema_creates_missing_indexes(app):
+    with app.app_context():
+        app_module.db.session.execute(app_module.text('DROP INDEX ix_audit_events_org_created'))
+        app_module.db.session.commit()
+        assert app_module.upgrade_schema() == ['ix_audit_events_org_created']
+        assert app_module.upgrade_schema() == []
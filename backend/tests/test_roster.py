@@ -0,0 +1,135 @@
+"""Query budget tests for the student roster."""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+
+
+def seed_roster(app, organization_id, user_id, size, sessions_per_student=3):
+    with app.app_context():
+        activity = app_module.Activity.query.filter_by(slug='mestres-sinal').first()
+        for index in range(size):
+            student = app_module.StudentProfile(organization_id=organization_id, apelido=f'Perfil {index:04d}')
+            app_module.db.session.add(student)
+            app_module.db.session.flush()
+            if index % 2 == 0:
+                app_module.db.session.add(app_module.Consent(
+                    student_id=student.id,
+                    guardian_id=user_id,
+                    versao='2026-01',
+                    status='granted',
+                    concedido_em=app_module.utc_now(),
+                ))
+            for number in range(sessions_per_student):
+                app_module.db.session.add(app_module.GameSession(
+                    organization_id=organization_id,
+                    student_id=student.id,
+                    activity_id=activity.id,
+                    created_by_user_id=user_id,
+                    idempotency_key=f'roster-{student.id}-{number}',
+                    game_type=activity.slug,
+                    status='completed' if number else 'started',
+                    score=10 * (number + 1),
+                    completed_at=app_module.utc_now() - timedelta(minutes=number) if number else None,
+                ))
+        app_module.db.session.commit()
+        app_module.rebuild_student_stats()
+
+
+def record_statements(app, call):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = call()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return response, statements
+
+
+def count_queries(app, call):
+    response, statements = record_statements(app, call)
+    return response, len(statements)
+
+
+def test_roster_payload_matches_per_student_totals(app, client):
+    account, headers = auth_headers(client, 'roster@example.com', 'senha-segura-123', 'Escola Roster')
+    seed_roster(app, account['organization_id'], account['usuario']['id'], size=3)
+
+    response = client.get('/api/v1/students', headers=headers)
+    assert response.status_code == 200
+    students = response.get_json()['students']
+    assert [student['apelido'] for student in students] == ['Perfil 0000', 'Perfil 0001', 'Perfil 0002']
+    for index, student in enumerate(students):
+        assert student['pontos_totais'] == 50
+        assert student['jogos_completos'] == 2
+        assert student['nivel'] == 1
+        assert student['ultima_atividade'] is not None
+        assert student['consentimento_ativo'] is (index % 2 == 0)
+
+
+@pytest.mark.slow
+def test_roster_query_count_is_constant_as_roster_grows(app, client):
+    small_account, small_headers = auth_headers(client, 'small@example.com', 'senha-segura-123', 'Escola Pequena')
+    large_account, large_headers = auth_headers(client, 'large@example.com', 'senha-segura-123', 'Escola Grande')
+    seed_roster(app, small_account['organization_id'], small_account['usuario']['id'], size=5)
+    seed_roster(app, large_account['organization_id'], large_account['usuario']['id'], size=200)
+
+    small, small_queries = count_queries(app, lambda: client.get('/api/v1/students', headers=small_headers))
+    large, large_queries = count_queries(app, lambda: client.get('/api/v1/students', headers=large_headers))
+
+    assert small.status_code == 200 and len(small.get_json()['students']) == 5
+    assert large.status_code == 200 and len(large.get_json()['students']) == 200
+    assert large_queries == small_queries
+
+
+def test_completion_updates_student_stats_incrementally(app, client):
+    _, headers = auth_headers(client, 'stats@example.com', 'senha-segura-123', 'Escola Stats')
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': 'Perfil Stats'}).get_json()['id']
+    client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+
+    for number, (score, acertos, erros) in enumerate([(30, 6, 2), (50, 9, 1), (20, 2, 2)]):
+        response = client.post('/api/v1/gameplay/sync', headers=headers, json={
+            'session_id': f'pytest-stats-session-{number:03d}',
+            'student_id': student_id,
+            'game_type': 'mestres-sinal',
+            'score': score,
+            'acertos': acertos,
+            'erros': erros,
+        })
+        assert response.status_code == 201
+    duplicate = client.post('/api/v1/gameplay/sync', headers=headers, json={
+        'session_id': 'pytest-stats-session-000',
+        'student_id': student_id,
+        'game_type': 'mestres-sinal',
+        'score': 30,
+    })
+    assert duplicate.status_code == 200
+
+    progress = client.get(f'/api/v1/students/{student_id}/progress', headers=headers).get_json()
+    assert progress['student']['pontos_totais'] == 100
+    assert progress['student']['jogos_completos'] == 3
+    [activity] = progress['activities']
+    assert activity['game_type'] == 'mestres-sinal'
+    assert activity['melhor_pontuacao'] == 50
+    assert activity['melhor_precisao'] == 0.9
+    assert activity['precisao'] == round(17 / 22, 4)
+
+    legacy = client.get('/api/alunos', headers=headers).get_json()
+    assert legacy[0]['pontos_totais'] == 100
+
+    with app.app_context():
+        incremental = app_module.db.session.get(app_module.StudentStats, student_id)
+        expected = (incremental.completed_count, incremental.score_sum)
+        app_module.rebuild_student_stats()
+        rebuilt = app_module.db.session.get(app_module.StudentStats, student_id)
+        assert (rebuilt.completed_count, rebuilt.score_sum) == expected
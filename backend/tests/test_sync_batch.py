@@ -0,0 +1,80 @@
+"""Bulk offline gameplay sync."""
+
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+from tests.test_roster import count_queries
+
+
+def student_with_consent(client, headers, apelido='Perfil Lote', consent=True):
+    student_id = client.post('/api/v1/students', headers=headers, json={'apelido': apelido}).get_json()['id']
+    if consent:
+        client.post('/api/v1/consents', headers=headers, json={'student_id': student_id, 'status': 'granted'})
+    return student_id
+
+
+def session_item(student_id, number, **overrides):
+    return {
+        'session_id': f'pytest-batch-session-{student_id}-{number:04d}',
+        'student_id': student_id,
+        'game_type': 'mestres-sinal',
+        'score': 10,
+        'acertos': 3,
+        'erros': 1,
+        'events': [{'type': 'round_completed', 'data': {'round': 1}}],
+        **overrides,
+    }
+
+
+def test_batch_sync_reports_created_duplicate_and_rejected(app, client):
+    _, headers = auth_headers(client, 'lote@example.com', 'senha-segura-123', 'Escola Lote')
+    student_id = student_with_consent(client, headers)
+    blocked_id = student_with_consent(client, headers, 'Perfil Sem Consentimento', consent=False)
+    assert client.post('/api/v1/gameplay/sync', headers=headers, json=session_item(student_id, 0)).status_code == 201
+
+    response = client.post('/api/v1/gameplay/sync/batch', headers=headers, json={'sessions': [
+        session_item(student_id, 0),
+        session_item(student_id, 1),
+        session_item(student_id, 1),
+        session_item(student_id, 2, game_type='jogo-inexistente'),
+        session_item(blocked_id, 3),
+        session_item(999999, 4),
+        session_item(student_id, 5, score=40),
+        'invalido',
+    ]})
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert [result['status'] for result in body['results']] == [
+        'duplicate', 'created', 'duplicate', 'rejected', 'rejected', 'rejected', 'created', 'rejected',
+    ]
+    assert [result.get('code') for result in body['results'] if result['status'] == 'rejected'] == [404, 403, 404, 400]
+    assert body['summary'] == {'created': 2, 'duplicate': 2, 'rejected': 4}
+
+    progress = client.get(f'/api/v1/students/{student_id}/progress', headers=headers).get_json()
+    assert progress['student']['jogos_completos'] == 3
+    assert progress['student']['pontos_totais'] == 60
+    with app.app_context():
+        assert app_module.GameEvent.query.count() == 3
+
+
+def test_batch_sync_query_count_does_not_grow_with_batch_size(app, client):
+    _, headers = auth_headers(client, 'reconexao@example.com', 'senha-segura-123', 'Escola Reconexao')
+    students = [student_with_consent(client, headers, f'Perfil {index}') for index in range(4)]
+
+    def sync(offset, size):
+        items = [session_item(students[number % len(students)], offset + number) for number in range(size)]
+        return client.post('/api/v1/gameplay/sync/batch', headers=headers, json={'sessions': items})
+
+    sync(200, 4)  # warm the consent cache so both measurements see the same hit rate
+    small, small_queries = count_queries(app, lambda: sync(0, 4))
+    large, large_queries = count_queries(app, lambda: sync(100, 60))
+    assert small.get_json()['summary']['created'] == 4
+    assert large.get_json()['summary']['created'] == 60
+    assert large_queries == small_queries
+
+
+def test_batch_sync_enforces_size_limit(app, client):
+    _, headers = auth_headers(client, 'limite@example.com', 'senha-segura-123', 'Escola Limite')
+    items = [session_item(1, number) for number in range(app.config['GAMEPLAY_SYNC_BATCH_MAX'] + 1)]
+    response = client.post('/api/v1/gameplay/sync/batch', headers=headers, json={'sessions': items})
+    assert response.status_code == 413
+    assert response.get_json()['code'] == 'BATCH_TOO_LARGE'
@@ -0,0 +1,52 @@
+"""Typed hot columns for cognitive_events."""
+
+import json
+import sqlite3
+
+import telemetry_service
+from telemetry_service import EVENT_CODES, MIGRATIONS, TelemetryService
+
+
+def test_hot_fields_are_stored_in_typed_columns(tmp_path):
+    connection = sqlite3.connect(tmp_path / 'telemetry.db')
+    service = TelemetryService(connection)
+    service.process_batch([
+        {'session_id': 's1', 'event_type': 'go_nogo_response', 'timestamp': 't1', 'was_correct': True, 'reaction_time_ms': 412, 'stimulus': 'azul'},
+        {'session_id': 's1', 'event_type': 'math_solve', 'timestamp': 't2', 'was_correct': 'sim', 'reaction_time_ms': 'lento'},
+        {'session_id': 's1', 'event_type': 'power_up', 'timestamp': 't3'},
+    ])
+
+    rows = connection.execute('SELECT event_code, was_correct, reaction_time_ms, event_data FROM cognitive_events ORDER BY id').fetchall()
+    assert [(code, correct, reaction) for code, correct, reaction, _ in rows] == [
+        (EVENT_CODES['go_nogo_response'], 1, 412),
+        (EVENT_CODES['math_solve'], 1, None),
+        (0, None, None),
+    ]
+    # Only the lossless conversions leave the JSON blob.
+    assert [json.loads(row[3]) for row in rows] == [{'stimulus': 'azul'}, {'was_correct': 'sim', 'reaction_time_ms': 'lento'}, {}]
+
+
+def test_migration_moves_json_fields_into_columns(tmp_path, monkeypatch):
+    path = tmp_path / 'telemetry.db'
+    monkeypatch.setattr(telemetry_service, 'MIGRATIONS', MIGRATIONS[:3])
+    TelemetryService(sqlite3.connect(path)).migrate()
+    with sqlite3.connect(path) as connection:
+        connection.executemany(
+            'INSERT INTO cognitive_events (session_id, user_id, game_module, event_type, timestamp, event_data) VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                ('s1', 7, 'cyber_runner', 'go_nogo_response', 't1', json.dumps({'was_correct': True, 'reaction_time_ms': 300})),
+                ('s1', 7, 'cyber_runner', 'go_nogo_response', 't2', json.dumps({'was_correct': False, 'reaction_time_ms': 500, 'extra': 1})),
+            ],
+        )
+    monkeypatch.undo()
+
+    service = TelemetryService(sqlite3.connect(path))
+    assert service.migrate() == [version for version, _ in MIGRATIONS[3:]]
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute('SELECT event_code, was_correct, reaction_time_ms, event_data FROM cognitive_events ORDER BY id').fetchall()
+    assert rows == [(EVENT_CODES['go_nogo_response'], 1, 300.0, '{}'), (EVENT_CODES['go_nogo_response'], 0, 500.0, '{"extra":1}')]
+
+    service.rebuild_session_metrics()
+    progress = service.get_user_progress(7, 'cyber_runner')
+    assert progress['sessions'][0] == service.get_session_summary('s1')
+    assert progress['sessions'][0]['metrics']['go_nogo']['avg_reaction_time'] == 400
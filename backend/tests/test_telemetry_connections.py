@@ -0,0 +1,98 @@
+"""Telemetry SQLite connections: pooled readers, one writer, fork safety."""
+
+import sqlite3
+import threading
+
+import pytest
+
+import telemetry_service
+from telemetry_service import SQLiteConnections, TelemetryService
+from tests.test_telemetry_ingest import SCHEMA, make_events
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = str(tmp_path / 'telemetry.db')
+    with sqlite3.connect(path) as connection:
+        connection.execute(SCHEMA)
+    service = TelemetryService.from_path(path, busy_timeout_ms=2500)
+    yield service
+    service.connections.close()
+
+
+def test_connections_open_lazily_and_readers_are_separate(service):
+    connections = service.connections
+    assert connections._writer is None
+
+    with connections.writer() as writer, connections.reader() as reader:
+        assert writer is not reader
+        assert writer.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert writer.execute('PRAGMA busy_timeout').fetchone()[0] == 2500
+        assert reader.execute('PRAGMA query_only').fetchone()[0] == 1
+
+    with connections.reader() as first, connections.reader() as second:
+        assert first is not second
+
+
+def test_readers_of_finished_threads_are_reused_and_bounded(service, monkeypatch):
+    connections = service.connections
+    opened = []
+    monkeypatch.setattr(connections, '_open', lambda original=connections._open: opened.append(1) or original())
+    barrier = threading.Barrier(8)
+
+    def read_in_thread():
+        with connections.reader() as reader:
+            reader.execute('SELECT 1').fetchone()
+            barrier.wait()
+
+    for _ in range(3):
+        threads = [threading.Thread(target=read_in_thread) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    # Each round reuses the idle readers and opens (then closes) only the rest
+    assert len(opened) == 8 + 2 * (8 - connections.max_idle_readers)
+    assert len(connections._idle_readers) == connections.max_idle_readers
+
+
+def test_concurrent_ingest_and_summaries(service):
+    errors = []
+
+    def ingest(worker):
+        for batch in range(5):
+            events = [{**event, 'session_id': f'w{worker}-b{batch}'} for event in make_events(50)]
+            result = service.process_batch(events)
+            if result['processed'] != 50:
+                errors.append(result)
+
+    def read(worker):
+        for batch in range(5):
+            summary = service.get_session_summary(f'w{worker}-b{batch}')
+            if 'error' not in summary and summary['total_events'] != 50:
+                errors.append(summary)
+
+    threads = [threading.Thread(target=target, args=(worker,)) for worker in range(4) for target in (ingest, read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert service.get_session_summary('w3-b4')['total_events'] == 50
+
+
+def test_connections_are_reopened_after_fork(service, monkeypatch):
+    connections = service.connections
+    with connections.writer() as parent_writer, connections.reader() as parent_reader:
+        pass
+    monkeypatch.setattr(telemetry_service.os, 'getpid', lambda: -1)
+    with connections.writer() as child_writer, connections.reader() as child_reader:
+        assert child_writer is not parent_writer
+        assert child_reader is not parent_reader
+
+
+def test_memory_databases_need_a_single_connection():
+    with pytest.raises(ValueError):
+        SQLiteConnections(':memory:')
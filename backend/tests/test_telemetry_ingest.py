@@ -0,0 +1,109 @@
+"""Telemetry ingestion: one transaction per batch with per-event error reporting."""
+
+import sqlite3
+import time
+
+import pytest
+
+from telemetry_service import INSERT_EVENT_SQL, TelemetryService
+
+SCHEMA = """
+CREATE TABLE cognitive_events (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    game_module TEXT,
+    event_type TEXT,
+    timestamp TEXT,
+    event_data TEXT
+)
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute(SCHEMA)
+    connection.commit()
+    return connection
+
+
+def make_events(count):
+    return [{
+        'session_id': f'sessao-{index // 100}',
+        'game_module': 'cyber_runner',
+        'event_type': 'go_nogo_response',
+        'timestamp': f'2026-01-01T00:00:{index % 60:02d}',
+        'was_correct': index % 4 != 0,
+        'reaction_time_ms': 300 + index % 200,
+    } for index in range(count)]
+
+
+def test_batch_is_written_in_one_transaction(tmp_path):
+    connection = connect(tmp_path / 'telemetry.db')
+    service = TelemetryService(connection)
+    service.ensure_schema()
+    commits = []
+    connection.set_trace_callback(lambda statement: commits.append(statement) if statement.upper().startswith('COMMIT') else None)
+
+    result = service.process_batch(make_events(500))
+
+    assert result == {'success': True, 'processed': 500, 'total': 500, 'errors': []}
+    assert len(commits) == 1
+    assert connection.execute('SELECT COUNT(*) FROM cognitive_events').fetchone()[0] == 500
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert connection.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+
+
+def test_invalid_events_are_reported_individually(tmp_path):
+    connection = connect(tmp_path / 'telemetry.db')
+    service = TelemetryService(connection)
+    events = make_events(4)
+    events[1] = 'nao-e-evento'
+    events[2] = {**events[2], 'session_id': None}  # rejected by the NOT NULL constraint
+
+    result = service.process_batch(events)
+
+    assert result['processed'] == 2
+    assert [error['event'] for error in result['errors']] == ['nao-e-evento', events[2]]
+    assert 'NOT NULL' in result['errors'][1]['error']
+    stored = [row[0] for row in connection.execute('SELECT reaction_time_ms FROM cognitive_events ORDER BY id')]
+    assert stored == [events[0]['reaction_time_ms'], events[3]['reaction_time_ms']]
+
+
+def test_large_batch_is_written_with_one_commit(tmp_path):
+    connection = connect(tmp_path / 'telemetry.db')
+    service = TelemetryService(connection)
+    service.ensure_schema()
+    commits = []
+    connection.set_trace_callback(lambda statement: commits.append(statement) if statement.upper().startswith('COMMIT') else None)
+
+    assert service.process_batch(make_events(10_000))['processed'] == 10_000
+    assert len(commits) == 1
+    assert connection.execute('SELECT COUNT(*) FROM cognitive_events').fetchone()[0] == 10_000
+
+
+@pytest.mark.slow
+def test_batched_ingest_throughput_against_commit_per_event(tmp_path, record_property):
+    """Benchmark: reports events/s before and after in the test properties; no timing assert."""
+    events = make_events(10_000)
+
+    # Previous write path: one INSERT and one COMMIT (fsync) per event, default journal.
+    schema = TelemetryService(sqlite3.connect(tmp_path / 'baseline.db'))
+    schema.migrate()
+    schema.connections.close()
+    baseline = sqlite3.connect(tmp_path / 'baseline.db')
+    baseline.execute('PRAGMA journal_mode=DELETE')
+    baseline.execute('PRAGMA synchronous=FULL')
+    started = time.perf_counter()
+    for event in events:
+        baseline.execute(INSERT_EVENT_SQL, TelemetryService._event_row(event))
+        baseline.commit()
+    before = len(events) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    result = TelemetryService(connect(tmp_path / 'batched.db')).process_batch(events)
+    after = len(events) / (time.perf_counter() - started)
+
+    assert result['processed'] == len(events)
+    assert baseline.execute('SELECT COUNT(*) FROM cognitive_events').fetchone()[0] == len(events)
+    record_property('commit_per_event_events_per_second', round(before))
+    record_property('single_batch_events_per_second', round(after))
@@ -0,0 +1,56 @@
+"""Per-session telemetry totals maintained at ingest time."""
+
+import sqlite3
+
+from telemetry_service import INSERT_EVENT_SQL, TelemetryService
+from tests.conftest import app_module
+from tests.test_telemetry_progress import session_events
+
+
+def test_summary_is_a_single_metrics_read_and_matches_rebuild(tmp_path):
+    connection = sqlite3.connect(tmp_path / 'telemetry.db')
+    service = TelemetryService(connection)
+    events = session_events('sessao-a', 1, hits=7, misses=3, reaction_time_ms=420)
+    for start in range(0, len(events), 4):
+        service.process_batch(events[start:start + 4])
+
+    statements = []
+    connection.set_trace_callback(statements.append)
+    incremental = service.get_session_summary('sessao-a')
+    connection.set_trace_callback(None)
+    assert len(statements) == 1 and 'session_metrics' in statements[0]
+    assert incremental['total_events'] == len(events)
+    assert incremental['metrics']['go_nogo']['correct_responses'] == 7
+    assert incremental['metrics']['go_nogo']['avg_reaction_time'] == 420
+    assert incremental['metrics']['math']['accuracy'] == 1
+
+    assert service.rebuild_session_metrics() == 3
+    assert service.get_session_summary('sessao-a') == incremental
+
+
+def test_rejected_events_do_not_count(tmp_path):
+    connection = sqlite3.connect(tmp_path / 'telemetry.db')
+    service = TelemetryService(connection)
+    service.ensure_schema()
+    connection.execute("CREATE TRIGGER reject_slow BEFORE INSERT ON cognitive_events WHEN NEW.reaction_time_ms > 1000 BEGIN SELECT RAISE(ABORT, 'lento demais'); END")
+    events = session_events('sessao-b', 1, hits=2, misses=0, reaction_time_ms=500)
+    events.append({**events[1], 'reaction_time_ms': 5000})
+
+    result = service.process_batch(events)
+    assert [error['error'] for error in result['errors']] == ['lento demais']
+    summary = service.get_session_summary('sessao-b')
+    assert summary['total_events'] == len(events) - 1
+    assert summary['metrics']['go_nogo']['total_responses'] == 2
+
+
+def test_rebuild_command_backfills_raw_events(app, runner, tmp_path, monkeypatch):
+    service = TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db', check_same_thread=False))
+    monkeypatch.setattr(app_module, 'telemetry_service', service)
+    service.ensure_schema()
+    with service.connections.writer() as connection, connection:
+        connection.executemany(INSERT_EVENT_SQL, [TelemetryService._event_row(event) for event in session_events('sessao-c', 1, 3, 1, 300)])
+    assert 'error' in service.get_session_summary('sessao-c')
+
+    result = runner.invoke(args=['rebuild-telemetry-metrics'])
+    assert result.exit_code == 0, result.output
+    assert service.get_session_summary('sessao-c')['metrics']['go_nogo']['correct_responses'] == 3
@@ -0,0 +1,113 @@
+"""Incremental, date-partitioned Parquet export of telemetry."""
+
+import sqlite3
+
+import pytest
+
+from telemetry_service import TelemetryService
+from tests.conftest import app_module
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def events(day, session_id, count, module='cyber_runner'):
+    return [{
+        'session_id': session_id,
+        'user_id': 7,
+        'game_module': module,
+        'event_type': 'go_nogo_response',
+        'timestamp': f'{day}T10:{59 - number:02d}:00Z',
+        'was_correct': number % 2 == 0,
+        'reaction_time_ms': 300 + number,
+        'stimulus': 'azul',
+    } for number in range(count)]
+
+
+@pytest.fixture
+def service(tmp_path):
+    return TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db', check_same_thread=False))
+
+
+def test_export_is_typed_sorted_and_partitioned(service, tmp_path):
+    service.process_batch(events('2026-03-01', 'b', 3) + events('2026-03-02', 'a', 2) + events('2026-03-01', 'a', 2, module='math_quest'))
+
+    report = service.export_parquet(tmp_path / 'dataset')
+    assert report['exported'] == 7
+    assert [path.split('/')[-2] for path in report['files']] == ['date=2026-03-01', 'date=2026-03-02']
+
+    table = pq.read_table(report['files'][0])
+    assert pa.types.is_dictionary(table.schema.field('session_id').type)
+    assert table.schema.field('timestamp').type == pa.timestamp('us', tz='UTC')
+    assert table.schema.field('was_correct').type == pa.bool_()
+    rows = table.to_pylist()
+    keys = [(row['game_module'], row['session_id'], row['timestamp']) for row in rows]
+    assert keys == sorted(keys)
+    assert rows[0]['event_data'] == '{"stimulus": "azul"}'
+    metadata = pq.ParquetFile(report['files'][0]).metadata.row_group(0)
+    assert [column.column_index for column in metadata.sorting_columns] == [3, 1, 6]
+
+
+def test_export_is_incremental_from_watermark(service, tmp_path):
+    service.process_batch(events('2026-03-01', 'a', 2))
+    first = service.export_parquet(tmp_path / 'dataset')
+    assert service.export_parquet(tmp_path / 'dataset') == {'exported': 0, 'files': [], 'watermark': first['watermark']}
+
+    service.process_batch(events('2026-03-01', 'b', 3))
+    second = service.export_parquet(tmp_path / 'dataset')
+    assert second['exported'] == 3
+    assert set(second['files']).isdisjoint(first['files'])
+
+    dataset = pq.read_table(tmp_path / 'dataset', partitioning='hive')
+    assert dataset.num_rows == 5
+    assert sorted(set(dataset.column('session_id').to_pylist())) == ['a', 'b']
+
+
+def test_export_command(app, runner, service, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'telemetry_service', service)
+    service.process_batch(events('2026-03-05', 'a', 1))
+    result = runner.invoke(args=['export-telemetry-parquet', '--output', str(tmp_path / 'dataset')])
+    assert result.exit_code == 0, result.output
+    assert 'Eventos exportados: 1' in result.output
+
+
+def test_interrupted_export_is_redone_without_duplicates(service, tmp_path, monkeypatch):
+    dataset = tmp_path / 'dataset'
+    service.process_batch(events('2026-03-01', 'a', 2))
+    service.export_parquet(dataset)
+    # Crashed after publishing its files but before advancing the watermark
+    with service.connections.writer() as db, db:
+        db.execute('DELETE FROM telemetry_export_watermarks')
+    service.process_batch(events('2026-03-02', 'b', 1))
+
+    def interrupted(*args, **kwargs):
+        raise RuntimeError('interrompido')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pa, 'array', interrupted)
+        with pytest.raises(RuntimeError):
+            service.export_parquet(dataset)
+    assert [path.name for path in dataset.rglob('.*.tmp')]
+    assert pq.read_table(dataset, partitioning='hive').num_rows == 2
+
+    report = service.export_parquet(dataset)
+    assert report['exported'] == 3
+    assert pq.read_table(dataset, partitioning='hive').num_rows == 3
+    assert sorted(str(path) for path in dataset.rglob('*.parquet')) == report['files']
+    assert not list(dataset.rglob('.*'))
+
+
+def test_day_and_order_follow_the_utc_timestamp(service, tmp_path):
+    service.process_batch([
+        {**events('2026-03-02', 'a', 1)[0], 'timestamp': '2026-03-02T01:00:00Z'},
+        {**events('2026-03-02', 'a', 1)[0], 'timestamp': '2026-03-01T23:30:00-03:00'},  # 02:30 UTC
+        {**events('2026-03-02', 'a', 1)[0], 'timestamp': '2026-03-02T08:00:00+0530'},  # 02:30 UTC
+        {**events('2026-03-02', 'a', 1)[0], 'timestamp': '2026-03-02T02:00:00+00:00'},
+    ])
+
+    report = service.export_parquet(tmp_path / 'dataset')
+    [path] = report['files']
+    assert path.split('/')[-2] == 'date=2026-03-02'
+    stamps = [row['timestamp'].isoformat() for row in pq.read_table(path).to_pylist()]
+    assert stamps == sorted(stamps)
+    assert stamps[0] == '2026-03-02T01:00:00+00:00' and stamps[-1] == '2026-03-02T02:30:00+00:00'
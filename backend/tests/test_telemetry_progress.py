@@ -0,0 +1,73 @@
+"""User progress: one grouped query per user and module."""
+
+import sqlite3
+
+import pytest
+
+from telemetry_service import TelemetryService
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+
+
+def session_events(session_id, user_id, hits, misses, reaction_time_ms, module='cyber_runner'):
+    events = [{'session_id': session_id, 'user_id': user_id, 'game_module': module, 'event_type': 'session_start', 'timestamp': f'{session_id}-0'}]
+    for number in range(hits + misses):
+        events.append({
+            'session_id': session_id,
+            'user_id': user_id,
+            'game_module': module,
+            'event_type': 'go_nogo_response',
+            'timestamp': f'{session_id}-{number + 1:03d}',
+            'was_correct': number < hits,
+            'reaction_time_ms': reaction_time_ms if number % 3 else 0,
+        })
+    events.append({'session_id': session_id, 'user_id': user_id, 'game_module': module, 'event_type': 'math_solve', 'timestamp': f'{session_id}-999', 'was_correct': True, 'reaction_time_ms': 900})
+    return events
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db'))
+    service.process_batch(
+        session_events('2026-01-01-a', 7, hits=6, misses=4, reaction_time_ms=500)
+        + session_events('2026-01-02-b', 7, hits=9, misses=1, reaction_time_ms=400)
+        + session_events('2026-01-03-c', 8, hits=1, misses=9, reaction_time_ms=900)
+        + session_events('2026-01-04-d', 7, hits=5, misses=5, reaction_time_ms=300, module='math_quest')
+    )
+    return service
+
+
+def test_progress_matches_per_session_summaries_and_filters_by_user(service):
+    progress = service.get_user_progress(7, 'cyber_runner')
+
+    assert [session['session_id'] for session in progress['sessions']] == ['2026-01-01-a', '2026-01-02-b']
+    for session in progress['sessions']:
+        assert session == service.get_session_summary(session['session_id'])
+    assert progress['trends']['accuracy_improvement']['change'] == pytest.approx(0.3)
+    assert service.get_user_progress(8, 'cyber_runner')['total_sessions'] == 1
+    assert 'error' in service.get_user_progress(9, 'cyber_runner')
+
+
+def test_progress_is_a_single_query(service):
+    statements = []
+    with service.connections.reader() as connection:
+        connection.set_trace_callback(statements.append)
+        service.get_user_progress(7, 'cyber_runner')
+        connection.set_trace_callback(None)
+    assert len(statements) == 1
+
+
+def test_batch_endpoint_stamps_the_authenticated_user(app, client, tmp_path, monkeypatch):
+    service = TelemetryService(sqlite3.connect(tmp_path / 'endpoint.db', check_same_thread=False))
+    monkeypatch.setattr(app_module, 'telemetry_service', service)
+    account, headers = auth_headers(client, 'telemetria@example.com', 'senha-segura-123', 'Escola Telemetria')
+    events = session_events('2026-02-01-x', 999, hits=3, misses=1, reaction_time_ms=450)
+
+    response = client.post('/api/telemetry/batch', headers=headers, json={'events': events})
+    assert response.status_code == 200 and response.get_json()['processed'] == len(events)
+
+    assert 'error' in service.get_user_progress(999, 'cyber_runner')
+    progress = service.get_user_progress(account['usuario']['id'], 'cyber_runner')
+    assert progress['sessions'][0]['metrics']['go_nogo']['correct_responses'] == 3
+    summary = client.get('/api/telemetry/session/2026-02-01-x', headers=headers).get_json()
+    assert summary['total_events'] == len(events)
@@ -0,0 +1,99 @@
+"""Queued telemetry ingest: 202 on accept, 429 with Retry-After when full."""
+
+import sqlite3
+
+import pytest
+
+from telemetry_service import TelemetryIngestQueue, TelemetryService
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+from tests.test_telemetry_progress import session_events
+
+
+@pytest.fixture
+def service(tmp_path):
+    return TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db', check_same_thread=False))
+
+
+def submit(queue, service, events):
+    rows, accepted, _ = service.validate_events(events)
+    return queue.submit(rows, accepted)
+
+
+def test_queue_drains_in_large_transactions(service):
+    queue = TelemetryIngestQueue(service, max_events=1000, batch_events=500, flush_interval_ms=60_000)
+    for number in range(10):
+        assert submit(queue, service, session_events(f'sessao-{number}', 1, hits=3, misses=2, reaction_time_ms=400))
+    assert queue.stats()['depth'] == 70
+
+    assert queue.drain() == 70
+    stats = queue.stats()
+    assert (stats['depth'], stats['written'], stats['batches']) == (0, 70, 1)
+    assert service.get_session_summary('sessao-9')['total_events'] == 7
+    queue.close()
+
+
+def test_full_queue_rejects_whole_batch(service):
+    queue = TelemetryIngestQueue(service, max_events=10, batch_events=100, flush_interval_ms=60_000)
+    events = session_events('sessao-cheia', 1, hits=3, misses=2, reaction_time_ms=400)
+    assert submit(queue, service, events)
+    assert not submit(queue, service, events)
+    assert queue.stats()['rejected'] == len(events)
+    assert queue.retry_after() >= 1
+    queue.close()
+    assert queue.stats()['written'] == len(events)
+
+
+@pytest.fixture
+def queued_endpoint(app, service, monkeypatch):
+    queue = TelemetryIngestQueue(service, max_events=10, batch_events=100, flush_interval_ms=60_000)
+    monkeypatch.setitem(app.config, 'TELEMETRY_INGEST_MODE', 'queue')
+    monkeypatch.setattr(app_module, 'telemetry_service', service)
+    monkeypatch.setattr(app_module, 'telemetry_queue', queue)
+    yield queue
+    queue.close()
+
+
+def test_endpoint_accepts_with_202_and_applies_backpressure(client, queued_endpoint):
+    _, headers = auth_headers(client, 'fila@example.com', 'senha-segura-123', 'Escola Fila')
+    events = session_events('sessao-fila', 1, hits=3, misses=2, reaction_time_ms=400)
+
+    response = client.post('/api/telemetry/batch', headers=headers, json={'events': events})
+    assert response.status_code == 202
+    assert response.get_json()['queued'] == len(events)
+    assert response.get_json()['queue_depth'] == len(events)
+    assert client.get('/health').get_json()['telemetry_queue']['depth'] == len(events)
+
+    full = client.post('/api/telemetry/batch', headers=headers, json={'events': events})
+    assert full.status_code == 429
+    assert full.get_json()['code'] == 'TELEMETRY_BACKPRESSURE'
+    assert int(full.headers['Retry-After']) >= 1
+
+    queued_endpoint.drain()
+    summary = client.get('/api/telemetry/session/sessao-fila', headers=headers).get_json()
+    assert summary['total_events'] == len(events)
+
+
+def test_endpoint_stamps_missing_timestamps_on_receipt(client, queued_endpoint, service, monkeypatch):
+    _, headers = auth_headers(client, 'filahora@example.com', 'senha-segura-123', 'Escola Fila Hora')
+    events = [{key: value for key, value in event.items() if key != 'timestamp'} for event in session_events('sessao-hora', 1, hits=1, misses=0, reaction_time_ms=400)]
+    assert client.post('/api/telemetry/batch', headers=headers, json={'events': events}).status_code == 202
+
+    received = [row[0] for row in queued_endpoint._events]
+    monkeypatch.setattr(service, 'validate_events', lambda events: pytest.fail('writer validated again'))
+    queued_endpoint.drain()
+    with service.connections.reader() as connection:
+        stored = connection.execute("SELECT timestamp FROM cognitive_events WHERE session_id = 'sessao-hora' ORDER BY id").fetchall()
+    assert [row[0] for row in stored] == [row[5] for row in received]
+    assert all(row[5] for row in received)
+
+
+def test_batch_larger_than_the_queue_is_rejected_with_413(client, queued_endpoint):
+    _, headers = auth_headers(client, 'filagrande@example.com', 'senha-segura-123', 'Escola Fila Grande')
+    events = session_events('sessao-grande', 1, hits=8, misses=5, reaction_time_ms=400)
+    assert len(events) > queued_endpoint.max_events
+
+    response = client.post('/api/telemetry/batch', headers=headers, json={'events': events})
+    assert response.status_code == 413
+    assert response.get_json()['code'] == 'TELEMETRY_BATCH_TOO_LARGE'
+    assert queued_endpoint.stats()['rejected'] == 0
@@ -0,0 +1,131 @@
+"""Per-module telemetry rollups at minute, hour and day grain."""
+
+import math
+import sqlite3
+
+import pytest
+
+from telemetry_service import INSERT_EVENT_SQL, TelemetryService
+from tests.conftest import app_module
+from tests.test_product_api import auth_headers
+
+
+def response(timestamp, was_correct, reaction_time_ms, module='cyber_runner'):
+    return {
+        'session_id': f'sessao-{timestamp[:10]}',
+        'user_id': 1,
+        'game_module': module,
+        'event_type': 'go_nogo_response',
+        'timestamp': timestamp,
+        'was_correct': was_correct,
+        'reaction_time_ms': reaction_time_ms,
+    }
+
+
+EVENTS = [
+    response('2026-03-01T10:15:05Z', True, 400),
+    response('2026-03-01T10:15:40Z', False, 600),
+    response('2026-03-01T10:47:00Z', True, 0),
+    response('2026-03-01T23:30:00-03:00', True, 500),  # 02:30 UTC do dia seguinte
+    response('2026-03-02T09:00:00', False, 300),
+    response('2026-03-02T09:00:00', True, 900, module='math_quest'),
+    {'session_id': 'sessao-x', 'game_module': 'cyber_runner', 'event_type': 'session_start', 'timestamp': '2026-03-02T09:00:30Z'},
+]
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db'))
+    for start in range(0, len(EVENTS), 3):
+        service.process_batch(EVENTS[start:start + 3])
+    return service
+
+
+def test_day_aligned_range_reads_daily_buckets(service):
+    rollups = service.get_rollups('cyber_runner', '2026-03-01', '2026-03-03')
+    assert rollups['grain'] == 'day'
+    assert [bucket['bucket_start'] for bucket in rollups['buckets']] == ['2026-03-01 00:00:00', '2026-03-02 00:00:00']
+
+    first, second = rollups['buckets']
+    assert (first['events'], first['correct'], first['incorrect']) == (3, 2, 1)
+    assert first['reaction_time'] == {'count': 2, 'mean': 500, 'stddev': 100, 'min': 400, 'max': 600}
+    assert (second['events'], second['correct'], second['incorrect']) == (3, 1, 1)
+    assert second['reaction_time']['min'] == 300 and second['reaction_time']['max'] == 500
+
+    totals = rollups['totals']
+    assert (totals['events'], totals['correct'], totals['incorrect']) == (6, 3, 2)
+    assert totals['accuracy'] == 0.6
+    assert totals['reaction_time']['mean'] == 450
+    assert math.isclose(totals['reaction_time']['stddev'], math.sqrt(12500))
+
+
+def test_coarsest_aligned_grain_is_chosen(service):
+    hourly = service.get_rollups('cyber_runner', '2026-03-01T10:00:00Z', '2026-03-01T12:00:00Z')
+    assert hourly['grain'] == 'hour'
+    assert [bucket['events'] for bucket in hourly['buckets']] == [3]
+
+    by_minute = service.get_rollups('cyber_runner', '2026-03-01T10:15:00Z', '2026-03-01T10:48:00Z')
+    assert by_minute['grain'] == 'minute'
+    assert [(bucket['bucket_start'], bucket['events']) for bucket in by_minute['buckets']] == [
+        ('2026-03-01 10:15:00', 2),
+        ('2026-03-01 10:47:00', 1),
+    ]
+
+    forced = service.get_rollups('math_quest', '2026-03-02T09:30:00Z', '2026-03-03T00:00:00Z', grain='hour')
+    assert forced['grain'] == 'hour' and forced['totals']['events'] == 1
+    assert (forced['start'], forced['end']) == ('2026-03-02T09:00:00+00:00', '2026-03-03T00:00:00+00:00')
+
+    # The bucket holding an unaligned end is read whole, and the range reports it
+    partial = service.get_rollups('cyber_runner', '2026-03-01T10:00:00Z', '2026-03-01T10:15:20Z', grain='minute')
+    assert partial['totals']['events'] == 2
+    assert partial['end'] == '2026-03-01T10:16:00+00:00'
+
+    with pytest.raises(ValueError):
+        service.get_rollups('cyber_runner', '2026-03-02', '2026-03-01')
+    with pytest.raises(ValueError):
+        service.get_rollups('cyber_runner', '2026-03-01', '2026-03-02', grain='week')
+
+
+def test_rebuild_matches_incremental_rollups(service):
+    with service.connections.reader() as connection:
+        incremental = connection.execute('SELECT * FROM telemetry_rollups ORDER BY 1, 2, 3').fetchall()
+    assert service.rebuild_rollups() == len(incremental)
+    with service.connections.reader() as connection:
+        assert connection.execute('SELECT * FROM telemetry_rollups ORDER BY 1, 2, 3').fetchall() == incremental
+
+
+def test_rebuild_command_and_endpoint(app, client, runner, tmp_path, monkeypatch):
+    service = TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db', check_same_thread=False))
+    monkeypatch.setattr(app_module, 'telemetry_service', service)
+    service.ensure_schema()
+    with service.connections.writer() as connection, connection:
+        connection.executemany(INSERT_EVENT_SQL, [TelemetryService._event_row(event) for event in EVENTS])
+    assert service.get_rollups('cyber_runner', '2026-03-01', '2026-03-03')['buckets'] == []
+
+    result = runner.invoke(args=['rebuild-telemetry-metrics'])
+    assert result.exit_code == 0, result.output
+
+    _, headers = auth_headers(client, 'painel@example.com', 'senha-segura-123', 'Escola Painel')
+    ok = client.get('/api/telemetry/rollups/cyber_runner?start=2026-03-01&end=2026-03-03', headers=headers)
+    assert ok.status_code == 200
+    assert ok.get_json()['totals']['events'] == 6
+    invalid = client.get('/api/telemetry/rollups/cyber_runner?start=ontem&end=hoje', headers=headers)
+    assert invalid.status_code == 400
+
+
+def test_rebuild_parses_timestamps_like_ingest(tmp_path):
+    service = TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db'))
+    service.process_batch([
+        response('2026-03-01T23:30:00-03:00', True, 400),
+        response('2026-03-01T23:30:00+0530', True, 500),
+        response('2026-03-01T23:30:00.123456Z', False, 600),
+        response('2026-03-01T23', True, 700),
+        response('2026-03-01 23:30', False, 800),
+    ])
+    with service.connections.reader() as connection:
+        incremental = connection.execute('SELECT * FROM telemetry_rollups ORDER BY 1, 2, 3').fetchall()
+    assert ('minute', 'cyber_runner', '2026-03-01 18:00:00') in [row[:3] for row in incremental]
+
+    service.rebuild_rollups()
+    with service.connections.reader() as connection:
+        assert connection.execute('SELECT * FROM telemetry_rollups ORDER BY 1, 2, 3').fetchall() == incremental
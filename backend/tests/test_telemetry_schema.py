@@ -0,0 +1,44 @@
+"""TelemetryService schema ownership: versioned migrations and indexed reads."""
+
+import sqlite3
+
+from telemetry_service import MIGRATIONS, TelemetryService
+from tests.test_telemetry_ingest import make_events
+
+
+def plan(connection, statement, parameters):
+    return ' | '.join(row[-1] for row in connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters))
+
+
+def test_migrations_are_recorded_and_idempotent(tmp_path):
+    path = str(tmp_path / 'telemetry.db')
+    service = TelemetryService.from_path(path)
+    assert service.migrate() == [version for version, _ in MIGRATIONS]
+    assert TelemetryService.from_path(path).migrate() == []
+
+    with sqlite3.connect(path) as connection:
+        versions = [row[0] for row in connection.execute('SELECT version FROM telemetry_schema_version')]
+        indexes = {row[1] for row in connection.execute("PRAGMA index_list('cognitive_events')")}
+    assert versions == [version for version, _ in MIGRATIONS]
+    assert {'ix_cognitive_events_session_time', 'ix_cognitive_events_module_session'} <= indexes
+    service.connections.close()
+
+
+def test_schema_is_created_on_first_use(tmp_path):
+    service = TelemetryService(sqlite3.connect(tmp_path / 'telemetry.db'))
+    assert service.process_batch(make_events(10))['processed'] == 10
+    assert service.get_session_summary('sessao-0')['total_events'] == 10
+
+
+def test_session_and_module_lookups_use_indexes(tmp_path):
+    connection = sqlite3.connect(tmp_path / 'telemetry.db')
+    service = TelemetryService(connection)
+    service.process_batch(make_events(1000))
+    connection.execute('ANALYZE')
+
+    summary = plan(connection, 'SELECT event_type, event_data, timestamp FROM cognitive_events WHERE session_id = ? ORDER BY timestamp', ('sessao-3',))
+    assert 'USING INDEX ix_cognitive_events_session_time' in summary
+    assert 'TEMP B-TREE' not in summary
+
+    sessions = plan(connection, 'SELECT DISTINCT session_id FROM cognitive_events WHERE game_module = ?', ('cyber_runner',))
+    assert 'USING COVERING INDEX ix_cognitive_events_module_session' in sessions